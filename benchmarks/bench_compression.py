@@ -0,0 +1,72 @@
+"""
+Bandwidth versus CPU of response compression: size, ratio and compress/decompress time of a
+contact list page and an NDJSON export at several gzip levels and brotli qualities.
+
+Usage::
+
+    python benchmarks/bench_compression.py --rows 500 --export-rows 20000
+    python benchmarks/bench_compression.py --gzip-levels 1 6 9 --brotli-qualities 1 4 11
+
+brotli is measured only when the ``brotli`` package is installed.
+"""
+import argparse
+import gzip
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_serialization import make_rows
+
+from src.services import compression
+from src.services.json_render import render_rows
+
+
+def timed(repeat: int, run) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def measure(name: str, body: bytes, encoding: str, level: int, repeat: int):
+    options = {"gzip_level": level} if encoding == "gzip" else {"brotli_quality": level}
+    compressed = compression.compress(body, encoding, **options)
+    decompress = gzip.decompress if encoding == "gzip" else compression.brotli.decompress
+    compress_ms = timed(repeat, lambda: compression.compress(body, encoding, **options))
+    decompress_ms = timed(repeat, lambda: decompress(compressed))
+    print(
+        f"{name:8} {encoding:5} {level:5} {len(compressed):12,} {len(body) / len(compressed):7.1f}x "
+        f"{compress_ms:11.3f} {decompress_ms:13.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--export-rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--gzip-levels", type=int, nargs="+", default=[1, 6, 9])
+    parser.add_argument("--brotli-qualities", type=int, nargs="+", default=[1, 4, 11])
+    args = parser.parse_args()
+
+    payloads = {
+        "list": render_rows(make_rows(args.rows)).encode(),
+        "export": "".join(render_rows([row])[1:-1] + "\n" for row in make_rows(args.export_rows)).encode(),
+    }
+    print(f"{'payload':8} {'codec':5} {'level':>5} {'bytes':>12} {'ratio':>8} {'compress ms':>11} {'decompress ms':>13}")
+    for name, body in payloads.items():
+        print(f"{name:8} {'none':5} {'-':>5} {len(body):12,} {1:7.1f}x {0:11.3f} {0:13.3f}")
+        for level in args.gzip_levels:
+            measure(name, body, "gzip", level, args.repeat)
+        if compression.brotli is not None:
+            for quality in args.brotli_qualities:
+                measure(name, body, "br", quality, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Cost of verifying the same access token with ``jwt.decode`` on every call versus
+``Auth.decode_token`` with the verified-token cache.
+
+Usage::
+
+    python benchmarks/bench_jwt_cache.py --iterations 20000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jose import jwt
+
+from src.services.auth import auth_service
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = auth_service.create_access_token(data={"sub": "bench@example.com"})
+
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        jwt.decode(token, auth_service.SECRET_KEY, algorithms=[auth_service.ALGORITHM])
+    uncached = (time.perf_counter() - started) / args.iterations
+
+    await auth_service.token_cache.clear()
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        await auth_service.decode_token(token)
+    cached = (time.perf_counter() - started) / args.iterations
+
+    print(f"iterations={args.iterations}")
+    print(f"jwt.decode         : {uncached * 1e6:8.2f} us/call")
+    print(f"decode_token cached: {cached * 1e6:8.2f} us/call ({uncached / cached:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
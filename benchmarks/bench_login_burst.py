@@ -0,0 +1,126 @@
+"""
+Latency of ``GET /api/app_hw/`` while a burst of logins is running, with bcrypt run
+inline on the event loop, in the default thread pool, and in the password process pool.
+
+Usage::
+
+    python benchmarks/bench_login_burst.py --logins 64 --probes 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from main import app
+from src.database.db import get_db
+from src.entity.models import Base, Contact, User
+from src.services.auth import auth_service
+from src.services.passwords import PasswordHasher, pwd_context
+from src.services.rate_limit import rate_limiter
+
+EMAIL = "bench@example.com"
+PASSWORD = "benchpw"
+
+
+async def seed(engine):
+    async with engine.begin() as conn:
+        # WAL keeps the login UPDATEs from blocking the probe's reads.
+        await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(bind=engine)() as db:
+        user = User(username="bench", email=EMAIL, password=pwd_context.hash(PASSWORD), confirmed=True)
+        db.add(user)
+        await db.flush()
+        db.add_all(
+            Contact(
+                first_name=f"First{i}", last_name=f"Last{i}", email=f"contact{i}@example.com",
+                phone_number=f"+380{i:09d}", date_of_birth=date(1990, 1, 1), owner_id=user.id,
+            )
+            for i in range(100)
+        )
+        await db.commit()
+
+
+async def inline_verify(plain_password, hashed_password):
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+async def threadpool_verify(plain_password, hashed_password):
+    return await run_in_threadpool(pwd_context.verify, plain_password, hashed_password)
+
+
+async def measure(client, headers, logins: int, probes: int) -> list[float]:
+    async def login():
+        await client.post("/api/auth/login", data={"username": EMAIL, "password": PASSWORD})
+
+    async def probe():
+        latencies = []
+        for _ in range(probes):
+            started = time.perf_counter()
+            response = await client.get("/api/app_hw/", headers=headers)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0.01)
+        return latencies
+
+    burst = asyncio.gather(*(login() for _ in range(logins)))
+    latencies = await probe()
+    await burst
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--probes", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}", connect_args={"timeout": 30}
+    )
+    await seed(engine)
+    session_maker = async_sessionmaker(expire_on_commit=False, bind=engine)
+
+    async def override_get_db():
+        async with session_maker() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    rate_limiter.enabled = False
+    headers = {"Authorization": f"Bearer {auth_service.create_access_token(data={'sub': EMAIL})}"}
+    hasher = PasswordHasher(workers=args.workers, max_queue=args.logins)
+    await hasher.hash("warm up")
+
+    modes = {
+        "idle": None,
+        "inline": inline_verify,
+        "threadpool": threadpool_verify,
+        "process pool": hasher.verify,
+    }
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    print(f"logins={args.logins} probes={args.probes} workers={args.workers}")
+    print(f"{'mode':<14}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode, verify in modes.items():
+            auth_service.verify_password = verify or inline_verify
+            latencies = await measure(client, headers, 0 if verify is None else args.logins, args.probes)
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{mode:<14}{statistics.median(latencies):>10.1f}{p99:>10.1f}{latencies[-1]:>10.1f}")
+    hasher.shutdown()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
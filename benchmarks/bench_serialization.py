@@ -0,0 +1,83 @@
+"""
+Time to serialize one page of contacts for ``GET /api/app_hw/``: the ``ContactResponse``
+path (ORM objects, per-item ``model_validate``/``model_dump`` and FastAPI's response model
+validation and encoding) versus the ``CONTACT_FAST_JSON`` path (row mappings rendered with
+orjson). Database time is excluded; both paths start from already fetched results.
+
+Usage::
+
+    python benchmarks/bench_serialization.py --rows 500 --repeat 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from src.entity.models import Contact
+from src.schemas.app_hw import ContactResponse
+from src.services.json_render import render_rows
+
+
+def make_rows(rows: int) -> list[dict]:
+    return [
+        dict(
+            id=i, first_name=f"First{i}", last_name=f"Last{i}", email=f"contact{i}@example.com",
+            avatar=f"https://res.cloudinary.com/demo/image/upload/ContactsAvatars/{i}" if i % 2 else None,
+            phone_number=f"+380{i:09d}", date_of_birth=date(1990, 1 + i % 12, 1 + i % 28),
+            description="Met at the conference, follow up about the project. " * 3,
+        )
+        for i in range(1, rows + 1)
+    ]
+
+
+async def old_path(contacts: list[Contact], field) -> bytes:
+    items = [ContactResponse.model_validate(contact).model_dump(mode="json") for contact in contacts]
+    content = await serialize_response(field=field, response_content=items)
+    return JSONResponse(content).body
+
+
+def new_path(rows: list[dict]) -> bytes:
+    return render_rows(rows).encode()
+
+
+def timed(repeat: int, run) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    contacts = [Contact(**row) for row in rows]
+    field = create_model_field(name="Response", type_=list[ContactResponse], mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    assert json.loads(loop.run_until_complete(old_path(contacts, field))) == json.loads(new_path(rows))
+    old_ms = timed(args.repeat, lambda: loop.run_until_complete(old_path(contacts, field)))
+    new_ms = timed(args.repeat, lambda: new_path(rows))
+
+    print(f"rows={args.rows} repeat={args.repeat} (median per page)")
+    print(f"ContactResponse : {old_ms:8.3f} ms")
+    print(f"orjson rows     : {new_ms:8.3f} ms  ({old_ms / new_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,29 @@
+from contextlib import asynccontextmanager
+
 import redis
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
 from sqlalchemy import text
-from sqlalchemy.orm import Session
-from src.database.db import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.db import get_db, session_manager
 from src.routes import app_hw
 from src.routes import auth
+from src.routes import admin
+from src.conf.config import config
+from src.services.auth import auth_service
+from src.services.compression import CompressionMiddleware
+from src.services.metrics import MetricsMiddleware, PoolCollector
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    yield
+    auth_service.password_hasher.shutdown()
+    await session_manager.close()
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 origins = ["*"]
 
@@ -18,23 +33,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Browsers hide response headers from scripts unless they are listed here.
+    expose_headers=["X-Next-Cursor", "ETag"],
+)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=config.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=config.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=config.COMPRESSION_BROTLI_QUALITY,
 )
+app.add_middleware(MetricsMiddleware)
+
+REGISTRY.register(PoolCollector(session_manager))
 
 app.include_router(auth.router, prefix="/api")
 app.include_router(app_hw.router, prefix="/api")
-
+app.include_router(admin.router, prefix="/api")
 
 
 @app.get("/")
-def index():
+async def index():
     return {"message": "Hello, World!"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/api/healthchecker")
-def healthchecker(db: Session = Depends(get_db)):
+async def healthchecker(db: AsyncSession = Depends(get_db)):
     try:
         # Make request
-        result = db.execute(text("SELECT 1"))
+        result = await db.execute(text("SELECT 1"))
         result = result.fetchone()
         if result is None:
             raise HTTPException(status_code=500, detail="Database is not configured correctly")
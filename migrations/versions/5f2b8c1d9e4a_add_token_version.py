@@ -0,0 +1,26 @@
+"""add token version
+
+Revision ID: 5f2b8c1d9e4a
+Revises: 1a86f73341dc
+Create Date: 2026-10-17 10:12:41.532118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2b8c1d9e4a'
+down_revision: Union[str, None] = '1a86f73341dc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,30 @@
+"""add contacts owner_id, id index
+
+Revision ID: 9c3e7a2b4d10
+Revises: 5f2b8c1d9e4a
+Create Date: 2026-10-17 14:03:27.814205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e7a2b4d10'
+down_revision: Union[str, None] = '5f2b8c1d9e4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_contacts_owner_id_id', 'contacts', ['owner_id', 'id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_owner_id_id', table_name='contacts')
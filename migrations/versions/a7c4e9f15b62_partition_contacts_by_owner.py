@@ -0,0 +1,153 @@
+"""partition contacts by owner
+
+Revision ID: a7c4e9f15b62
+Revises: f3a81c6d92b4
+Create Date: 2026-10-17 21:06:38.551730
+
+Moves ``contacts`` to a table hash-partitioned by ``owner_id`` without stopping writes:
+
+1. ``contacts_partitioned`` is created with its partitions and owner-scoped indexes.
+2. A trigger on ``contacts`` mirrors every write into it.
+3. Existing rows are copied in committed batches by ID range. Each batch holds share locks
+   on its source rows, so a concurrent update or delete waits and is mirrored afterwards.
+4. The tables are swapped in one short transaction.
+
+Unique and primary keys of a partitioned table must contain the partition key. The primary key
+becomes ``(owner_id, id)`` and email and phone number are unique per owner. Contacts without
+an owner are unreachable through the API and are not copied.
+
+The old table is kept as ``contacts_unpartitioned`` for rollback; drop it in a later migration
+once the new table is verified.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c4e9f15b62'
+down_revision: Union[str, None] = 'f3a81c6d92b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16
+BATCH_SIZE = 10000
+
+# Final name -> definition on the partitioned table. They are built as <name>_p before the
+# swap, because the old table still holds the final names.
+INDEXES = {
+    'ix_contacts_email': "UNIQUE INDEX {name} ON contacts_partitioned (owner_id, email)",
+    'contacts_phone_number_key': "UNIQUE INDEX {name} ON contacts_partitioned (owner_id, phone_number)",
+    'ix_contacts_owner_id_birthday_ordinal': "INDEX {name} ON contacts_partitioned (owner_id, birthday_ordinal)",
+    'ix_contacts_owner_id_first_name': "INDEX {name} ON contacts_partitioned (owner_id, first_name)",
+    'ix_contacts_owner_id_last_name': "INDEX {name} ON contacts_partitioned (owner_id, last_name)",
+    'ix_contacts_owner_id_version': "INDEX {name} ON contacts_partitioned (owner_id, version)",
+    # Must match the search indexes of d2a95c7e18f4.
+    'ix_contacts_search_vector': "INDEX {name} ON contacts_partitioned USING gin (owner_id, search_vector)",
+    'ix_contacts_search_trgm': (
+        "INDEX {name} ON contacts_partitioned USING gin "
+        "(owner_id, (first_name || ' ' || last_name || ' ' || email || ' ' || phone_number) gin_trgm_ops)"
+    ),
+}
+# Indexes of the unpartitioned table; (owner_id, id) is covered by the new primary key and
+# every query is scoped to an owner, so the single-column name indexes are not rebuilt.
+OLD_INDEXES = [
+    'contacts_pkey', 'ix_contacts_owner_id_id', 'ix_contacts_first_name', 'ix_contacts_last_name', *INDEXES,
+]
+
+
+def copied_columns(conn) -> list[str]:
+    # Generated columns (search_vector) are computed by the new table itself.
+    return conn.execute(sa.text(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = 'contacts' AND is_generated = 'NEVER' "
+        "ORDER BY ordinal_position"
+    )).scalars().all()
+
+
+def rename_indexes(names, old_suffix: str, new_suffix: str) -> None:
+    for name in names:
+        op.execute(f"ALTER INDEX IF EXISTS {name}{old_suffix} RENAME TO {name}{new_suffix}")
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    names = copied_columns(conn)
+    columns = ", ".join(names)
+    new_columns = ", ".join(f"NEW.{name}" for name in names)
+
+    op.execute(
+        "CREATE TABLE contacts_partitioned (LIKE contacts INCLUDING DEFAULTS INCLUDING GENERATED, "
+        "CONSTRAINT contacts_pkey_p PRIMARY KEY (owner_id, id), "
+        "CONSTRAINT contacts_owner_id_fkey_p FOREIGN KEY (owner_id) REFERENCES users (id) ON DELETE CASCADE"
+        ") PARTITION BY HASH (owner_id)"
+    )
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE contacts_p{remainder} PARTITION OF contacts_partitioned "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+    # Built while the table is empty; indexes on a partitioned table can not be built CONCURRENTLY.
+    for name, definition in INDEXES.items():
+        op.execute("CREATE " + definition.format(name=f"{name}_p"))
+
+    op.execute(f"""
+        CREATE FUNCTION contacts_mirror() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM contacts_partitioned WHERE owner_id = OLD.owner_id AND id = OLD.id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.owner_id IS NOT NULL THEN
+                INSERT INTO contacts_partitioned ({columns}) VALUES ({new_columns}) ON CONFLICT DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER contacts_mirror AFTER INSERT OR UPDATE OR DELETE ON contacts "
+        "FOR EACH ROW EXECUTE FUNCTION contacts_mirror()"
+    )
+
+    backfill = sa.text(
+        f"INSERT INTO contacts_partitioned ({columns}) SELECT {columns} FROM contacts "
+        "WHERE id > :low AND id <= :high AND owner_id IS NOT NULL FOR SHARE ON CONFLICT DO NOTHING"
+    )
+    # Each batch commits on its own; rows written meanwhile are mirrored by the trigger.
+    with op.get_context().autocommit_block():
+        max_id = conn.execute(sa.text("SELECT coalesce(max(id), 0) FROM contacts")).scalar()
+        for low in range(0, max_id, BATCH_SIZE):
+            conn.execute(backfill, {"low": low, "high": low + BATCH_SIZE})
+
+    # The swap itself only renames; the exclusive lock is held for milliseconds. Waiting for it
+    # behind a long transaction would queue every other query, so give up instead.
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    op.execute("LOCK TABLE contacts IN ACCESS EXCLUSIVE MODE")
+    op.execute("DROP TRIGGER contacts_mirror ON contacts")
+    op.execute("DROP FUNCTION contacts_mirror()")
+    op.execute("ALTER TABLE contacts RENAME TO contacts_unpartitioned")
+    rename_indexes(OLD_INDEXES, "", "_unpartitioned")
+    op.execute("ALTER TABLE contacts_partitioned RENAME TO contacts")
+    op.execute("ALTER TABLE contacts RENAME CONSTRAINT contacts_owner_id_fkey_p TO contacts_owner_id_fkey")
+    rename_indexes(['contacts_pkey', *INDEXES], "_p", "")
+    # The sequence would otherwise be dropped together with the old table.
+    op.execute("ALTER SEQUENCE contacts_id_seq OWNED BY contacts.id")
+    op.execute("ANALYZE contacts")
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    columns = ", ".join(copied_columns(conn))
+
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    op.execute("LOCK TABLE contacts IN ACCESS EXCLUSIVE MODE")
+    # Fails on emails or phone numbers shared by several owners, which only the partitioned
+    # table allows; resolve those before downgrading rather than dropping rows.
+    op.execute("DELETE FROM contacts_unpartitioned WHERE owner_id IS NOT NULL")
+    op.execute(f"INSERT INTO contacts_unpartitioned ({columns}) SELECT {columns} FROM contacts")
+    op.execute("ALTER SEQUENCE contacts_id_seq OWNED BY contacts_unpartitioned.id")
+    op.execute("DROP TABLE contacts")
+    op.execute("ALTER TABLE contacts_unpartitioned RENAME TO contacts")
+    rename_indexes(OLD_INDEXES, "_unpartitioned", "")
+    op.execute("ANALYZE contacts")
@@ -0,0 +1,31 @@
+"""add users contacts version
+
+Revision ID: b3f9d6e2c4a8
+Revises: e1b7c3a9f5d2
+Create Date: 2026-10-18 09:41:12.207385
+
+The list ETag was built from the count and highest version of the user's contacts. Contact
+versions are drawn from a sequence when the statement runs, so a write that commits after a
+later one left the pair unchanged. A per-user counter bumped in every write transaction
+replaces it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f9d6e2c4a8'
+down_revision: Union[str, None] = 'e1b7c3a9f5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A constant default is stored in the catalog, so the table is not rewritten.
+    op.add_column('users', sa.Column('contacts_version', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'contacts_version')
@@ -0,0 +1,48 @@
+"""add contacts birthday ordinal
+
+Revision ID: b84d1f6e2a93
+Revises: 9c3e7a2b4d10
+Create Date: 2026-10-17 15:21:06.437912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b84d1f6e2a93'
+down_revision: Union[str, None] = '9c3e7a2b4d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+# Day of the year of the birthday's month and day in a leap year (2000), as in models.birthday_ordinal.
+BACKFILL = sa.text(
+    "UPDATE contacts SET birthday_ordinal = EXTRACT(DOY FROM make_date("
+    "2000, EXTRACT(MONTH FROM date_of_birth)::int, EXTRACT(DAY FROM date_of_birth)::int))::smallint "
+    "WHERE id > :low AND id <= :high AND birthday_ordinal IS NULL AND date_of_birth IS NOT NULL"
+)
+
+
+def upgrade() -> None:
+    op.add_column('contacts', sa.Column('birthday_ordinal', sa.SmallInteger(), nullable=True))
+    conn = op.get_bind()
+    # Each batch commits on its own, so the backfill never holds row locks on the whole table.
+    with op.get_context().autocommit_block():
+        max_id = conn.execute(sa.text("SELECT coalesce(max(id), 0) FROM contacts")).scalar()
+        for low in range(0, max_id, BATCH_SIZE):
+            conn.execute(BACKFILL, {"low": low, "high": low + BATCH_SIZE})
+        # Rows inserted while the batches ran.
+        conn.execute(BACKFILL, {"low": max_id, "high": 2 ** 31 - 1})
+        op.create_index(
+            'ix_contacts_owner_id_birthday_ordinal', 'contacts', ['owner_id', 'birthday_ordinal'],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_owner_id_birthday_ordinal', table_name='contacts')
+    op.drop_column('contacts', 'birthday_ordinal')
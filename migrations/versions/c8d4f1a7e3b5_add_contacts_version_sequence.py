@@ -0,0 +1,32 @@
+"""add contacts version sequence
+
+Revision ID: c8d4f1a7e3b5
+Revises: a7c4e9f15b62
+Create Date: 2026-10-17 22:14:05.390417
+
+Contact versions come from ``contacts_version_seq`` instead of the application clock, so they
+only grow even when the application servers' clocks disagree. The sequence starts above the
+highest existing version, which was written as nanoseconds since the epoch.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d4f1a7e3b5'
+down_revision: Union[str, None] = 'a7c4e9f15b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE IF NOT EXISTS contacts_version_seq AS bigint")
+    op.execute("SELECT setval('contacts_version_seq', (SELECT coalesce(max(version), 0) + 1 FROM contacts), false)")
+    # Setting a default on the partitioned table applies it to every partition.
+    op.execute("ALTER TABLE contacts ALTER COLUMN version SET DEFAULT nextval('contacts_version_seq')")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE contacts ALTER COLUMN version SET DEFAULT 0")
+    op.execute("DROP SEQUENCE contacts_version_seq")
@@ -0,0 +1,48 @@
+"""add contacts search
+
+Revision ID: d2a95c7e18f4
+Revises: b84d1f6e2a93
+Create Date: 2026-10-17 16:48:52.109374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a95c7e18f4'
+down_revision: Union[str, None] = 'b84d1f6e2a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match SEARCH_VECTOR and SEARCH_TEXT in src/repository/app_hw.py.
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', first_name || ' ' || last_name), 'A') || "
+    "setweight(to_tsvector('simple', email || ' ' || phone_number), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+)
+SEARCH_TEXT = "(first_name || ' ' || last_name || ' ' || email || ' ' || phone_number)"
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # btree_gin lets owner_id lead the GIN indexes, so a search only reads the owner's entries.
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    op.execute(f"ALTER TABLE contacts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED")
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_contacts_search_vector "
+            "ON contacts USING gin (owner_id, search_vector)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_contacts_search_trgm "
+            f"ON contacts USING gin (owner_id, {SEARCH_TEXT} gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_search_trgm', table_name='contacts')
+    op.drop_index('ix_contacts_search_vector', table_name='contacts')
+    op.drop_column('contacts', 'search_vector')
@@ -0,0 +1,59 @@
+"""compute contacts birthday ordinal
+
+Revision ID: e1b7c3a9f5d2
+Revises: c8d4f1a7e3b5
+Create Date: 2026-10-17 22:41:19.762083
+
+``birthday_ordinal`` is filled by a trigger from ``date_of_birth`` instead of by the
+application, so raw SQL writes and other clients keep it right. Postgres can not add a
+generation expression to an existing column without rewriting the table; the trigger needs no
+rewrite. Row triggers on a partitioned table require Postgres 13.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b7c3a9f5d2'
+down_revision: Union[str, None] = 'c8d4f1a7e3b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+# Rows the application wrote without an ordinal; the trigger fills them in.
+BACKFILL = sa.text(
+    "UPDATE contacts SET date_of_birth = date_of_birth "
+    "WHERE id > :low AND id <= :high AND birthday_ordinal IS NULL AND date_of_birth IS NOT NULL"
+)
+
+
+def upgrade() -> None:
+    # As in b84d1f6e2a93 and models.BIRTHDAY_ORDINAL; NULL for a NULL date_of_birth.
+    op.execute("""
+        CREATE FUNCTION contacts_birthday_ordinal() RETURNS trigger AS $$
+        BEGIN
+            NEW.birthday_ordinal := EXTRACT(DOY FROM make_date(
+                2000, EXTRACT(MONTH FROM NEW.date_of_birth)::int, EXTRACT(DAY FROM NEW.date_of_birth)::int
+            ))::smallint;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER contacts_birthday_ordinal BEFORE INSERT OR UPDATE OF date_of_birth, birthday_ordinal "
+        "ON contacts FOR EACH ROW EXECUTE FUNCTION contacts_birthday_ordinal()"
+    )
+    conn = op.get_bind()
+    # The trigger is committed first; each batch then commits on its own, as in b84d1f6e2a93.
+    with op.get_context().autocommit_block():
+        max_id = conn.execute(sa.text("SELECT coalesce(max(id), 0) FROM contacts")).scalar()
+        for low in range(0, max_id, BATCH_SIZE):
+            conn.execute(BACKFILL, {"low": low, "high": low + BATCH_SIZE})
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER contacts_birthday_ordinal ON contacts")
+    op.execute("DROP FUNCTION contacts_birthday_ordinal()")
@@ -0,0 +1,38 @@
+"""add contacts owner_id, name indexes
+
+Revision ID: e6f0b3c85a27
+Revises: d2a95c7e18f4
+Create Date: 2026-10-17 18:34:15.902647
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6f0b3c85a27'
+down_revision: Union[str, None] = 'd2a95c7e18f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_contacts_owner_id_first_name': ['owner_id', 'first_name'],
+    'ix_contacts_owner_id_last_name': ['owner_id', 'last_name'],
+}
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can not run inside a transaction; it builds without blocking writes.
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(
+                name, 'contacts', columns, unique=False, postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='contacts', postgresql_concurrently=True, if_exists=True)
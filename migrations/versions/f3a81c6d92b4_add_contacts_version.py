@@ -0,0 +1,33 @@
+"""add contacts version
+
+Revision ID: f3a81c6d92b4
+Revises: e6f0b3c85a27
+Create Date: 2026-10-17 19:42:51.218304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a81c6d92b4'
+down_revision: Union[str, None] = 'e6f0b3c85a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A constant server default is a metadata-only change, existing rows are not rewritten.
+    op.add_column('contacts', sa.Column('version', sa.BigInteger(), server_default='0', nullable=False))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_contacts_owner_id_version', 'contacts', ['owner_id', 'version'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_owner_id_version', table_name='contacts')
+    op.drop_column('contacts', 'version')
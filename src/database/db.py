@@ -1,34 +1,130 @@
 import contextlib
+import logging
+import random
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from fastapi import HTTPException
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
 
 from src.conf.config import config
+from src.database.pool import MonitoredQueuePool, PoolMonitor
+from src.services.metrics import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+
+def pool_options(url) -> dict:
+    """
+    Connection pool arguments for ``create_async_engine`` taken from the settings.
+
+    SQLite keeps SQLAlchemy's own pool choice, the queue pool options do not apply to it.
+
+    :param url: Database URL.
+    :return: Keyword arguments for the engine.
+    """
+
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": MonitoredQueuePool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain SELECTs to a replica and everything else to the primary.
+
+    Once the session has written anything (or ``info["use_primary"]`` is set) it sticks
+    to the primary, so a request always reads its own writes.
+    """
+
+    def __init__(self, *args, primary=None, replicas=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self._primary = primary
+        self._replica = random.choice(replicas) if replicas else None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._primary is None:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if self._replica is None or self.info.get("use_primary"):
+            return self._primary
+        if self._flushing or not getattr(clause, "is_select", False) or clause._for_update_arg is not None:
+            self.info["use_primary"] = True
+            return self._primary
+        return self._replica
+
+
+def use_primary(session):
+    """
+    Pin a session to the primary for the rest of its life.
+
+    For reads whose result decides a write, where replica lag is not acceptable.
+
+    :param session: SQLAlchemy async session.
+    :return:
+    """
+
+    session.info["use_primary"] = True
+
 
 class DatabaseSessionManager:
-    def __init__(self, url):
-        self._engine = create_engine(url)
-        self._session_maker = sessionmaker(autoflush=False, autocommit=False, bind=self._engine)
+    def __init__(self, url, replica_urls=(), **engine_options):
+        self._engine = create_async_engine(url, **engine_options)
+        self._replica_engines = [create_async_engine(replica_url, **engine_options) for replica_url in replica_urls]
+        self._session_maker = async_sessionmaker(
+            autoflush=False, autocommit=False, expire_on_commit=False, bind=self._engine,
+            sync_session_class=RoutingSession,
+            primary=self._engine.sync_engine,
+            replicas=[engine.sync_engine for engine in self._replica_engines],
+        )
+        self.pool_monitor = PoolMonitor(self._engine)
+        self.replica_pool_monitors = [PoolMonitor(engine) for engine in self._replica_engines]
+        for engine in [self._engine, *self._replica_engines]:
+            instrument_engine(engine)
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @property
+    def replica_engines(self):
+        return self._replica_engines
 
-    @contextlib.contextmanager
-    def session(self):
+    @contextlib.asynccontextmanager
+    async def session(self):
         if self._session_maker is None:
             raise Exception("Session manager is not initialized.")
         session = self._session_maker()
         try:
-            print("Сесія створена")
             yield session
+        except HTTPException:
+            # Routine 404s and 400s raised by the handlers, not database failures.
+            await session.rollback()
+            raise
         except Exception as err:
-            print(err)
-            print("Помилка в сесії")
-            session.rollback()
+            logger.warning("Session rolled back: %s", err)
+            await session.rollback()
             raise
         finally:
-            print("Сесія закрита")
-            session.close()
+            await session.close()
+
+    async def close(self):
+        if self._engine is None:
+            return
+        await self._engine.dispose()
+        for engine in self._replica_engines:
+            await engine.dispose()
 
-session_manager = DatabaseSessionManager(config.DB_URL)
+session_manager = DatabaseSessionManager(
+    config.DB_URL, replica_urls=config.DB_REPLICA_URLS, **pool_options(config.DB_URL)
+)
 
-def get_db():
-    with session_manager.session() as session:
-        yield session
\ No newline at end of file
+async def get_db():
+    async with session_manager.session() as session:
+        yield session
@@ -0,0 +1,111 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that reports how long each checkout waited for a connection.
+    """
+
+    monitor = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self.monitor is not None:
+                self.monitor.record_timeout(time.perf_counter() - started)
+            raise
+        if self.monitor is not None:
+            self.monitor.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.monitor = self.monitor
+        return pool
+
+
+class PoolMonitor:
+    """
+    Live statistics of an engine's connection pool.
+    """
+
+    def __init__(self, engine):
+        self._engine = engine.sync_engine if hasattr(engine, "sync_engine") else engine
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.last_wait = 0.0
+
+        if isinstance(self._engine.pool, MonitoredQueuePool):
+            self._engine.pool.monitor = self
+        event.listen(self._engine, "checkout", self._on_checkout)
+        event.listen(self._engine, "connect", self._on_connect)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def record_wait(self, seconds: float):
+        """
+        Record the time a single checkout spent waiting for a connection.
+
+        :param seconds: Wait time in seconds.
+        :return:
+        """
+
+        self.wait_count += 1
+        self.wait_total += seconds
+        self.last_wait = seconds
+        if seconds > self.wait_max:
+            self.wait_max = seconds
+
+    def record_timeout(self, seconds: float):
+        """
+        Record a checkout that gave up with a ``QueuePool limit`` timeout.
+
+        :param seconds: Time spent waiting before the timeout.
+        :return:
+        """
+
+        self.timeouts += 1
+        self.record_wait(seconds)
+
+    def snapshot(self) -> dict:
+        """
+        Current pool state and checkout wait statistics.
+
+        :return: Dictionary with connection counts and wait times in milliseconds.
+        """
+
+        pool = self._engine.pool
+        size = pool.size() if hasattr(pool, "size") else 0
+        checked_out = pool.checkedout() if hasattr(pool, "checkedout") else 0
+        idle = pool.checkedin() if hasattr(pool, "checkedin") else 0
+        overflow = max(pool.overflow(), 0) if hasattr(pool, "overflow") else 0
+        max_overflow = getattr(pool, "_max_overflow", 0)
+        return {
+            "pool_class": type(pool).__name__,
+            "size": size,
+            "max_overflow": max_overflow,
+            "checked_out": checked_out,
+            "idle": idle,
+            "overflow": overflow,
+            "available": max(size + max(max_overflow, 0) - checked_out, 0),
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "timeouts": self.timeouts,
+            "wait_ms_last": self.last_wait * 1000,
+            "wait_ms_avg": self.wait_total / self.wait_count * 1000 if self.wait_count else 0.0,
+            "wait_ms_max": self.wait_max * 1000,
+        }
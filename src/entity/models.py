@@ -1,13 +1,59 @@
 from datetime import date
 
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase, relationship
-from sqlalchemy import String, Text, Date, DateTime, func, ForeignKey, Boolean
+from sqlalchemy import String, Text, Date, DateTime, func, ForeignKey, Boolean, Integer, BigInteger, Index, SmallInteger, DDL, event
+from sqlalchemy import Computed, case, extract, literal_column
+from sqlalchemy.sql.expression import FunctionElement
 
 
 class Base(DeclarativeBase):
     pass
 
 
+def birthday_ordinal(day: date) -> int:
+    """
+    Day of the year of ``day``'s month and day in a leap year, 1 to 366.
+
+    Feb 29 gets its own slot (60), so every calendar day maps to the same ordinal in every year.
+    :param day:
+    :return:
+    """
+
+    return date(2000, day.month, day.day).timetuple().tm_yday
+
+
+# SQL counterpart of birthday_ordinal(): days before the month in a leap year plus the day.
+DAYS_BEFORE_MONTH = {1: 0, 2: 31, 3: 60, 4: 91, 5: 121, 6: 152, 7: 182, 8: 213, 9: 244, 10: 274, 11: 305, 12: 335}
+BIRTHDAY_ORDINAL = (
+    case(DAYS_BEFORE_MONTH, value=extract("month", literal_column("date_of_birth")))
+    + extract("day", literal_column("date_of_birth"))
+)
+
+
+class next_contact_version(FunctionElement):
+    """
+    Next contact version, drawn from ``contacts_version_seq`` on Postgres (migration c8d4f1a7e3b5).
+
+    Rendered inline into INSERT and UPDATE, so the value comes from the database clock-free and
+    is read back with RETURNING. SQLite has no sequences and takes the highest version plus one.
+    """
+
+    type = BigInteger()
+    name = "next_contact_version"
+    inherit_cache = True
+
+
+@compiles(next_contact_version)
+def _next_contact_version(element, compiler, **kw):
+    return "nextval('contacts_version_seq')"
+
+
+@compiles(next_contact_version, "sqlite")
+def _next_contact_version_sqlite(element, compiler, **kw):
+    return "(SELECT coalesce(max(version), 0) + 1 FROM contacts)"
+
+
 class User(Base):
     __tablename__ = 'users'
 
@@ -19,6 +65,9 @@ class User(Base):
     created_at: Mapped[date] = mapped_column(DateTime, default=func.now())
     updated_at: Mapped[date] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
     confirmed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=True)
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    # Bumped in the same transaction as every write to the user's contacts; drives the list ETag.
+    contacts_version: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
 
     contacts: Mapped[list["Contact"]] = relationship(
         "Contact", back_populates="owner", cascade="all, delete"
@@ -34,8 +83,55 @@ class Contact(Base):
     avatar: Mapped[str] = mapped_column(String(255), nullable=True)
     phone_number: Mapped[str] = mapped_column(String(20), unique=True)
     date_of_birth: Mapped[date] = mapped_column(Date)
+    # Computed by the database from date_of_birth and read back with RETURNING. create_all builds a
+    # stored generated column; on Postgres a trigger fills the existing column (migration
+    # e1b7c3a9f5d2), because adding a generation expression to it would rewrite the table.
+    birthday_ordinal: Mapped[int] = mapped_column(
+        SmallInteger, Computed(BIRTHDAY_ORDINAL, persisted=True), nullable=True
+    )
     description: Mapped[str] = mapped_column(Text, nullable=True)
+    # Set on every INSERT and UPDATE, including set-based ones; drives the single contact ETag.
+    version: Mapped[int] = mapped_column(
+        BigInteger, default=next_contact_version(), onupdate=next_contact_version(), server_default="0",
+        nullable=False,
+    )
 
     owner_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
 
     owner: Mapped["User"] = relationship("User", back_populates="contacts")
+
+    # Read the database-side version back with RETURNING instead of expiring it on flush.
+    __mapper_args__ = {"eager_defaults": True}
+
+    # On Postgres the table is hash-partitioned by owner_id (migration a7c4e9f15b62), with the
+    # primary key and unique keys prefixed by owner_id. This mapping describes the plain table
+    # that create_all builds for SQLite and the tests.
+    __table_args__ = (
+        Index("ix_contacts_owner_id_id", "owner_id", "id"),
+        Index("ix_contacts_owner_id_birthday_ordinal", "owner_id", "birthday_ordinal"),
+        Index("ix_contacts_owner_id_first_name", "owner_id", "first_name"),
+        Index("ix_contacts_owner_id_last_name", "owner_id", "last_name"),
+        Index("ix_contacts_owner_id_version", "owner_id", "version"),
+    )
+
+
+# SQLite has no tsvector/pg_trgm, so search runs on an FTS5 index kept in sync by triggers.
+# On Postgres the search columns and indexes come from the migrations instead.
+CONTACTS_FTS_COLUMNS = "first_name, last_name, email, phone_number, description"
+for statement in (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5({CONTACTS_FTS_COLUMNS}, "
+    "content='contacts', content_rowid='id')",
+    "CREATE TRIGGER contacts_fts_ai AFTER INSERT ON contacts BEGIN "
+    f"INSERT INTO contacts_fts(rowid, {CONTACTS_FTS_COLUMNS}) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email, new.phone_number, new.description); END",
+    "CREATE TRIGGER contacts_fts_ad AFTER DELETE ON contacts BEGIN "
+    f"INSERT INTO contacts_fts(contacts_fts, rowid, {CONTACTS_FTS_COLUMNS}) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.phone_number, old.description); END",
+    "CREATE TRIGGER contacts_fts_au AFTER UPDATE ON contacts BEGIN "
+    f"INSERT INTO contacts_fts(contacts_fts, rowid, {CONTACTS_FTS_COLUMNS}) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.phone_number, old.description); "
+    f"INSERT INTO contacts_fts(rowid, {CONTACTS_FTS_COLUMNS}) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email, new.phone_number, new.description); END",
+):
+    event.listen(Contact.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Contact.__table__, "before_drop", DDL("DROP TABLE IF EXISTS contacts_fts").execute_if(dialect="sqlite"))
@@ -1,96 +1,269 @@
+import re
 from datetime import date, timedelta
 
-from sqlalchemy import select, func
-from sqlalchemy.orm import Session
-from src.entity.models import Contact
-from src.schemas.app_hw import ContactSchema
+from sqlalchemy import select, update, delete, or_, func, literal, literal_column, text, table, column, String
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from src.entity.models import Contact, User, birthday_ordinal
+from src.schemas.app_hw import ContactResponse, ContactSchema, ContactSelection
+from src.services.cache import contact_cache
+from src.services.metrics import instrumented
 
 
-def get_contacts(limit: int, offset: int, db: Session, user_id: int):
+def _project(stmt, fields):
     """
-    Get contacts based on the provided parameters.
+    Load only the selected columns; reading any other attribute of the result raises instead of
+    lazy-loading it.
+    """
+
+    if fields is None:
+        return stmt
+    return stmt.options(load_only(*(getattr(Contact, name) for name in fields), raiseload=True))
+
+
+def _page(stmt, limit: int, offset: int, user_id: int, after_id: int | None):
+    stmt = stmt.filter(Contact.owner_id == user_id).order_by(Contact.id).limit(limit)
+    if after_id is not None:
+        return stmt.filter(Contact.id > after_id)
+    return stmt.offset(offset)
+
+
+@instrumented
+async def get_contacts(limit: int, offset: int, db: AsyncSession, user_id: int, after_id: int | None = None,
+                       fields: tuple[str, ...] | None = None):
+    """
+    Get contacts based on the provided parameters, ordered by ID.
+
+    With ``after_id`` the page starts right after that contact (keyset pagination) and
+    ``offset`` is ignored; the ``(owner_id, id)`` index makes every page equally cheap.
 
     :param limit: Maximum number of contacts to return.
     :param offset: Number of contacts to skip before returning results.
-    :param db: SQLAlchemy session object.
+    :param db: SQLAlchemy async session object.
     :param user_id: User ID for filtering contacts.
+    :param after_id: ID of the last contact of the previous page.
+    :param fields: Columns to load, all by default.
     :return: List of Contact objects.
     """
 
-    stmt = select(Contact).filter(Contact.owner_id == user_id).offset(offset).limit(limit)
-    contacts = db.execute(stmt)
+    stmt = _page(select(Contact), limit, offset, user_id, after_id)
+    contacts = await db.execute(_project(stmt, fields))
     return contacts.scalars().all()
 
 
-def get_contact_by_id(contact_id: int, db: Session, user_id: int):
+@instrumented
+async def get_contact_rows(limit: int, offset: int, db: AsyncSession, user_id: int, after_id: int | None = None,
+                           fields: tuple[str, ...] | None = None):
+    """
+    Same page as :func:`get_contacts`, as plain rows of the response columns instead of ORM objects.
+
+    :param limit: Maximum number of contacts to return.
+    :param offset: Number of contacts to skip before returning results.
+    :param db: SQLAlchemy async session object.
+    :param user_id: User ID for filtering contacts.
+    :param after_id: ID of the last contact of the previous page.
+    :param fields: Columns to select, defaults to every ``ContactResponse`` field.
+    :return: List of row mappings keyed by field name.
+    """
+
+    columns = [getattr(Contact, name) for name in fields or ContactResponse.model_fields]
+    stmt = _page(select(*columns), limit, offset, user_id, after_id)
+    result = await db.execute(stmt)
+    return result.mappings().all()
+
+
+@instrumented
+async def get_contacts_version(db: AsyncSession, user_id: int):
+    """
+    Get the version of the user's contacts, a single primary key lookup on ``users``.
+
+    Every write bumps it in its own transaction, so it changes with every committed change,
+    including ones that commit after a write that started later.
+
+    :param db: SQLAlchemy async session object.
+    :param user_id: User ID for filtering contacts.
+    :return: Current version, 0 for an unknown user.
+    """
+
+    stmt = select(User.contacts_version).filter(User.id == user_id)
+    return (await db.execute(stmt)).scalar_one_or_none() or 0
+
+
+async def _bump_version(db: AsyncSession, user_id: int):
+    """
+    Bump the user's contacts version inside the current write transaction.
+
+    The row lock orders concurrent writers of the same user, so each commit gets its own value.
+    Contact versions come from a sequence at statement time and can commit out of order.
+    """
+
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        # Contacts changed, not the user.
+        .values(contacts_version=User.contacts_version + 1, updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(stmt)
+
+
+@instrumented
+async def stream_contacts(db: AsyncSession, user_id: int, batch_size: int = 1000):
+    """
+    Stream all of the user's contacts in ID order through a server-side cursor.
+
+    Only one batch of rows is fetched and held at a time, whatever the number of contacts.
+
+    :param db: SQLAlchemy async session object.
+    :param user_id: User ID for filtering contacts.
+    :param batch_size: Rows fetched per round trip.
+    :return: Async iterator of lists of Contact objects.
+    """
+
+    stmt = select(Contact).filter(Contact.owner_id == user_id).order_by(Contact.id)
+    result = await db.stream_scalars(stmt.execution_options(yield_per=batch_size))
+    async for contacts in result.partitions():
+        yield contacts
+
+
+@instrumented
+async def get_contact_by_id(contact_id: int, db: AsyncSession, user_id: int,
+                            fields: tuple[str, ...] | None = None):
     """
     Get contact by ID and check if it belongs to the provided user.
 
     :param contact_id: ID of the contact to retrieve.
-    :param db: SQLAlchemy session object.
+    :param db: SQLAlchemy async session object.
     :param user_id: User ID for filtering contacts.
+    :param fields: Columns to load, all by default.
     :return: Contact object if found, otherwise None.
     """
 
     stmt = select(Contact).filter(Contact.id == contact_id, Contact.owner_id == user_id)
-    contact = db.execute(stmt)
+    contact = await db.execute(_project(stmt, fields))
     return contact.scalar_one_or_none()
 
 
-def get_contact_by_firstname(first_name: str, db: Session, user_id: int):
+@instrumented
+async def get_contact_by_firstname(first_name: str, db: AsyncSession, user_id: int,
+                                   fields: tuple[str, ...] | None = None):
     """
     Get contact by first name and check if it belongs to the provided user.
 
     :param first_name: First name of the contact to retrieve.
-    :param db: SQLAlchemy session object.
+    :param db: SQLAlchemy async session object.
     :param user_id: User ID for filtering contacts.
+    :param fields: Columns to load, all by default.
     :return: Contact object if found, otherwise None.
     """
 
     stmt = select(Contact).filter(Contact.first_name == first_name, Contact.owner_id == user_id)
-    result = db.execute(stmt)
+    result = await db.execute(_project(stmt, fields))
     return result.scalars().all()
 
 
-def get_contact_by_lastname(last_name: str, db: Session, user_id: int):
+@instrumented
+async def get_contact_by_lastname(last_name: str, db: AsyncSession, user_id: int,
+                                  fields: tuple[str, ...] | None = None):
     """
     Get contact by last name and check if it belongs to the provided user.
 
     :param last_name: Last name of the contact to retrieve.
-    :param db: SQLAlchemy session object.
+    :param db: SQLAlchemy async session object.
     :param user_id: User ID for filtering contacts.
+    :param fields: Columns to load, all by default.
     :return: Contact object if found, otherwise None.
     """
 
     stmt = select(Contact).filter(Contact.last_name == last_name, Contact.owner_id == user_id)
-    result = db.execute(stmt)
+    result = await db.execute(_project(stmt, fields))
     return result.scalars().all()
 
 
-def get_upcoming_birthdays(db: Session, user_id: int):
+# Must match the expressions indexed by the search migration.
+SEARCH_VECTOR = literal_column("contacts.search_vector")
+SEARCH_TEXT = literal_column(
+    "(contacts.first_name || ' ' || contacts.last_name || ' ' || contacts.email || ' ' || contacts.phone_number)"
+)
+CONTACTS_FTS = table("contacts_fts", column("rowid"))
+
+
+@instrumented
+async def search_contacts(q: str, limit: int, offset: int, db: AsyncSession, user_id: int):
     """
-    Get contacts with upcoming birthdays within the next week and belonging to the provided user.
+    Search the user's contacts by first name, last name, email, phone and description, best match first.
+
+    On Postgres full-text matches (``search_vector``) are combined with trigram word similarity
+    (``pg_trgm``), so misspelled names are still found. On SQLite the ``contacts_fts`` FTS5 table
+    is used, matching every word of the query as a prefix.
 
-    :param db: SQLAlchemy session object.
+    :param q: Search query.
+    :param limit: Maximum number of contacts to return.
+    :param offset: Number of contacts to skip before returning results.
+    :param db: SQLAlchemy async session object.
     :param user_id: User ID for filtering contacts.
-    :return: List of Contact objects with upcoming birthdays.
+    :return: List of Contact objects.
     """
-    today = date.today()
-    next_week = today + timedelta(days=7)
 
-    stmt = select(Contact).where(
-        (func.to_char(Contact.date_of_birth, 'MM-DD') >= today.strftime('%m-%d')) &
-        (func.to_char(Contact.date_of_birth, 'MM-DD') <= next_week.strftime('%m-%d')) &
-        (Contact.owner_id == user_id)
-    )
+    stmt = select(Contact).filter(Contact.owner_id == user_id)
+    if db.bind.dialect.name == "postgresql":
+        tsquery = func.websearch_to_tsquery("simple", q)
+        # Word similarity compares the query with the closest words of the text rather than the
+        # whole string, so one misspelt name still matches; ``<%`` is served by the trigram index.
+        rank = func.ts_rank(SEARCH_VECTOR, tsquery) + func.word_similarity(q, SEARCH_TEXT)
+        stmt = stmt.filter(or_(SEARCH_VECTOR.op("@@")(tsquery), literal(q, String).op("<%")(SEARCH_TEXT)))
+    else:
+        words = re.findall(r"\w+", q)
+        if not words:
+            return []
+        stmt = stmt.join(CONTACTS_FTS, CONTACTS_FTS.c.rowid == Contact.id).filter(
+            text("contacts_fts MATCH :match").bindparams(match=" ".join(f'"{word}"*' for word in words))
+        )
+        # bm25 is lower for better matches; names weigh more than email and phone, description least.
+        rank = -literal_column("bm25(contacts_fts, 10.0, 10.0, 5.0, 5.0, 1.0)")
+    stmt = stmt.order_by(rank.desc(), Contact.id).offset(offset).limit(limit)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
 
-    result = db.execute(stmt)
+@instrumented
+async def get_upcoming_birthdays(db: AsyncSession, user_id: int, days: int = 7, today: date | None = None,
+                                 fields: tuple[str, ...] | None = None):
+    """
+    Get contacts with birthdays from today through the next ``days`` days and belonging to the provided user.
+
+    The window is a range over ``birthday_ordinal``, served by the ``(owner_id, birthday_ordinal)``
+    index; a window crossing the new year is split into its December and January parts.
+
+    :param db: SQLAlchemy async session object.
+    :param user_id: User ID for filtering contacts.
+    :param days: Length of the window in days.
+    :param today: First day of the window, defaults to the current date.
+    :param fields: Columns to load, all by default.
+    :return: List of Contact objects with upcoming birthdays, soonest first.
+    """
+    today = today or date.today()
+    start = birthday_ordinal(today)
+    end = birthday_ordinal(today + timedelta(days=days))
+
+    stmt = select(Contact).filter(Contact.owner_id == user_id)
+    if days < 365:
+        if start <= end:
+            stmt = stmt.filter(Contact.birthday_ordinal.between(start, end))
+        else:
+            stmt = stmt.filter(or_(Contact.birthday_ordinal >= start, Contact.birthday_ordinal <= end))
+    stmt = stmt.order_by(Contact.birthday_ordinal < start, Contact.birthday_ordinal, Contact.id)
+
+    result = await db.execute(_project(stmt, fields))
     contacts = result.scalars().all()
 
     return contacts
 
 
-def add_contact(body: ContactSchema, db: Session, user_id: int):
+@instrumented
+async def add_contact(body: ContactSchema, db: AsyncSession, user_id: int):
     """
     Add a new contact to the database.
 
@@ -102,68 +275,169 @@ def add_contact(body: ContactSchema, db: Session, user_id: int):
 
     contact = Contact(**body.model_dump(exclude_unset=True), owner_id=user_id)
     db.add(contact)
-    db.commit()
-    db.refresh(contact)
+    await db.flush()
+    await _bump_version(db, user_id)
+    await db.commit()
+    await contact_cache.invalidate(user_id)
+    await db.refresh(contact)
     return contact
 
 
-def update_contact(contact_id: int, body: ContactSchema, db: Session, user_id: int):
+@instrumented
+async def add_contacts(bodies: list[ContactSchema], db: AsyncSession, user_id: int):
+    """
+    Insert a batch of contacts with one multi-row INSERT and commit it.
+
+    Rows whose email or phone number already exists are skipped instead of failing the batch.
+
+    :param bodies: Validated contacts to insert.
+    :param db: SQLAlchemy async session object.
+    :param user_id: User ID of the owner.
+    :return: Set of emails of the inserted contacts.
     """
-    Update an existing contact in the database.
+
+    if not bodies:
+        return set()
+    rows = [dict(body.model_dump(), owner_id=user_id) for body in bodies]
+    insert = postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(Contact).on_conflict_do_nothing().returning(Contact.email)
+    result = await db.execute(stmt, rows)
+    inserted = set(result.scalars().all())
+    if inserted:
+        await _bump_version(db, user_id)
+    await db.commit()
+    await contact_cache.invalidate(user_id)
+    return inserted
+
+
+def _owned(stmt, contact_id: int, user_id: int):
+    return stmt.where(Contact.id == contact_id, Contact.owner_id == user_id)
+
+
+async def _write_returning(stmt, db: AsyncSession, user_id: int):
+    """
+    Run a single-row UPDATE/DELETE that returns the row, commit, and invalidate the user's cache.
+    """
+
+    stmt = stmt.returning(Contact).execution_options(synchronize_session=False, populate_existing=True)
+    contact = (await db.execute(stmt)).scalar_one_or_none()
+    if contact is not None:
+        await _bump_version(db, user_id)
+    await db.commit()
+    if contact is not None:
+        await contact_cache.invalidate(user_id)
+    return contact
+
+
+@instrumented
+async def update_contact(contact_id: int, body: ContactSchema, db: AsyncSession, user_id: int):
+    """
+    Update an existing contact in the database with a single UPDATE ... RETURNING.
 
     :param contact_id: ID of the contact to update.
     :param body: Updated contact data.
-    :param db: SQLAlchemy session object.
+    :param db: SQLAlchemy async session object.
     :param user_id: User ID for filtering contacts.
     :return: Updated contact object if found, otherwise None.
     """
-    stmt = select(Contact).filter(Contact.id == contact_id, Contact.owner_id == user_id)
-    result = db.execute(stmt)
-    contact = result.scalar_one_or_none()
-    if contact:
-        contact.first_name = body.first_name
-        contact.last_name = body.last_name
-        contact.email = body.email
-        contact.phone_number = body.phone_number
-        contact.date_of_birth = body.date_of_birth
-        contact.description = body.description
-        db.commit()
-        db.refresh(contact)
-    return contact
+
+    stmt = _owned(update(Contact), contact_id, user_id).values(
+        first_name=body.first_name,
+        last_name=body.last_name,
+        email=body.email,
+        phone_number=body.phone_number,
+        date_of_birth=body.date_of_birth,
+        description=body.description,
+    )
+    return await _write_returning(stmt, db, user_id)
 
 
-def delete_contact(contact_id: int, db: Session, user_id: int):
+@instrumented
+async def delete_contact(contact_id: int, db: AsyncSession, user_id: int):
     """
-    Delete a contact from the database.
+    Delete a contact from the database with a single DELETE ... RETURNING.
 
     :param contact_id: ID of the contact to delete.
-    :param db: SQLAlchemy session object.
+    :param db: SQLAlchemy async session object.
     :param user_id: User ID for filtering contacts.
     :return: Deleted contact object if found, otherwise None.
     """
 
-    stmt = select(Contact).filter(Contact.id == contact_id, Contact.owner_id == user_id)
-    result = db.execute(stmt)
-    contact = result.scalar_one_or_none()
-    if contact:
-        db.delete(contact)
-        db.commit()
-    return contact
+    return await _write_returning(_owned(delete(Contact), contact_id, user_id), db, user_id)
 
-def add_avatar_url(contact_id: int, url: str, db: Session):
+
+BATCH_CHUNK_SIZE = 1000
+
+
+def _selection_statements(stmt, selection: ContactSelection, user_id: int):
+    """
+    Scope a set-based statement to the owner and the selection, one statement per chunk of IDs.
+    """
+
+    stmt = stmt.where(Contact.owner_id == user_id).execution_options(synchronize_session=False)
+    if selection.first_name is not None:
+        stmt = stmt.where(Contact.first_name == selection.first_name)
+    if selection.last_name is not None:
+        stmt = stmt.where(Contact.last_name == selection.last_name)
+    if selection.ids is None:
+        return [stmt]
+    ids = sorted(set(selection.ids))
+    return [stmt.where(Contact.id.in_(ids[i:i + BATCH_CHUNK_SIZE])) for i in range(0, len(ids), BATCH_CHUNK_SIZE)]
+
+
+@instrumented
+async def update_contacts(selection: ContactSelection, changes: dict, db: AsyncSession, user_id: int):
+    """
+    Apply the same changes to every selected contact with set-based UPDATEs, in one transaction.
+
+    :param selection: Contact IDs and/or a name filter.
+    :param changes: Column values to set.
+    :param db: SQLAlchemy async session object.
+    :param user_id: User ID for filtering contacts.
+    :return: Number of updated contacts.
+    """
+
+    count = 0
+    for stmt in _selection_statements(update(Contact).values(**changes), selection, user_id):
+        count += (await db.execute(stmt)).rowcount
+    if count:
+        await _bump_version(db, user_id)
+    await db.commit()
+    await contact_cache.invalidate(user_id)
+    return count
+
+
+@instrumented
+async def delete_contacts(selection: ContactSelection, db: AsyncSession, user_id: int):
+    """
+    Delete every selected contact with set-based DELETEs, in one transaction.
+
+    :param selection: Contact IDs and/or a name filter.
+    :param db: SQLAlchemy async session object.
+    :param user_id: User ID for filtering contacts.
+    :return: Number of deleted contacts.
     """
-    Add an avatar URL to a contact.
+
+    count = 0
+    for stmt in _selection_statements(delete(Contact), selection, user_id):
+        count += (await db.execute(stmt)).rowcount
+    if count:
+        await _bump_version(db, user_id)
+    await db.commit()
+    await contact_cache.invalidate(user_id)
+    return count
+
+
+@instrumented
+async def add_avatar_url(contact_id: int, url: str, db: AsyncSession, user_id: int):
+    """
+    Add an avatar URL to a contact with a single UPDATE ... RETURNING.
 
     :param contact_id: ID of the contact to update.
     :param url: Avatar URL.
-    :param db: SQLAlchemy session object.
+    :param db: SQLAlchemy async session object.
+    :param user_id: User ID for filtering contacts.
     :return: Updated contact object if found, otherwise None.
     """
 
-    stmt = select(Contact).filter(Contact.id == contact_id)
-    result = db.execute(stmt)
-    contact = result.scalar_one_or_none()
-    contact.avatar = url
-    db.commit()
-    db.refresh(contact)
-    return contact
+    return await _write_returning(_owned(update(Contact), contact_id, user_id).values(avatar=url), db, user_id)
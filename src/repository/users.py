@@ -1,64 +1,109 @@
 from fastapi import Depends
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.db import get_db
 from src.entity.models import User
 from src.schemas.user import UserSchema
+from src.services.cache import token_version_cache, user_cache
+from src.services.metrics import instrumented
 
 
-def get_user_by_email(email: str, db: Session):
+@instrumented
+async def get_user_by_email(email: str, db: AsyncSession):
     """
     Fetch user by email from the database.
 
     :param email: User's email
-    :param db: SQLAlchemy session
+    :param db: SQLAlchemy async session
     :return: User object if found, None otherwise
     """
 
     stmt = select(User).filter(User.email == email)
-    user = db.execute(stmt)
+    user = await db.execute(stmt)
     return user.scalar_one_or_none()
 
 
-def create_user(body: UserSchema, db: Session):
+@instrumented
+async def create_user(body: UserSchema, db: AsyncSession):
     """
     Create a new user in the database.
 
     :param body: User data
-    :param db: SQLAlchemy session
+    :param db: SQLAlchemy async session
     :return: Newly created user object
     """
 
     new_user = User(**body.model_dump())
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    await user_cache.delete(new_user.email)
     return new_user
 
 
-def update_token(user: User, token: str | None, db: Session):
+@instrumented
+async def update_token(user: User, token: str | None, db: AsyncSession):
     """
     Update user's refresh token.
 
     :param user: User object
     :param token: New refresh token
-    :param db: SQLAlchemy session
+    :param db: SQLAlchemy async session
     :return:
     """
 
     user.refresh_token = token
-    db.commit()
+    await db.commit()
+    await user_cache.delete(user.email)
 
-def confirmed_email(email: str, db: Session):
+@instrumented
+async def confirmed_email(email: str, db: AsyncSession):
     """
     Confirm user's email address.
 
     :param email: User's email
-    :param db: SQLAlchemy session
+    :param db: SQLAlchemy async session
     :return:
     """
 
-    user = get_user_by_email(email, db)
+    user = await get_user_by_email(email, db)
     user.confirmed = True
-    db.commit()
+    await db.commit()
+    await user_cache.delete(email)
+
+
+@instrumented
+async def get_token_version(user_id: int, db: AsyncSession):
+    """
+    Fetch the current access token version of a user.
+
+    :param user_id: User ID
+    :param db: SQLAlchemy async session
+    :return: Token version, None if the user does not exist
+    """
+
+    stmt = select(User.token_version).filter(User.id == user_id)
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+@instrumented
+async def revoke_tokens(user: User, db: AsyncSession):
+    """
+    Revoke every access token issued to the user by bumping the token version.
+
+    :param user: User object
+    :param db: SQLAlchemy async session
+    :return:
+    """
+
+    stmt = (
+        update(User)
+        .where(User.id == user.id)
+        .values(token_version=User.token_version + 1)
+    )
+    await db.execute(stmt)
+    await db.commit()
+    await user_cache.delete(user.email)
+    await token_version_cache.delete(str(user.id))
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, Query, status
+
+from src.database.db import session_manager
+from src.schemas.admin import PoolStatsResponse, SlowQueryResponse
+from src.services.auth import auth_service
+from src.services.rate_limit import ip_limit
+from src.services.slow_queries import slow_query_log
+
+# The rate limit runs first, so it also throttles guessing the admin token.
+router = APIRouter(prefix="/admin", tags=["admin"],
+                   dependencies=[Depends(ip_limit.by_ip), Depends(auth_service.require_admin)])
+
+
+@router.get("/pool", response_model=PoolStatsResponse)
+async def get_pool_stats():
+    """
+    Get live connection pool statistics.
+
+    Does not touch the database, so it still answers when the pool is exhausted. Prometheus
+    scrapes the same gauges from ``/metrics``.
+    :return:
+    """
+
+    return session_manager.pool_monitor.snapshot()
+
+
+@router.get("/pool/replicas", response_model=list[PoolStatsResponse])
+async def get_replica_pool_stats():
+    """
+    Get live connection pool statistics for every read replica.
+    :return:
+    """
+
+    return [monitor.snapshot() for monitor in session_manager.replica_pool_monitors]
+
+
+@router.get("/slow_queries", response_model=list[SlowQueryResponse])
+async def get_slow_queries(limit: int = Query(50, ge=1, le=1000), min_ms: float = Query(0, ge=0)):
+    """
+    Get statements from the slow query log, most recent first.
+    :param limit:
+    :param min_ms:
+    :return:
+    """
+
+    return slow_query_log.entries(limit=limit, min_ms=min_ms)
+
+
+@router.delete("/slow_queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries():
+    """
+    Clear the slow query log.
+    :return:
+    """
+
+    slow_query_log.clear()
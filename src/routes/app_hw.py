@@ -1,118 +1,371 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Path, Query, UploadFile, File
-from sqlalchemy.orm import Session
-from src.database.db import get_db
+from datetime import date
+
+from fastapi import APIRouter, HTTPException, Depends, status, Path, Query, Request, Response, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.db import get_db, session_manager
 from src.repository import app_hw as repositories_app_hw
-from src.schemas.app_hw import ContactSchema, ContactResponse
+from src.schemas.app_hw import (
+    BatchResult, ContactBatchUpdate, ContactResponse, ContactSchema, ContactSelection, ImportReport
+)
 from src.schemas.user import UserResponse
-from src.services.auth import auth_service
-from src.entity.models import User
+from src.services.auth import Principal, auth_service
+from src.services import compression, contact_export, contact_import
+from src.services.cache import contact_cache
+from src.services.etag import etag_matches, make_etag, not_modified
+from src.services.fieldsets import Fieldset, sparse_schema
+from src.services.json_render import render_rows
+from src.services.pagination import decode_cursor, encode_cursor
+from src.services.rate_limit import ip_limit, user_limit
 from src.repository import app_hw as repositories_hw
 
 import cloudinary
 import cloudinary.uploader
 from src.conf.config import config
 
-router = APIRouter(prefix="/app_hw", tags=["app_hw"])
+router = APIRouter(prefix="/app_hw", tags=["app_hw"],
+                   dependencies=[Depends(ip_limit.by_ip), Depends(user_limit.by_user)])
 cloudinary.config(cloud_name=config.CLD_NAME, api_key=config.CLD_API_KRY, api_secret=config.CLD_API_SECRET, secure=True)
+contact_fields = Fieldset(ContactResponse)
+
+
+def _render_items(schema, load, limit: int | None = None):
+    """
+    Build a page renderer that serializes the loaded items with ``schema``.
+
+    With ``limit``, a full page also records the ID of its last item for the next cursor.
+    """
+
+    async def render():
+        items = [schema.model_validate(item) for item in await load()]
+        last_id = items[-1].id if limit is not None and len(items) == limit else None
+        body = "[" + ",".join(item.model_dump_json() for item in items) + "]"
+        return {"body": body, "count": len(items), "last_id": last_id}
+
+    return render
+
+
+async def _send_cached(request: Request, response: Response, user_id: int, route: str, params: dict, render,
+                       db: AsyncSession):
+    """
+    Send a page from the response cache as rendered JSON, precompressed for the negotiated coding.
+
+    The body is already serialized with its own model, so ``response_model`` validation is
+    bypassed; the compressed variant is passed through by the compression middleware.
+
+    :return: Tuple of the cached page and the response to send.
+    """
+
+    encoding = compression.negotiate(request.headers.get("accept-encoding"))
+    page, body, encoding = await contact_cache.get_rendered(user_id, route, params, render, encoding, db=db)
+    if page["last_id"] is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(id=page["last_id"])
+    if encoding is not None:
+        compression.mark_encoded(response.headers, encoding)
+    return page, Response(body, media_type="application/json", headers=dict(response.headers))
+
 
 @router.get("/", response_model=list[ContactResponse])
-def get_contacts(limit: int = Query(10, ge=10, le=500), offset: int = Query(0, ge=0), db: Session = Depends(get_db), user: User = Depends(auth_service.get_current_user)):
+async def get_contacts(request: Request, response: Response,
+                       limit: int = Query(10, ge=10, le=500), offset: int = Query(0, ge=0),
+                       cursor: str | None = Query(None), fields: tuple[str, ...] | None = Depends(contact_fields),
+                       db: AsyncSession = Depends(get_db),
+                       user: Principal = Depends(auth_service.get_current_principal)):
     """
     Get a list of contacts.
+
+    Pages are ordered by ID. When a full page is returned, the ``X-Next-Cursor`` header carries
+    the cursor of the next one; passing it as ``cursor`` reads that page without scanning the
+    earlier ones. ``offset`` is kept for older clients and can not be combined with ``cursor``.
+    ``fields`` limits both the response and the columns read, e.g. ``fields=first_name,last_name``.
+    With ``CONTACT_FAST_JSON`` the page is rendered straight from rows with orjson.
+
+    The ``ETag`` is derived from the user's contacts version, which every write bumps, kept in
+    the response cache, so an unchanged list is answered with 304 to ``If-None-Match`` without
+    touching the database.
+    :param request:
+    :param response:
     :param limit:
     :param offset:
+    :param cursor:
+    :param fields:
     :param db:
     :param user:
     :return:
     """
 
-    contacts = repositories_app_hw.get_contacts(limit, offset, db, user.id)
-    return contacts
+    after_id = None
+    if cursor is not None:
+        if offset:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use either cursor or offset")
+        after_id = decode_cursor(cursor, "id")["id"]
+        if not isinstance(after_id, int):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    async def load_version():
+        return await repositories_app_hw.get_contacts_version(db, user.id)
+
+    # Every write bumps the user's cache version, so a cached version is never stale.
+    version = await contact_cache.get_or_compute(user.id, "contacts_version", {}, load_version, db=db)
+    etag = make_etag(user.id, version, limit, offset, after_id, fields)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    params = {"limit": limit, "offset": offset, "after_id": after_id, "fields": fields}
+    if config.CONTACT_FAST_JSON:
+        # Same body as the ContactResponse path, rendered from plain rows without a model per contact.
+        async def render():
+            rows = await repositories_app_hw.get_contact_rows(
+                limit, offset, db, user.id, after_id=after_id, fields=fields
+            )
+            last_id = rows[-1]["id"] if len(rows) == limit else None
+            return {"body": render_rows(rows), "count": len(rows), "last_id": last_id}
+
+        _, cached = await _send_cached(request, response, user.id, "contacts_json", params, render, db)
+        return cached
+    render = _render_items(
+        sparse_schema(ContactResponse, fields),
+        lambda: repositories_app_hw.get_contacts(limit, offset, db, user.id, after_id=after_id, fields=fields),
+        limit,
+    )
+    _, cached = await _send_cached(request, response, user.id, "contacts", params, render, db)
+    return cached
 
 
 @router.get("/birthdays", response_model=list[ContactResponse])
-def get_birthdays(
-        db: Session = Depends(get_db),
-        user: User = Depends(auth_service.get_current_user)
+async def get_birthdays(
+        request: Request,
+        response: Response,
+        days: int = Query(7, ge=1, le=366),
+        fields: tuple[str, ...] | None = Depends(contact_fields),
+        db: AsyncSession = Depends(get_db),
+        user: Principal = Depends(auth_service.get_current_principal)
 ):
     """
     Get a list of upcoming birthdays.
+    :param request:
+    :param response:
+    :param days:
+    :param fields:
     :param db:
     :param user:
     :return:
     """
 
-    contacts = repositories_app_hw.get_upcoming_birthdays(db, user.id)
-    if not contacts:
+    # The window moves daily, so today's date is part of the key.
+    today = date.today()
+    render = _render_items(
+        sparse_schema(ContactResponse, fields),
+        lambda: repositories_app_hw.get_upcoming_birthdays(db, user.id, days=days, today=today, fields=fields),
+    )
+    page, cached = await _send_cached(
+        request, response, user.id, "birthdays", {"today": today.isoformat(), "days": days, "fields": fields},
+        render, db,
+    )
+    if not page["count"]:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No upcoming birthdays found")
-    return contacts
+    return cached
+
+
+@router.get("/search", response_model=list[ContactResponse])
+async def search_contacts(
+        request: Request,
+        response: Response,
+        q: str = Query(min_length=1, max_length=100),
+        limit: int = Query(10, ge=1, le=100),
+        offset: int = Query(0, ge=0),
+        db: AsyncSession = Depends(get_db),
+        user: Principal = Depends(auth_service.get_current_principal)
+):
+    """
+    Search contacts by name, email, phone and description, best match first.
+    :param request:
+    :param response:
+    :param q:
+    :param limit:
+    :param offset:
+    :param db:
+    :param user:
+    :return:
+    """
+
+    render = _render_items(ContactResponse, lambda: repositories_app_hw.search_contacts(q, limit, offset, db, user.id))
+    _, cached = await _send_cached(
+        request, response, user.id, "search", {"q": q, "limit": limit, "offset": offset}, render, db
+    )
+    return cached
+
+
+@router.get("/export")
+async def export_contacts(
+        format: str = Query("ndjson", pattern="^(csv|ndjson)$"),
+        user: Principal = Depends(auth_service.get_current_principal)
+):
+    """
+    Stream all contacts as NDJSON or CSV.
+    :param format:
+    :param user:
+    :return:
+    """
+
+    async def chunks():
+        # Dependencies with yield are closed before a streaming body is sent, so the export
+        # opens its own session for the lifetime of the stream.
+        async with session_manager.session() as db:
+            async for chunk in contact_export.export_contacts(db, user.id, format, config.EXPORT_BATCH_SIZE):
+                yield chunk
+
+    return StreamingResponse(
+        chunks(), media_type=contact_export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="contacts.{format}"'},
+    )
+
+
+@router.patch("/batch", response_model=BatchResult)
+async def update_contacts(
+        body: ContactBatchUpdate,
+        db: AsyncSession = Depends(get_db),
+        user: Principal = Depends(auth_service.get_current_principal)
+):
+    """
+    Apply the same changes to many contacts, selected by IDs and/or name.
+    :param body:
+    :param db:
+    :param user:
+    :return:
+    """
+
+    changes = body.changes.model_dump(exclude_unset=True)
+    count = await repositories_app_hw.update_contacts(body, changes, db, user.id)
+    return {"count": count}
+
+
+@router.delete("/batch", response_model=BatchResult)
+async def delete_contacts(
+        body: ContactSelection,
+        db: AsyncSession = Depends(get_db),
+        user: Principal = Depends(auth_service.get_current_principal)
+):
+    """
+    Delete many contacts, selected by IDs and/or name.
+    :param body:
+    :param db:
+    :param user:
+    :return:
+    """
+
+    count = await repositories_app_hw.delete_contacts(body, db, user.id)
+    return {"count": count}
 
 
 @router.get("/{contact_id}", response_model=ContactResponse)
-def get_contact_by_id(
+async def get_contact_by_id(
+        request: Request,
+        response: Response,
         contact_id: int,
-        db: Session = Depends(get_db),
-        user: User = Depends(auth_service.get_current_user)
+        fields: tuple[str, ...] | None = Depends(contact_fields),
+        db: AsyncSession = Depends(get_db),
+        user: Principal = Depends(auth_service.get_current_principal)
 ):
     """
     Get a contact by ID.
+
+    The ``ETag`` follows the contact's version; a matching ``If-None-Match`` gets 304 and the
+    contact is not serialized.
+    :param request:
+    :param response:
     :param contact_id:
+    :param fields:
     :param db:
     :param user:
     :return:
     """
 
-    contact = repositories_app_hw.get_contact_by_id(contact_id, db, user.id)
-    if contact is None or contact.owner_id != user.id:
+    columns = fields + ("version",) if fields is not None else None
+    contact = await repositories_app_hw.get_contact_by_id(contact_id, db, user.id, fields=columns)
+    if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found or access denied")
-    return contact
+    etag = make_etag(contact.id, contact.version, fields)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    if fields is None:
+        return contact
+    return JSONResponse(
+        sparse_schema(ContactResponse, fields).model_validate(contact).model_dump(mode="json"), headers={"ETag": etag}
+    )
 
 
 @router.get("/first_name/{first_name}", response_model=list[ContactResponse])
-def get_contact_by_firstname(
+async def get_contact_by_firstname(
+        request: Request,
+        response: Response,
         first_name: str,
-        db: Session = Depends(get_db),
-        user: User = Depends(auth_service.get_current_user)
+        fields: tuple[str, ...] | None = Depends(contact_fields),
+        db: AsyncSession = Depends(get_db),
+        user: Principal = Depends(auth_service.get_current_principal)
 ):
     """
     Get a list of contacts by first name.
+    :param request:
+    :param response:
     :param first_name:
+    :param fields:
     :param db:
     :param user:
     :return:
     """
 
-    contacts = repositories_app_hw.get_contact_by_firstname(first_name, db, user.id)
-    if not contacts:
+    render = _render_items(
+        sparse_schema(ContactResponse, fields),
+        lambda: repositories_app_hw.get_contact_by_firstname(first_name, db, user.id, fields=fields),
+    )
+    page, cached = await _send_cached(
+        request, response, user.id, "first_name", {"first_name": first_name, "fields": fields}, render, db
+    )
+    if not page["count"]:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No contacts found with this first name")
-    return contacts
+    return cached
 
 
 @router.get("/last_name/{last_name}", response_model=list[ContactResponse])
-def get_contact_by_lastname(
+async def get_contact_by_lastname(
+        request: Request,
+        response: Response,
         last_name: str,
-        db: Session = Depends(get_db),
-        user: User = Depends(auth_service.get_current_user)
+        fields: tuple[str, ...] | None = Depends(contact_fields),
+        db: AsyncSession = Depends(get_db),
+        user: Principal = Depends(auth_service.get_current_principal)
 ):
     """
     Get a list of contacts by last name.
+    :param request:
+    :param response:
     :param last_name:
+    :param fields:
     :param db:
     :param user:
     :return:
     """
 
-    contacts = repositories_app_hw.get_contact_by_lastname(last_name, db, user.id)
-    if not contacts:
+    render = _render_items(
+        sparse_schema(ContactResponse, fields),
+        lambda: repositories_app_hw.get_contact_by_lastname(last_name, db, user.id, fields=fields),
+    )
+    page, cached = await _send_cached(
+        request, response, user.id, "last_name", {"last_name": last_name, "fields": fields}, render, db
+    )
+    if not page["count"]:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No contacts found with this last name")
-    return contacts
+    return cached
 
 
 @router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
-def add_contact(
+async def add_contact(
         body: ContactSchema,
-        db: Session = Depends(get_db),
-        user: User = Depends(auth_service.get_current_user)
+        db: AsyncSession = Depends(get_db),
+        user: Principal = Depends(auth_service.get_current_principal)
 ):
     """
     Add a new contact.
@@ -122,18 +375,45 @@ def add_contact(
     :return:
     """
 
-    contact = repositories_app_hw.add_contact(body, db, user.id)
+    contact = await repositories_app_hw.add_contact(body, db, user.id)
     return contact
 
+@router.post("/import", response_model=ImportReport)
+async def import_contacts(
+        file: UploadFile = File(...),
+        format: str | None = Query(None, pattern="^(csv|ndjson)$"),
+        db: AsyncSession = Depends(get_db),
+        user: Principal = Depends(auth_service.get_current_principal)
+):
+    """
+    Import contacts from a CSV (with a header row) or NDJSON file.
+
+    The format is taken from ``format`` or the file extension. Rows are validated and inserted
+    in batches; rows that fail are listed in the report and do not stop the import.
+    :param file:
+    :param format:
+    :param db:
+    :param user:
+    :return:
+    """
+
+    fmt = format or (file.filename or "").rsplit(".", 1)[-1].lower().replace("jsonl", "ndjson")
+    if fmt not in contact_import.FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported file format, use csv or ndjson"
+        )
+    return await contact_import.import_contacts(file.file, fmt, db, user.id, config.IMPORT_BATCH_SIZE)
+
+
 @router.patch(
     "/{contact_id}/avatar",
     response_model=ContactResponse
 )
-def add_avatar(
+async def add_avatar(
     contact_id: int = Path(ge=1),
     file: UploadFile = File(...),
-    user: User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db),
+    user: Principal = Depends(auth_service.get_current_principal),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Update contact avatar.
@@ -143,7 +423,7 @@ def add_avatar(
     :param db:
     :return:
     """
-    contact = repositories_hw.get_contact_by_id(contact_id, db, user.id)
+    contact = await repositories_hw.get_contact_by_id(contact_id, db, user.id)
     if contact is None or contact.owner_id != user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found or access denied")
 
@@ -153,7 +433,7 @@ def add_avatar(
 
     # Завантажуємо зображення у Cloudinary
     public_id = f"ContactsAvatars/{contact.id}"
-    res = cloudinary.uploader.upload(file.file, public_id=public_id, overwrite=True)
+    res = await run_in_threadpool(cloudinary.uploader.upload, file.file, public_id=public_id, overwrite=True)
 
     # Отримуємо URL нового аватара
     res_url = cloudinary.CloudinaryImage(public_id).build_url(
@@ -161,16 +441,18 @@ def add_avatar(
     )
 
     # Оновлюємо запис контакту в базі даних
-    updated_contact = repositories_hw.add_avatar_url(contact.id, res_url, db)
+    updated_contact = await repositories_hw.add_avatar_url(contact.id, res_url, db, user.id)
+    if updated_contact is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found or access denied")
     return updated_contact
 
 
 @router.put("/{contact_id}")
-def update_contact(
+async def update_contact(
         body: ContactSchema,
         contact_id: int = Path(ge=1),
-        db: Session = Depends(get_db),
-        user: User = Depends(auth_service.get_current_user)
+        db: AsyncSession = Depends(get_db),
+        user: Principal = Depends(auth_service.get_current_principal)
 ):
     """
     Update a contact by ID.
@@ -181,19 +463,17 @@ def update_contact(
     :return:
     """
 
-    contact = repositories_app_hw.get_contact_by_id(contact_id, db, user.id)
-    if contact is None or contact.owner_id != user.id:
+    contact = await repositories_app_hw.update_contact(contact_id, body, db, user.id)
+    if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found or access denied")
-
-    contact = repositories_app_hw.update_contact(contact_id, body, db, user.id)
     return contact
 
 
 @router.delete("/{contact_id}")
-def delete_contact(
+async def delete_contact(
         contact_id: int = Path(ge=1),
-        db: Session = Depends(get_db),
-        user: User = Depends(auth_service.get_current_user)
+        db: AsyncSession = Depends(get_db),
+        user: Principal = Depends(auth_service.get_current_principal)
 ):
     """
     Delete a contact by ID.
@@ -203,9 +483,7 @@ def delete_contact(
     :return:
     """
 
-    contact = repositories_app_hw.get_contact_by_id(contact_id, db, user.id)
-    if contact is None or contact.owner_id != user.id:
+    contact = await repositories_app_hw.delete_contact(contact_id, db, user.id)
+    if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found or access denied")
-
-    repositories_app_hw.delete_contact(contact_id, db, user.id)
     return contact
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks, Request
 from fastapi.security import OAuth2PasswordRequestForm, HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.db import get_db
 from src.entity.models import User
@@ -8,15 +8,17 @@ from src.repository import users as repositories_users
 from src.schemas.user import UserSchema, TokenSchema, UserResponse, RequestEmail
 from src.services.auth import auth_service
 from src.services.email import send_email
+from src.services.rate_limit import ip_limit, login_limit, signup_limit
+from src.services.refresh_tokens import refresh_token_store
 
-router = APIRouter(prefix='/auth', tags=['auth'])
+router = APIRouter(prefix='/auth', tags=['auth'], dependencies=[Depends(ip_limit.by_ip)])
 get_refresh_token = HTTPBearer()
 
 @router.get(
     "/me",
     response_model=UserResponse
 )
-def get_current_user(user: User = Depends(auth_service.get_current_user)):
+async def get_current_user(user: User = Depends(auth_service.get_current_user)):
     """
     Get the current authenticated user.
 
@@ -26,8 +28,9 @@ def get_current_user(user: User = Depends(auth_service.get_current_user)):
 
     return user
 
-@router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def signup(body: UserSchema, bt: BackgroundTasks,  request: Request, db: Session = Depends(get_db)):
+@router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(signup_limit.by_ip)])
+async def signup(body: UserSchema, bt: BackgroundTasks,  request: Request, db: AsyncSession = Depends(get_db)):
     """
     Sign up a new user.
 
@@ -38,17 +41,19 @@ def signup(body: UserSchema, bt: BackgroundTasks,  request: Request, db: Session
     :return:
     """
 
-    exist_user = repositories_users.get_user_by_email(body.email, db)
+    exist_user = await repositories_users.get_user_by_email(body.email, db)
     if exist_user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Account already exists")
-    body.password = auth_service.get_password_hash(body.password)
-    new_user = repositories_users.create_user(body, db)
+    # End the read transaction so the pooled connection is not held while bcrypt runs.
+    await db.commit()
+    body.password = await auth_service.get_password_hash(body.password)
+    new_user = await repositories_users.create_user(body, db)
     bt.add_task(send_email, new_user.email, new_user.username, str(request.base_url))
     return new_user
 
 
-@router.post("/login", response_model=TokenSchema)
-def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+@router.post("/login", response_model=TokenSchema, dependencies=[Depends(login_limit.by_ip)])
+async def login(body: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     """
     Login a user.
 
@@ -56,21 +61,22 @@ def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get
     :param db:
     :return:
     """
-    user = repositories_users.get_user_by_email(body.username, db)
+    user = await repositories_users.get_user_by_email(body.username, db)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email")
-    if not auth_service.verify_password(body.password, user.password):
+    # End the read transaction so the pooled connection is not held while bcrypt runs.
+    await db.commit()
+    if not await auth_service.verify_password(body.password, user.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password")
 
-    access_token = auth_service.create_access_token(data={"sub": user.email})
-    refresh_token = auth_service.create_refresh_token(data={"sub": user.email})
-    repositories_users.update_token(user, refresh_token, db)
+    access_token = auth_service.create_access_token(data=auth_service.access_token_claims(user))
+    refresh_token = await auth_service.issue_refresh_token(user.email)
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
 @router.get('/refresh_token', response_model=TokenSchema)
-def refresh_token(credentials: HTTPAuthorizationCredentials = Depends(get_refresh_token),
-                  db: Session = Depends(get_db)):
+async def refresh_token(credentials: HTTPAuthorizationCredentials = Depends(get_refresh_token),
+                        db: AsyncSession = Depends(get_db)):
     """
     Refresh the access token.
 
@@ -78,21 +84,31 @@ def refresh_token(credentials: HTTPAuthorizationCredentials = Depends(get_refres
     :param db:
     :return:
     """
-    token = credentials.credentials
-    email = auth_service.decode_refresh_token(token)
-    user = repositories_users.get_user_by_email(email, db)
-    if user.refresh_token != token:
-        repositories_users.update_token(user, None, db)
+    email, refresh_token = await auth_service.rotate_refresh_token(credentials.credentials)
+    user = await repositories_users.get_user_by_email(email, db)
+    if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
-    access_token = auth_service.create_access_token(data={"sub": email})
-    refresh_token = auth_service.create_refresh_token(data={"sub": email})
-    repositories_users.update_token(user, refresh_token, db)
+    access_token = auth_service.create_access_token(data=auth_service.access_token_claims(user))
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
+@router.post('/logout', status_code=status.HTTP_204_NO_CONTENT)
+async def logout(user: User = Depends(auth_service.get_current_user), db: AsyncSession = Depends(get_db)):
+    """
+    Revoke every access and refresh token of the current user.
+
+    :param user:
+    :param db:
+    :return:
+    """
+
+    await repositories_users.revoke_tokens(user, db)
+    await refresh_token_store.revoke_user(user.email)
+
+
 @router.get('/confirmed_email/{token}')
-def confirmed_email(token: str, db: Session = Depends(get_db)):
+async def confirmed_email(token: str, db: AsyncSession = Depends(get_db)):
     """
     Confirm the user's email.
 
@@ -102,18 +118,18 @@ def confirmed_email(token: str, db: Session = Depends(get_db)):
     """
 
     email = auth_service.get_email_from_token(token)
-    user = repositories_users.get_user_by_email(email, db)
+    user = await repositories_users.get_user_by_email(email, db)
     if user is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Verification error")
     if user.confirmed:
         return {"message": "Your email is already confirmed"}
-    repositories_users.confirmed_email(email, db)
+    await repositories_users.confirmed_email(email, db)
     return {"message": "Email confirmed"}
 
 
 @router.post('/request_email')
-def request_email(body: RequestEmail, background_tasks: BackgroundTasks, request: Request,
-                        db: Session = Depends(get_db)):
+async def request_email(body: RequestEmail, background_tasks: BackgroundTasks, request: Request,
+                        db: AsyncSession = Depends(get_db)):
     """
     Request a new confirmation email.
 
@@ -124,7 +140,7 @@ def request_email(body: RequestEmail, background_tasks: BackgroundTasks, request
     :return:
     """
 
-    user = repositories_users.get_user_by_email(body.email, db)
+    user = await repositories_users.get_user_by_email(body.email, db)
 
     if user.confirmed:
         return {"message": "Your email is already confirmed"}
@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class PoolStatsResponse(BaseModel):
+    pool_class: str
+    size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    overflow: int
+    available: int
+    checkouts: int
+    connects: int
+    timeouts: int
+    wait_ms_last: float
+    wait_ms_avg: float
+    wait_ms_max: float
+
+
+class SlowQueryResponse(BaseModel):
+    timestamp: datetime
+    operation: str
+    statement: str
+    parameters: Any = None
+    duration_ms: float
+    plan: str | None = None
@@ -1,14 +1,15 @@
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 from datetime import date
 
 
 class ContactSchema(BaseModel):
     first_name: str = Field(min_length=3, max_length=25)
     last_name: str = Field(min_length=3, max_length=25)
-    email: EmailStr
-    avatar: Optional[str] = None
+    # Limits match the column sizes, so an oversized value is a 422 rather than a database error.
+    email: EmailStr = Field(max_length=50)
+    avatar: Optional[str] = Field(None, max_length=255)
     phone_number: str = Field(min_length=5, max_length=20)
     date_of_birth: date
     description: Optional[str] = None
@@ -26,3 +27,56 @@ class ContactResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: list[str]
+
+
+class ImportReport(BaseModel):
+    received: int
+    imported: int
+    failed: int
+    errors: list[ImportRowError]
+
+
+class ContactSelection(BaseModel):
+    ids: Optional[list[int]] = Field(None, min_length=1, max_length=10000)
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        if self.ids is None and self.first_name is None and self.last_name is None:
+            raise ValueError("ids or a filter (first_name, last_name) is required")
+        return self
+
+
+class ContactChanges(BaseModel):
+    first_name: Optional[str] = Field(None, min_length=3, max_length=25)
+    last_name: Optional[str] = Field(None, min_length=3, max_length=25)
+    avatar: Optional[str] = Field(None, max_length=255)
+    date_of_birth: Optional[date] = None
+    description: Optional[str] = None
+
+    @field_validator("first_name", "last_name", "date_of_birth")
+    @classmethod
+    def check_not_null(cls, v):
+        if v is None:
+            raise ValueError("can not be null")
+        return v
+
+
+class ContactBatchUpdate(ContactSelection):
+    changes: ContactChanges
+
+    @model_validator(mode="after")
+    def check_changes(self):
+        if not self.changes.model_fields_set:
+            raise ValueError("changes must set at least one field")
+        return self
+
+
+class BatchResult(BaseModel):
+    count: int
@@ -1,39 +1,64 @@
+import hashlib
+import hmac
+import time
+import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 
-from fastapi import Depends, HTTPException, status
-from passlib.context import CryptContext
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 from src.conf.config import config
 from src.database.db import get_db
+from src.entity.models import User
 from src.repository import users as repository_users
+from src.services.cache import LocalCache, token_version_cache, user_cache
+from src.services.passwords import PasswordHasher, pwd_context
+from src.services.refresh_tokens import refresh_token_store
+
+CACHED_USER_FIELDS = ("id", "username", "email", "confirmed", "token_version")
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    Authenticated user as described by access token claims, without an ORM row behind it.
+    """
+
+    id: int
+    username: str
+    email: str
+    confirmed: bool
 
 
 class Auth:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = pwd_context
+    password_hasher = PasswordHasher(config.PASSWORD_WORKERS, config.PASSWORD_QUEUE_LIMIT)
+    token_cache = LocalCache(config.JWT_CACHE_MAXSIZE, ttl=0)
     SECRET_KEY = config.SECRET_KEY_JWT
     ALGORITHM = config.ALGORITHM
+    REFRESH_TOKEN_TTL = timedelta(days=7)
 
-    def verify_password(self, plain_password, hashed_password):
+    async def verify_password(self, plain_password, hashed_password):
         """
-        Verify password using bcrypt
+        Verify password using bcrypt in the password process pool
         :param plain_password:
         :param hashed_password:
         :return:
         """
 
-        return self.pwd_context.verify(plain_password, hashed_password)
+        return await self.password_hasher.verify(plain_password, hashed_password)
 
-    def get_password_hash(self, password: str):
+    async def get_password_hash(self, password: str):
         """
-        Get hashed password using bcrypt
+        Get hashed password using bcrypt in the password process pool
         :param password:
         :return:
         """
 
-        return self.pwd_context.hash(password)
+        return await self.password_hasher.hash(password)
 
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
@@ -66,57 +91,191 @@ class Auth:
         if expires_delta:
             expire = datetime.now() + timedelta(seconds=expires_delta)
         else:
-            expire = datetime.now() + timedelta(days=7)
+            expire = datetime.now() + self.REFRESH_TOKEN_TTL
         to_encode.update({"iat": datetime.now(), "exp": expire, "scope": "refresh_token"})
         encoded_refresh_token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
         return encoded_refresh_token
 
-    def decode_refresh_token(self, refresh_token: str):
+    async def decode_token(self, token: str):
+        """
+        Decode and verify a JWT, reusing claims of tokens that were already verified.
+
+        Verified claims are cached under the token's SHA-256 digest until the token's ``exp``,
+        so an entry never outlives its token; the cache holds at most JWT_CACHE_MAXSIZE entries.
+        :param token:
+        :return: Token claims.
+        """
+
+        key = hashlib.sha256(token.encode()).hexdigest()
+        payload = await self.token_cache.get(key)
+        if payload is None:
+            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            ttl = payload.get("exp", 0) - time.time()
+            if ttl > 0:
+                await self.token_cache.set(key, payload, ttl=ttl)
+        return payload
+
+    async def decode_refresh_claims(self, refresh_token: str):
         """
         Decode refresh token using JWT
         :param refresh_token:
-        :return:
+        :return: Token claims.
         """
 
         try:
-            payload = jwt.decode(refresh_token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = await self.decode_token(refresh_token)
             if payload['scope'] == 'refresh_token':
-                email = payload['sub']
-                return email
+                return payload
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid scope for token')
         except JWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Could not validate credentials')
 
-    def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    async def decode_refresh_token(self, refresh_token: str):
         """
-        Get current user using JWT
-        :param token:
-        :param db:
+        Decode refresh token using JWT
+        :param refresh_token:
+        :return: Email of the token owner.
+        """
+
+        payload = await self.decode_refresh_claims(refresh_token)
+        return payload['sub']
+
+    async def issue_refresh_token(self, email: str):
+        """
+        Start a new rotation family and return its first refresh token.
+        :param email:
         :return:
         """
 
-        credentials_exception = HTTPException(
+        family_id, jti = uuid.uuid4().hex, uuid.uuid4().hex
+        token = self.create_refresh_token(data={"sub": email, "fid": family_id, "jti": jti})
+        await refresh_token_store.issue(family_id, jti, email, ttl=self.REFRESH_TOKEN_TTL.total_seconds())
+        return token
+
+    async def rotate_refresh_token(self, refresh_token: str):
+        """
+        Exchange a refresh token for the next one of its family.
+
+        Presenting a token that was already rotated revokes the whole family, so a stolen
+        token stops working for both the thief and the owner.
+        :param refresh_token:
+        :return: Email of the token owner and the new refresh token.
+        """
+
+        payload = await self.decode_refresh_claims(refresh_token)
+        family_id, jti = payload.get("fid"), payload.get("jti")
+        new_jti = uuid.uuid4().hex
+        ttl = self.REFRESH_TOKEN_TTL.total_seconds()
+        if family_id is None or not await refresh_token_store.rotate(family_id, jti, new_jti, ttl):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+        email = payload["sub"]
+        return email, self.create_refresh_token(data={"sub": email, "fid": family_id, "jti": new_jti})
+
+    @staticmethod
+    def credentials_exception():
+        return HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    def access_token_claims(self, user: User):
+        """
+        Claims for a user's access token.
+
+        ``ver`` is the user's token version, bumping it revokes every token issued before.
+        With ACCESS_TOKEN_CLAIMS enabled the token also carries ``user_id``, ``username`` and
+        ``confirmed`` so :meth:`get_current_principal` can skip the users table.
+        :param user:
+        :return:
+        """
+
+        claims = {"sub": user.email, "ver": user.token_version}
+        if config.ACCESS_TOKEN_CLAIMS:
+            claims.update({"user_id": user.id, "username": user.username, "confirmed": bool(user.confirmed)})
+        return claims
+
+    async def access_token_payload(self, token: str):
+        """
+        Decode an access token and check its scope.
+        :param token:
+        :return: Token claims.
+        """
+
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            if payload['scope'] == 'access_token':
-                email = payload["sub"]
-                if email is None:
-                    raise credentials_exception
-            else:
-                raise credentials_exception
-        except JWTError as e:
-            raise credentials_exception
+            payload = await self.decode_token(token)
+        except JWTError:
+            raise self.credentials_exception()
+        if payload.get('scope') != 'access_token' or payload.get("sub") is None:
+            raise self.credentials_exception()
+        return payload
 
-        user = repository_users.get_user_by_email(email, db)
-        if user is None:
-            raise credentials_exception
+    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+        """
+        Get current user using JWT
+        :param token:
+        :param db:
+        :return:
+        """
+
+        payload = await self.access_token_payload(token)
+        email = payload["sub"]
+
+        cached = await user_cache.get(email)
+        if cached is not None:
+            user = User(**cached)
+        else:
+            user = await repository_users.get_user_by_email(email, db)
+            if user is None:
+                raise self.credentials_exception()
+            await user_cache.set(email, {field: getattr(user, field) for field in CACHED_USER_FIELDS})
+
+        if "ver" in payload and payload["ver"] != user.token_version:
+            raise self.credentials_exception()
         return user
 
+    async def get_current_principal(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+        """
+        Get the current user as a lightweight principal.
+
+        Tokens issued with ACCESS_TOKEN_CLAIMS carry everything the principal needs, so only the
+        token version is checked (from the cache, the users table on a miss). Other tokens fall
+        back to :meth:`get_current_user`.
+        :param token:
+        :param db:
+        :return:
+        """
+
+        payload = await self.access_token_payload(token)
+        if "user_id" not in payload:
+            user = await self.get_current_user(token, db)
+            return Principal(user.id, user.username, user.email, bool(user.confirmed))
+
+        user_id = payload["user_id"]
+        version = await token_version_cache.get(str(user_id))
+        if version is None:
+            version = await repository_users.get_token_version(user_id, db)
+            if version is None:
+                raise self.credentials_exception()
+            await token_version_cache.set(str(user_id), version)
+        if payload.get("ver") != version:
+            raise self.credentials_exception()
+        return Principal(user_id, payload["username"], payload["sub"], payload["confirmed"])
+
+    async def require_admin(self, x_admin_token: str | None = Header(None)):
+        """
+        Allow the request only with the ``X-Admin-Token`` header equal to ``ADMIN_TOKEN``.
+
+        Admin endpoints are closed to everyone while ``ADMIN_TOKEN`` is not set.
+        :param x_admin_token:
+        :return:
+        """
+
+        if not config.ADMIN_TOKEN or x_admin_token is None or not hmac.compare_digest(
+                x_admin_token.encode(), config.ADMIN_TOKEN.encode()
+        ):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+
     def create_email_token(self, data: dict):
         """
         Create email verification token using JWT
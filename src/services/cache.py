@@ -0,0 +1,260 @@
+import json
+import time
+import uuid
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+import redis.asyncio as aioredis
+
+from src.conf.config import config
+from src.database.db import use_primary
+from src.services import compression
+from src.services.metrics import RESPONSE_CACHE_REQUESTS
+
+BYTES_MARKER = b"\x00"
+
+
+class LocalCache:
+    """
+    In-process TTL + LRU cache.
+
+    Every entry expires ``ttl`` seconds after it was set, and the least recently used
+    entry is evicted once ``maxsize`` entries are stored.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    async def get(self, key: str):
+        """
+        Get a value by key.
+
+        :param key: Cache key.
+        :return: Cached value or None if missing or expired.
+        """
+
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value, ttl: float | None = None):
+        """
+        Store a value.
+
+        :param key: Cache key.
+        :param value: Value to store.
+        :param ttl: Lifetime in seconds, defaults to the cache TTL.
+        :return:
+        """
+
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._data.pop(key, None)
+
+    async def clear(self):
+        self._data.clear()
+
+
+class RedisCache:
+    """
+    Redis-backed cache with the same interface as :class:`LocalCache`.
+
+    Values are stored as JSON under ``<prefix>:<key>`` and expire through Redis TTLs,
+    so invalidations are visible to every worker.
+    """
+
+    def __init__(self, client, prefix: str, ttl: float):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def get(self, key: str):
+        raw = await self.client.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if raw[:1] == BYTES_MARKER:
+            return raw[1:]
+        return json.loads(raw)
+
+    async def set(self, key: str, value, ttl: float | None = None):
+        # Bytes, e.g. compressed bodies, are stored as is behind a marker JSON never starts with.
+        raw = BYTES_MARKER + value if isinstance(value, bytes) else json.dumps(value)
+        await self.client.set(self._key(key), raw, px=int((self.ttl if ttl is None else ttl) * 1000))
+
+    async def delete(self, key: str):
+        await self.client.delete(self._key(key))
+
+    async def clear(self):
+        keys = [key async for key in self.client.scan_iter(match=self._key("*"))]
+        if keys:
+            await self.client.delete(*keys)
+
+
+class ResponseCache:
+    """
+    Per-user cache of serialized responses.
+
+    Entries are keyed by user, route, query params and the user's current version. Bumping
+    the version with :meth:`invalidate` makes every older entry unreachable; they are left to
+    expire. A missing version is replaced by a fresh random one, never by a default, so
+    entries written under an evicted version can not be served again.
+    """
+
+    def __init__(self, cache, versions):
+        self.cache = cache
+        self.versions = versions
+        self.hits = 0
+        self.misses = 0
+
+    async def version(self, user_id: int) -> str:
+        version = await self.versions.get(str(user_id))
+        if version is None:
+            version = uuid.uuid4().hex
+            await self.versions.set(str(user_id), version)
+        return version
+
+    async def invalidate(self, user_id: int):
+        """
+        Drop every cached response of the user by bumping their version.
+
+        :param user_id: Owner of the changed data.
+        :return:
+        """
+
+        await self.versions.set(str(user_id), uuid.uuid4().hex)
+
+    async def get_or_compute(self, user_id: int, route: str, params: dict, compute, db=None):
+        """
+        Return the cached value or compute and cache it.
+
+        A miss right after :meth:`invalidate` must not store what a lagging replica still
+        returns, so ``db`` is pinned to the primary before computing.
+
+        :param user_id: Owner of the data.
+        :param route: Route name, part of the key and the metrics label.
+        :param params: Query params that change the response.
+        :param compute: Coroutine function returning a JSON-serializable value on a miss.
+        :param db: Session ``compute`` reads from, if any.
+        :return: Cached or computed value.
+        """
+
+        version = await self.version(user_id)
+        key = f"{user_id}:{version}:{route}:{urlencode(sorted(params.items()))}"
+        value = await self.cache.get(key)
+        if value is not None:
+            self.hits += 1
+            RESPONSE_CACHE_REQUESTS.labels(route, "hit").inc()
+            return value
+        self.misses += 1
+        RESPONSE_CACHE_REQUESTS.labels(route, "miss").inc()
+        if db is not None:
+            use_primary(db)
+        value = await compute()
+        await self.cache.set(key, value)
+        return value
+
+    async def get_or_load(self, user_id: int, route: str, params: dict, schema, load, db=None):
+        """
+        Return the cached response or load, serialize and cache it.
+
+        :param user_id: Owner of the data.
+        :param route: Route name, part of the key and the metrics label.
+        :param params: Query params that change the response.
+        :param schema: Pydantic model each loaded item is serialized with.
+        :param load: Coroutine function returning the items on a miss.
+        :param db: Session ``load`` reads from, see :meth:`get_or_compute`.
+        :return: List of serialized items.
+        """
+
+        async def compute():
+            return [schema.model_validate(item).model_dump(mode="json") for item in await load()]
+
+        return await self.get_or_compute(user_id, route, params, compute, db=db)
+
+    async def get_rendered(self, user_id: int, route: str, params: dict, render, encoding: str | None = None,
+                           db=None):
+        """
+        Return a rendered JSON page and its body, compressed with ``encoding`` when large enough.
+
+        The page and every compressed variant are cached under the same version, so a hit sends
+        stored bytes without serializing or compressing anything.
+
+        :param user_id: Owner of the data.
+        :param route: Route name, part of the key and the metrics label.
+        :param params: Query params that change the response.
+        :param render: Coroutine function returning the page on a miss: the JSON text under
+            ``body`` plus any JSON-serializable metadata the route needs.
+        :param encoding: Negotiated content coding, or None to send the body uncompressed.
+        :param db: Session ``render`` reads from, see :meth:`get_or_compute`.
+        :return: Tuple of the page, the body bytes and the coding they are compressed with or None.
+        """
+
+        page = await self.get_or_compute(user_id, route, params, render, db=db)
+        body = page["body"].encode()
+        if encoding is None or len(body) < config.COMPRESSION_MINIMUM_SIZE:
+            return page, body, None
+
+        async def compress():
+            return compression.compress(body, encoding)
+
+        return page, await self.get_or_compute(user_id, f"{route}.{encoding}", params, compress), encoding
+
+
+redis_client = aioredis.Redis(
+    host=config.REDIS_DOMAIN, port=config.REDIS_PORT, password=config.REDIS_PASSWORD
+)
+
+
+def build_cache(backend: str, prefix: str, maxsize: int, ttl: float):
+    """
+    Create a cache for the configured backend.
+
+    :param backend: ``memory`` or ``redis``.
+    :param prefix: Key prefix for the Redis backend.
+    :param maxsize: Maximum entries for the in-process backend.
+    :param ttl: Default entry lifetime in seconds.
+    :return: LocalCache or RedisCache.
+    """
+
+    if backend == "redis":
+        return RedisCache(redis_client, prefix, ttl)
+    return LocalCache(maxsize, ttl)
+
+
+user_cache = build_cache(config.USER_CACHE_BACKEND, "user", config.USER_CACHE_MAXSIZE, config.USER_CACHE_TTL)
+token_version_cache = build_cache(
+    config.USER_CACHE_BACKEND, "token_version", config.USER_CACHE_MAXSIZE, config.USER_CACHE_TTL
+)
+contact_cache = ResponseCache(
+    build_cache(config.CONTACT_CACHE_BACKEND, "contacts", config.CONTACT_CACHE_MAXSIZE, config.CONTACT_CACHE_TTL),
+    build_cache(
+        config.CONTACT_CACHE_BACKEND, "contacts_version", config.CONTACT_CACHE_MAXSIZE, config.CONTACT_CACHE_TTL
+    ),
+)
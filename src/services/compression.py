@@ -0,0 +1,171 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from src.conf.config import config
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available.
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/xml")
+
+
+def available_encodings() -> tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """
+    Pick the best supported content coding from an ``Accept-Encoding`` header.
+
+    :param accept_encoding: Header value, e.g. ``gzip, br;q=0.8``.
+    :return: ``br``, ``gzip`` or None if the client accepts neither.
+    """
+
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    # Ties go to the first of available_encodings(), brotli compresses text better.
+    best = max(available_encodings(), key=lambda coding: weights.get(coding, wildcard))
+    return best if weights.get(best, wildcard) > 0 else None
+
+
+class Encoder:
+    """
+    Incremental gzip or brotli compressor.
+
+    ``flush`` ends every streamed chunk on a byte boundary, so clients can decode each chunk
+    as it arrives.
+    """
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress = self._compressor.process
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+            self._compress = self._compressor.compress
+        self.encoding = encoding
+
+    def flush(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compress(data) + self._compressor.flush()
+        return self._compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compress(data) + self._compressor.finish()
+        return self._compress(data) + self._compressor.flush()
+
+
+def compress(body: bytes, encoding: str, gzip_level: int | None = None, brotli_quality: int | None = None) -> bytes:
+    """
+    Compress a whole body.
+
+    :param body: Uncompressed body.
+    :param encoding: ``br`` or ``gzip``.
+    :param gzip_level: gzip level, defaults to ``COMPRESSION_GZIP_LEVEL``.
+    :param brotli_quality: brotli quality, defaults to ``COMPRESSION_BROTLI_QUALITY``.
+    :return: Compressed body.
+    """
+
+    return Encoder(
+        encoding,
+        config.COMPRESSION_GZIP_LEVEL if gzip_level is None else gzip_level,
+        config.COMPRESSION_BROTLI_QUALITY if brotli_quality is None else brotli_quality,
+    ).finish(body)
+
+
+def mark_encoded(headers: MutableHeaders, encoding: str):
+    """
+    Set the headers of a response whose body was compressed with ``encoding``.
+
+    A strong ETag names the exact bytes, so it is weakened: the representation is the same
+    whichever coding is used and ``If-None-Match`` keeps matching.
+    """
+
+    headers["Content-Encoding"] = encoding
+    headers.add_vary_header("Accept-Encoding")
+    etag = headers.get("etag")
+    if etag is not None and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses text responses of at least ``minimum_size`` bytes with the
+    coding negotiated from ``Accept-Encoding``.
+
+    Streamed responses are compressed chunk by chunk. Responses that already carry a
+    ``Content-Encoding``, e.g. precompressed cache entries, are passed through.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder = None
+
+        async def send_compressed(message):
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is None:
+                # A later chunk of a response that is either streamed compressed or passed through.
+                if encoder is not None:
+                    body = encoder.flush(body) if more_body else encoder.finish(body)
+                    message = {"type": "http.response.body", "body": body, "more_body": more_body}
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start)
+            if self._should_compress(start["status"], headers) and (more_body or len(body) >= self.minimum_size):
+                encoder = Encoder(encoding, self.gzip_level, self.brotli_quality)
+                mark_encoded(headers, encoding)
+                del headers["Content-Length"]
+                body = encoder.flush(body) if more_body else encoder.finish(body)
+                if not more_body:
+                    headers["Content-Length"] = str(len(body))
+                message = {"type": "http.response.body", "body": body, "more_body": more_body}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _should_compress(status: int, headers: MutableHeaders) -> bool:
+        if status < 200 or status in (204, 304) or "content-encoding" in headers:
+            return False
+        return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
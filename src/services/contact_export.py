@@ -0,0 +1,34 @@
+import csv
+import io
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.repository import app_hw as repositories_app_hw
+from src.schemas.app_hw import ContactResponse
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+async def export_contacts(db: AsyncSession, user_id: int, fmt: str, batch_size: int):
+    """
+    Render the user's contacts as NDJSON or CSV, one chunk per fetched batch.
+
+    :param db: SQLAlchemy async session object.
+    :param user_id: User ID of the owner.
+    :param fmt: ``ndjson`` or ``csv``.
+    :param batch_size: Rows fetched and rendered per chunk.
+    :return: Async iterator of text chunks.
+    """
+
+    fields = list(ContactResponse.model_fields)
+    if fmt == "csv":
+        yield ",".join(fields) + "\r\n"
+    async for contacts in repositories_app_hw.stream_contacts(db, user_id, batch_size):
+        items = [ContactResponse.model_validate(contact) for contact in contacts]
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerows([getattr(item, field) for field in fields] for item in items)
+            yield buffer.getvalue()
+        else:
+            yield "".join(item.model_dump_json() + "\n" for item in items)
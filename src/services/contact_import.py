@@ -0,0 +1,110 @@
+import csv
+import io
+import itertools
+import json
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.repository import app_hw as repositories_app_hw
+from src.schemas.app_hw import ContactSchema
+
+FORMATS = ("csv", "ndjson")
+# The report keeps the first errors only, so a broken file can not blow up the response.
+MAX_REPORTED_ERRORS = 1000
+
+
+def read_records(file, fmt: str):
+    """
+    Parse an uploaded file lazily, one record at a time.
+
+    :param file: Binary file object.
+    :param fmt: ``csv`` (with a header row) or ``ndjson``.
+    :return: Iterator of ``(row number, dict or error message)``.
+    """
+
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            for number, record in enumerate(csv.DictReader(text), start=1):
+                # Empty CSV cells mean "not set", not an empty string.
+                yield number, {key: value for key, value in record.items() if key and value != ""}
+        else:
+            number = 0
+            for line in text:
+                if not line.strip():
+                    continue
+                number += 1
+                try:
+                    record = json.loads(line)
+                except ValueError as err:
+                    yield number, f"Invalid JSON: {err}"
+                    continue
+                yield number, record if isinstance(record, dict) else "Expected a JSON object"
+    except UnicodeDecodeError:
+        yield 0, "File is not valid UTF-8"
+    finally:
+        # Leave the upload open, it is closed by the request.
+        text.detach()
+
+
+def validate(number: int, record) -> ContactSchema | list[str]:
+    if isinstance(record, str):
+        return [record]
+    try:
+        return ContactSchema(**record)
+    except ValidationError as err:
+        return [f"{'.'.join(map(str, error['loc'])) or 'row'}: {error['msg']}" for error in err.errors()]
+    except TypeError:
+        return ["Invalid row"]
+
+
+async def import_contacts(file, fmt: str, db: AsyncSession, user_id: int, batch_size: int):
+    """
+    Stream contacts from an uploaded file into the database in batches.
+
+    Only one batch of rows is held in memory at a time; each batch is validated with
+    :class:`ContactSchema` and inserted with a single statement.
+
+    :param file: Binary file object of the upload.
+    :param fmt: ``csv`` or ``ndjson``.
+    :param db: SQLAlchemy async session object.
+    :param user_id: User ID of the owner.
+    :param batch_size: Rows per INSERT.
+    :return: Import report.
+    """
+
+    records = read_records(file, fmt)
+    received = imported = failed = 0
+    errors = []
+
+    def fail(number: int, messages: list[str]):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": number, "errors": messages})
+
+    while True:
+        # Reading the spooled upload may hit the disk, keep it off the event loop.
+        chunk = await run_in_threadpool(list, itertools.islice(records, batch_size))
+        if not chunk:
+            break
+        batch = []
+        for number, record in chunk:
+            received += 1
+            result = validate(number, record)
+            if isinstance(result, ContactSchema):
+                batch.append((number, result))
+            else:
+                fail(number, result)
+
+        inserted = await repositories_app_hw.add_contacts([body for _, body in batch], db, user_id)
+        for number, body in batch:
+            if body.email in inserted:
+                imported += 1
+                inserted.discard(body.email)
+            else:
+                fail(number, ["Contact with this email or phone number already exists"])
+
+    return {"received": received, "imported": imported, "failed": failed, "errors": errors}
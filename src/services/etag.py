@@ -0,0 +1,34 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    """
+    Build a strong ETag from the values that determine a representation.
+
+    :param parts: Data version and every request parameter that changes the body.
+    :return: Quoted ETag.
+    """
+
+    return f'"{hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check ``If-None-Match`` against the current ETag, with the weak comparison RFC 9110 uses for it.
+
+    :param request: Incoming request.
+    :param etag: Current ETag.
+    :return: True if the client's copy is current.
+    """
+
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
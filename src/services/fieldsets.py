@@ -0,0 +1,48 @@
+import functools
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel, create_model
+
+
+@functools.lru_cache(maxsize=None)
+def sparse_schema(schema: type[BaseModel], fields: tuple[str, ...] | None) -> type[BaseModel]:
+    """
+    Build a model with only the selected fields of ``schema``, keeping their types and validation.
+
+    :param schema: Full response model.
+    :param fields: Selected field names, or None for the full model.
+    :return: Pydantic model.
+    """
+
+    if fields is None:
+        return schema
+    definitions = {name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields}
+    return create_model(f"{schema.__name__}Fields", __config__=schema.model_config, **definitions)
+
+
+class Fieldset:
+    """
+    Dependency that parses a ``fields`` query parameter against a response model.
+
+    Returns None when the parameter is missing, otherwise the selected names in model order;
+    the ``id`` field is always included.
+    """
+
+    def __init__(self, schema: type[BaseModel], always: tuple[str, ...] = ("id",)):
+        self.schema = schema
+        self.always = always
+
+    def __call__(
+            self,
+            fields: str | None = Query(None, description="Comma-separated fields to return, e.g. id,first_name")
+    ) -> tuple[str, ...] | None:
+        if fields is None:
+            return None
+        names = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = names - set(self.schema.model_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        names.update(self.always)
+        return tuple(name for name in self.schema.model_fields if name in names)
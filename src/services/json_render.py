@@ -0,0 +1,14 @@
+import orjson
+
+
+def render_rows(rows) -> str:
+    """
+    Serialize database rows to a JSON array in one pass, without building Pydantic models.
+
+    Dates are written as ISO 8601 strings, as ``model_dump(mode="json")`` does.
+
+    :param rows: Row mappings keyed by response field name.
+    :return: JSON text.
+    """
+
+    return orjson.dumps([dict(row) for row in rows]).decode()
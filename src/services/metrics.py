@@ -0,0 +1,173 @@
+import contextvars
+import functools
+import inspect
+import time
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+
+from src.services.slow_queries import slow_query_log
+
+UNLABELED = "unlabeled"
+
+STATEMENT_LATENCY = Histogram(
+    "db_statement_duration_seconds",
+    "Latency of a single SQL statement.",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+STATEMENT_ROWS = Histogram(
+    "db_statement_rows",
+    "Rows returned or affected by a single SQL statement.",
+    ["operation"],
+    buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000),
+)
+REQUEST_STATEMENTS = Histogram(
+    "db_statements_per_request",
+    "SQL statements executed while handling one HTTP request.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 34),
+)
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests",
+    "Response cache lookups by route and result (hit or miss).",
+    ["route", "result"],
+)
+
+current_operation = contextvars.ContextVar("current_operation", default=UNLABELED)
+request_counter = contextvars.ContextVar("request_counter", default=None)
+
+
+class StatementCounter:
+    """
+    Statements executed within one request.
+    """
+
+    def __init__(self):
+        self.statements = 0
+
+
+def instrumented(func):
+    """
+    Label every statement a repository coroutine runs with ``<module>.<function>``,
+    e.g. ``app_hw.get_contacts``.
+
+    Async generators are labelled one step at a time, so the label never leaks into the
+    consumer between items.
+    """
+
+    operation = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def generator_wrapper(*args, **kwargs):
+            generator = func(*args, **kwargs)
+            try:
+                while True:
+                    token = current_operation.set(operation)
+                    try:
+                        item = await generator.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        current_operation.reset(token)
+                    yield item
+            finally:
+                await generator.aclose()
+
+        return generator_wrapper
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = current_operation.set(operation)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            current_operation.reset(token)
+
+    return wrapper
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    operation = current_operation.get()
+    rows = cursor.rowcount
+    if rows is None or rows < 0:
+        # SELECT on the async adapters reports -1, they buffer the fetched rows in _rows.
+        rows = len(getattr(cursor, "_rows", None) or ())
+    STATEMENT_LATENCY.labels(operation).observe(elapsed)
+    STATEMENT_ROWS.labels(operation).observe(rows)
+    counter = request_counter.get()
+    if counter is not None:
+        counter.statements += 1
+    slow_query_log.observe(conn, statement, parameters, context, elapsed, operation)
+
+
+def instrument_engine(engine):
+    """
+    Attach statement timing hooks to an engine.
+
+    :param engine: Sync or async SQLAlchemy engine.
+    :return:
+    """
+
+    sync_engine = engine.sync_engine if hasattr(engine, "sync_engine") else engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that counts SQL statements per request and records them by route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        counter = StatementCounter()
+        token = request_counter.set(counter)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_counter.reset(token)
+            route = scope.get("route")
+            REQUEST_STATEMENTS.labels(route.path if route is not None else "unmatched").observe(counter.statements)
+
+
+class PoolCollector:
+    """
+    Prometheus collector that reads connection pool statistics at scrape time.
+    """
+
+    def __init__(self, manager):
+        self._manager = manager
+
+    def collect(self):
+        monitors = [("primary", self._manager.pool_monitor)]
+        monitors += [(f"replica{i}", monitor) for i, monitor in enumerate(self._manager.replica_pool_monitors)]
+
+        gauges = {
+            name: GaugeMetricFamily(f"db_pool_{name}", f"Connections {name.replace('_', ' ')}.", labels=["engine"])
+            for name in ("checked_out", "idle", "overflow", "available")
+        }
+        wait_max = GaugeMetricFamily("db_pool_wait_seconds_max", "Longest checkout wait.", labels=["engine"])
+        timeouts = CounterMetricFamily("db_pool_timeouts", "Checkouts that hit the pool timeout.", labels=["engine"])
+        for label, monitor in monitors:
+            stats = monitor.snapshot()
+            for name, gauge in gauges.items():
+                gauge.add_metric([label], stats[name])
+            wait_max.add_metric([label], stats["wait_ms_max"] / 1000)
+            timeouts.add_metric([label], stats["timeouts"])
+
+        yield from gauges.values()
+        yield wait_max
+        yield timeouts
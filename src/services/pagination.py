@@ -0,0 +1,34 @@
+import base64
+import json
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(**position) -> str:
+    """
+    Encode a keyset position as an opaque, URL-safe cursor.
+
+    :param position: Sort key values of the last item on the page.
+    :return: Cursor string.
+    """
+
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, *keys: str) -> dict:
+    """
+    Decode a cursor produced by :func:`encode_cursor`.
+
+    :param cursor: Cursor string from the client.
+    :param keys: Sort keys the cursor must contain.
+    :return: Keyset position.
+    """
+
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(position, dict) or any(key not in position for key in keys):
+            raise ValueError(cursor)
+        return position
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
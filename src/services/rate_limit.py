@@ -0,0 +1,170 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+
+from fastapi import Depends, HTTPException, Request, status
+from redis.exceptions import RedisError
+
+from src.conf.config import config
+from src.services.auth import Principal, auth_service
+from src.services.cache import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket holding up to ``capacity`` tokens and refilling ``rate`` tokens per second.
+    """
+
+    __slots__ = ("capacity", "rate", "tokens", "updated", "pending", "synced_at")
+
+    def __init__(self, capacity: int, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = float(capacity)
+        self.updated = now
+        self.pending = 0
+        self.synced_at = None
+
+    def take(self, now: float) -> float:
+        """
+        Take one token.
+
+        :param now: Current monotonic time.
+        :return: 0 if a token was taken, otherwise seconds until one is available.
+        """
+
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.pending += 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Rate limiter that decides from in-process token buckets.
+
+    With a Redis client every bucket is reconciled at most once per ``sync_interval``: the
+    hits taken locally since the last sync are added to a Redis sliding-window counter shared
+    by all workers, and the bucket is drained down to what the window has left. Between syncs
+    no Redis round trip is made, so the global limit may be exceeded by roughly
+    ``sync_interval * rate`` per worker. When Redis is unavailable the local buckets keep
+    deciding on their own.
+    """
+
+    def __init__(self, client=None, prefix: str = "ratelimit", sync_interval: float = 1.0,
+                 maxsize: int = 10000, enabled: bool = True, clock=time.monotonic):
+        self.client = client
+        self.prefix = prefix
+        self.sync_interval = sync_interval
+        self.maxsize = maxsize
+        self.enabled = enabled
+        self.clock = clock
+        self._buckets = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    async def hit(self, name: str, key: str, times: int, seconds: float) -> float:
+        """
+        Count one request against a limit.
+
+        :param name: Limit name.
+        :param key: Client key, such as an IP address or a user id.
+        :param times: Requests allowed per window.
+        :param seconds: Window length in seconds.
+        :return: 0 if the request is allowed, otherwise seconds to wait.
+        """
+
+        if not self.enabled:
+            return 0
+        bucket_key = f"{name}:{key}"
+        now = self.clock()
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            bucket = self._buckets[bucket_key] = TokenBucket(times, times / seconds, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(bucket_key)
+
+        if self.client is not None and (bucket.synced_at is None or now - bucket.synced_at >= self.sync_interval):
+            bucket.synced_at = now
+            await self._sync(bucket_key, bucket, times, seconds)
+        return bucket.take(now)
+
+    async def _sync(self, bucket_key: str, bucket: TokenBucket, times: int, seconds: float):
+        period_ms = int(seconds * 1000)
+        now_ms = int(time.time() * 1000)
+        window = now_ms // period_ms
+        current_key = f"{self.prefix}:{bucket_key}:{window}"
+        previous_key = f"{self.prefix}:{bucket_key}:{window - 1}"
+        # Hits taken while the pipeline is in flight stay pending for the next sync.
+        sent = bucket.pending
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.incrby(current_key, sent)
+                pipe.pexpire(current_key, 2 * period_ms)
+                pipe.get(previous_key)
+                current, _, previous = await pipe.execute()
+        except RedisError as err:
+            logger.warning("Rate limit sync failed, using local buckets: %s", err)
+            return
+        bucket.pending -= sent
+        elapsed = (now_ms % period_ms) / period_ms
+        used = int(previous or 0) * (1 - elapsed) + int(current)
+        bucket.tokens = min(bucket.tokens, max(times - used, 0))
+
+    async def clear(self):
+        self._buckets.clear()
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimit:
+    """
+    Route dependency allowing ``times`` requests per ``seconds`` to each client.
+
+    Use ``Depends(limit.by_ip)`` to key by client address and ``Depends(limit.by_user)`` to key
+    by the authenticated user. Rejected requests get 429 with a ``Retry-After`` header.
+    """
+
+    def __init__(self, name: str, times: int, seconds: float = 60, limiter: RateLimiter | None = None):
+        self.name = name
+        self.times = times
+        self.seconds = seconds
+        self.limiter = limiter if limiter is not None else rate_limiter
+
+    async def hit(self, key: str):
+        retry_after = await self.limiter.hit(self.name, key, self.times, self.seconds)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    async def by_ip(self, request: Request):
+        await self.hit(client_ip(request))
+
+    async def by_user(self, user: Principal = Depends(auth_service.get_current_principal)):
+        await self.hit(str(user.id))
+
+
+rate_limiter = RateLimiter(
+    redis_client if config.RATE_LIMIT_BACKEND == "redis" else None,
+    sync_interval=config.RATE_LIMIT_SYNC_INTERVAL,
+    maxsize=config.RATE_LIMIT_MAXSIZE,
+    enabled=config.RATE_LIMIT_ENABLED,
+)
+ip_limit = RateLimit("ip", config.RATE_LIMIT_IP_PER_MINUTE)
+user_limit = RateLimit("user", config.RATE_LIMIT_USER_PER_MINUTE)
+login_limit = RateLimit("login", config.RATE_LIMIT_LOGIN_PER_MINUTE)
+signup_limit = RateLimit("signup", config.RATE_LIMIT_SIGNUP_PER_MINUTE)
@@ -0,0 +1,150 @@
+import time
+from collections import OrderedDict, defaultdict
+
+from src.conf.config import config
+from src.services.cache import redis_client
+
+
+class InMemoryRefreshTokenStore:
+    """
+    Process-local refresh token store, for tests and single-worker setups.
+
+    Every login starts a rotation family. The family remembers the ``jti`` of the only
+    refresh token that may still be used; presenting any older token of the family is
+    treated as reuse and revokes the whole family.
+
+    Families are kept in expiry order. Expired ones are swept on every :meth:`issue`, and
+    the oldest are evicted once ``maxsize`` are stored, so abandoned logins are not kept.
+    Every worker has its own families, so production with several workers needs the
+    ``redis`` backend.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._families = OrderedDict()
+        self._user_families = defaultdict(set)
+
+    def __len__(self):
+        return len(self._families)
+
+    def _family(self, family_id: str):
+        family = self._families.get(family_id)
+        if family is None:
+            return None
+        if family["expires_at"] <= time.monotonic():
+            self._drop(family_id)
+            return None
+        return family
+
+    def _drop(self, family_id: str):
+        family = self._families.pop(family_id, None)
+        if family is None:
+            return
+        family_ids = self._user_families.get(family["email"])
+        if family_ids is not None:
+            family_ids.discard(family_id)
+            if not family_ids:
+                del self._user_families[family["email"]]
+
+    def _sweep(self):
+        now = time.monotonic()
+        while self._families:
+            family_id, family = next(iter(self._families.items()))
+            if family["expires_at"] > now and len(self._families) < self.maxsize:
+                break
+            self._drop(family_id)
+
+    async def issue(self, family_id: str, jti: str, email: str, ttl: float):
+        self._sweep()
+        self._families[family_id] = {"jti": jti, "email": email, "expires_at": time.monotonic() + ttl}
+        self._families.move_to_end(family_id)
+        self._user_families[email].add(family_id)
+
+    async def rotate(self, family_id: str, jti: str, new_jti: str, ttl: float) -> bool:
+        family = self._family(family_id)
+        if family is None:
+            return False
+        if family["jti"] != jti:
+            await self.revoke_family(family_id)
+            return False
+        family["jti"] = new_jti
+        family["expires_at"] = time.monotonic() + ttl
+        self._families.move_to_end(family_id)
+        return True
+
+    async def revoke_family(self, family_id: str):
+        self._drop(family_id)
+
+    async def revoke_user(self, email: str):
+        for family_id in self._user_families.pop(email, set()):
+            self._families.pop(family_id, None)
+
+
+class RedisRefreshTokenStore:
+    """
+    Redis refresh token store with the same rotation and reuse detection rules as
+    :class:`InMemoryRefreshTokenStore`. Rotation is a single Lua script, so two workers
+    can never both accept the same token.
+    """
+
+    ROTATE_SCRIPT = """
+    local current = redis.call('GET', KEYS[1])
+    if not current then
+        return 0
+    end
+    if current ~= ARGV[1] then
+        redis.call('DEL', KEYS[1])
+        return -1
+    end
+    redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[3])
+    return 1
+    """
+
+    def __init__(self, client, prefix: str = "refresh"):
+        self.client = client
+        self.prefix = prefix
+
+    def _family_key(self, family_id: str) -> str:
+        return f"{self.prefix}:family:{family_id}"
+
+    def _user_key(self, email: str) -> str:
+        return f"{self.prefix}:user:{email}"
+
+    async def issue(self, family_id: str, jti: str, email: str, ttl: float):
+        ttl_ms = int(ttl * 1000)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self._family_key(family_id), jti, px=ttl_ms)
+            pipe.sadd(self._user_key(email), family_id)
+            pipe.pexpire(self._user_key(email), ttl_ms)
+            await pipe.execute()
+
+    async def rotate(self, family_id: str, jti: str, new_jti: str, ttl: float) -> bool:
+        result = await self.client.eval(
+            self.ROTATE_SCRIPT, 1, self._family_key(family_id), jti, new_jti, int(ttl * 1000)
+        )
+        return int(result) == 1
+
+    async def revoke_family(self, family_id: str):
+        await self.client.delete(self._family_key(family_id))
+
+    async def revoke_user(self, email: str):
+        family_ids = await self.client.smembers(self._user_key(email))
+        keys = [self._family_key(f.decode() if isinstance(f, bytes) else f) for f in family_ids]
+        await self.client.delete(self._user_key(email), *keys)
+
+
+def build_refresh_token_store(backend: str, maxsize: int):
+    """
+    Create the refresh token store for the configured backend.
+
+    :param backend: ``memory`` or ``redis``.
+    :param maxsize: Maximum families for the in-process backend.
+    :return: Refresh token store.
+    """
+
+    if backend == "redis":
+        return RedisRefreshTokenStore(redis_client)
+    return InMemoryRefreshTokenStore(maxsize)
+
+
+refresh_token_store = build_refresh_token_store(config.REFRESH_TOKEN_BACKEND, config.REFRESH_TOKEN_MAXSIZE)
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import re
+from collections import deque
+from datetime import datetime, timezone
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.conf.config import config
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS) "
+# Custom plans print bound values as literals, e.g. ``(email = 'john@example.com'::text)``.
+PLAN_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+PLAN_NUMERIC_LITERAL = re.compile(r"(=|<>|<=|>=|<|>) -?\d+(?:\.\d+)?\b")
+
+
+def redact(parameters):
+    """
+    Replace bound parameter values with their type names.
+
+    :param parameters: DBAPI parameters (dict, sequence or a list of them for executemany).
+    :return: Parameters with the same shape and no values.
+    """
+
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(value) for value in parameters]
+    return f"<{type(parameters).__name__}>"
+
+
+def redact_plan(plan: str) -> str:
+    """
+    Replace the literal values in plan text with ``?``.
+
+    :param plan: EXPLAIN output.
+    :return: Plan without parameter values.
+    """
+
+    plan = PLAN_STRING_LITERAL.sub("'?'", plan)
+    return PLAN_NUMERIC_LITERAL.sub(r"\1 ?", plan)
+
+
+class SlowQueryLog:
+    """
+    Ring buffer of statements slower than a threshold.
+
+    On PostgreSQL a SELECT that crosses the threshold is re-run under
+    ``EXPLAIN (ANALYZE, BUFFERS)`` in a background task and the plan is attached to its entry.
+    """
+
+    def __init__(self, threshold_ms: float, size: int = 200, explain: bool = True, max_explains: int = 2):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.max_explains = max_explains
+        self._entries = deque(maxlen=size)
+        self._explains_running = 0
+        self._tasks = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def observe(self, conn, statement: str, parameters, context, elapsed: float, operation: str):
+        """
+        Record a statement if it took longer than the threshold.
+
+        :param conn: SQLAlchemy connection that ran the statement.
+        :param statement: SQL sent to the driver.
+        :param parameters: Bound parameters sent to the driver.
+        :param context: Execution context of the statement.
+        :param elapsed: Execution time in seconds.
+        :param operation: Repository function label.
+        :return:
+        """
+
+        duration_ms = elapsed * 1000
+        if not self.enabled or duration_ms < self.threshold_ms:
+            return
+        if context is not None and context.execution_options.get("skip_slow_query_log"):
+            return
+
+        entry = {
+            "timestamp": datetime.now(timezone.utc),
+            "operation": operation,
+            "statement": statement,
+            "parameters": redact(parameters),
+            "duration_ms": duration_ms,
+            "plan": None,
+        }
+        self._entries.append(entry)
+        logger.warning("Slow query (%.1f ms) in %s: %s", duration_ms, operation, statement)
+
+        if self._should_explain(conn, statement):
+            self._schedule_explain(conn, statement, parameters, entry)
+
+    def _should_explain(self, conn, statement: str) -> bool:
+        return (
+            self.explain
+            and conn.dialect.name == "postgresql"
+            and statement.lstrip().upper().startswith("SELECT")
+            and self._explains_running < self.max_explains
+        )
+
+    def _schedule_explain(self, conn, statement: str, parameters, entry: dict):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._explains_running += 1
+        task = loop.create_task(self._capture_plan(conn.engine, statement, parameters, entry))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _capture_plan(self, sync_engine, statement: str, parameters, entry: dict):
+        try:
+            async with AsyncEngine(sync_engine).connect() as conn:
+                result = await conn.exec_driver_sql(
+                    EXPLAIN_PREFIX + statement,
+                    parameters,
+                    execution_options={"skip_slow_query_log": True},
+                )
+                entry["plan"] = redact_plan("\n".join(row[0] for row in result))
+                await conn.rollback()
+        except Exception as err:
+            entry["plan"] = f"EXPLAIN failed: {type(err).__name__}"
+        finally:
+            self._explains_running -= 1
+
+    def entries(self, limit: int | None = None, min_ms: float = 0) -> list[dict]:
+        """
+        Logged statements, most recent first.
+
+        :param limit: Maximum number of entries to return.
+        :param min_ms: Only return entries at least this slow.
+        :return: List of entries.
+        """
+
+        result = [entry for entry in reversed(self._entries) if entry["duration_ms"] >= min_ms]
+        return result[:limit] if limit is not None else result
+
+    def clear(self):
+        self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(
+    config.DB_SLOW_QUERY_MS, size=config.DB_SLOW_QUERY_LOG_SIZE, explain=config.DB_SLOW_QUERY_EXPLAIN
+)
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from src.conf.config import config
+from src.services.rate_limit import ip_limit, rate_limiter
+from src.services.slow_queries import slow_query_log
+
+ADMIN_TOKEN = "admin-secret"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Фікстура для клієнта API з налаштованим токеном адміністратора"""
+    monkeypatch.setattr(config, "ADMIN_TOKEN", ADMIN_TOKEN)
+    with TestClient(app) as c:
+        yield c
+    asyncio.run(rate_limiter.clear())
+
+
+@pytest.mark.parametrize("method, url", [
+    ("GET", "api/admin/pool"),
+    ("GET", "api/admin/pool/replicas"),
+    ("GET", "api/admin/slow_queries"),
+    ("DELETE", "api/admin/slow_queries"),
+])
+def test_admin_routes_require_token(client, method, url):
+    assert client.request(method, url).status_code == 403
+    assert client.request(method, url, headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+
+def test_admin_routes_closed_without_configured_token(client, monkeypatch):
+    # Без ADMIN_TOKEN адмін-маршрути недоступні навіть з порожнім заголовком
+    monkeypatch.setattr(config, "ADMIN_TOKEN", None)
+    response = client.get("api/admin/slow_queries", headers={"X-Admin-Token": ""})
+    assert response.status_code == 403
+
+
+def test_slow_queries_with_token(client):
+    slow_query_log.clear()
+    response = client.get("api/admin/slow_queries", headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert response.status_code == 200, response.text
+    assert response.json() == []
+    response = client.delete("api/admin/slow_queries", headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert response.status_code == 204
+
+
+def test_pool_stats_with_token(client):
+    response = client.get("api/admin/pool", headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert response.status_code == 200, response.text
+    assert "checked_out" in response.json()
+    response = client.get("api/admin/pool/replicas", headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert response.status_code == 200
+
+
+def test_admin_routes_rate_limit(client, monkeypatch):
+    # Обмеження діє і до перевірки токена, тож перебір токена теж гальмується
+    monkeypatch.setattr(ip_limit, "times", 2)
+    for _ in range(2):
+        assert client.get("api/admin/pool").status_code == 403
+    response = client.get("api/admin/pool", headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
@@ -0,0 +1,429 @@
+import asyncio
+import csv
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+from main import app
+from src.database.db import get_db, session_manager
+from src.entity.models import Base, User
+from src.conf.config import config
+from src.services import compression
+from src.services.auth import auth_service
+from src.services.cache import user_cache
+from src.services.pagination import encode_cursor
+from src.services.rate_limit import rate_limiter
+
+# 🎯 Окрема in-memory SQLite база для тестів контактів
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+)
+TestingSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+statements = []
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def record_statement(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+async def override_get_db():
+    async with TestingSessionLocal() as db:
+        yield db
+
+
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with TestingSessionLocal() as db:
+        db.add_all([
+            User(username="owner", email="owner@example.com", password="x"),
+            User(username="stranger", email="stranger@example.com", password="x"),
+        ])
+        await db.commit()
+
+
+async def drop_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+
+@pytest.fixture(scope="function")
+def client():
+    """Фікстура для клієнта API з власною базою"""
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    asyncio.run(create_tables())
+    # Експорт відкриває власну сесію поза залежністю get_db
+    with patch.object(session_manager, "_session_maker", TestingSessionLocal), TestClient(app) as c:
+        yield c
+    asyncio.run(drop_tables())
+    asyncio.run(user_cache.clear())
+    asyncio.run(rate_limiter.clear())
+    if previous is None:
+        app.dependency_overrides.pop(get_db)
+    else:
+        app.dependency_overrides[get_db] = previous
+
+
+def headers(email):
+    return {"Authorization": f"Bearer {auth_service.create_access_token(data={'sub': email, 'ver': 0})}"}
+
+
+@pytest.fixture
+def contact_id(client):
+    response = client.post("api/app_hw/", headers=headers("owner@example.com"), json={
+        "first_name": "John", "last_name": "Doe", "email": "john.doe@example.com",
+        "phone_number": "+380501234567", "date_of_birth": "1990-05-17",
+    })
+    assert response.status_code == 201
+    # Користувач уже в кеші, тож далі рахуються лише запити самого ендпоінта
+    client.get("api/app_hw/", headers=headers("stranger@example.com"))
+    statements.clear()
+    return response.json()["id"]
+
+
+def contact_body(**overrides):
+    body = {
+        "first_name": "Jane", "last_name": "Doe", "email": "jane.doe@example.com",
+        "phone_number": "+380507654321", "date_of_birth": "1991-12-31", "description": "Updated",
+    }
+    body.update(overrides)
+    return body
+
+
+# 🛠 Тест: Оновлення контакту одним запитом до contacts і підвищення версії користувача
+def test_update_contact_statements(client, contact_id):
+    response = client.put(f"api/app_hw/{contact_id}", headers=headers("owner@example.com"), json=contact_body())
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "Jane"
+    assert len(statements) == 2
+    assert statements[0].startswith("UPDATE contacts") and statements[1].startswith("UPDATE users")
+
+
+# 🛠 Тест: Чужий контакт не оновлюється
+def test_update_foreign_contact(client, contact_id):
+    response = client.put(f"api/app_hw/{contact_id}", headers=headers("stranger@example.com"), json=contact_body())
+    assert response.status_code == 404
+    assert len(statements) == 1
+
+
+# 🛠 Тест: Видалення контакту одним запитом до contacts і підвищення версії користувача
+def test_delete_contact_statements(client, contact_id):
+    response = client.delete(f"api/app_hw/{contact_id}", headers=headers("owner@example.com"))
+    assert response.status_code == 200
+    assert response.json()["email"] == "john.doe@example.com"
+    assert len(statements) == 2
+    assert statements[0].startswith("DELETE FROM contacts") and statements[1].startswith("UPDATE users")
+
+    response = client.delete(f"api/app_hw/{contact_id}", headers=headers("owner@example.com"))
+    assert response.status_code == 404
+
+
+# 🛠 Тест: Аватар — перевірка власника до завантаження і один UPDATE
+def test_add_avatar_statements(client, contact_id):
+    with patch("cloudinary.uploader.upload", return_value={"version": 1}) as upload:
+        response = client.patch(
+            f"api/app_hw/{contact_id}/avatar", headers=headers("owner@example.com"),
+            files={"file": ("avatar.png", b"png")},
+        )
+    assert response.status_code == 200
+    assert "ContactsAvatars" in response.json()["avatar"]
+    upload.assert_called_once()
+    assert len(statements) == 3
+    assert statements[0].startswith("SELECT") and statements[1].startswith("UPDATE contacts")
+    assert statements[2].startswith("UPDATE users")
+
+
+# 🛠 Тест: Створення контакту
+def test_add_contact_statements(client, contact_id):
+    response = client.post("api/app_hw/", headers=headers("owner@example.com"), json=contact_body())
+    assert response.status_code == 201
+    assert len(statements) == 3
+    assert statements[0].startswith("INSERT INTO contacts") and statements[1].startswith("UPDATE users")
+
+
+# 🛠 Тест: Часткові поля у відповіді
+def test_sparse_fields(client, contact_id):
+    response = client.get("api/app_hw/", params={"fields": "first_name,last_name"}, headers=headers("owner@example.com"))
+    assert response.status_code == 200
+    assert response.json() == [{"id": contact_id, "first_name": "John", "last_name": "Doe"}]
+
+    response = client.get(f"api/app_hw/{contact_id}", params={"fields": "email"}, headers=headers("owner@example.com"))
+    assert response.json() == {"id": contact_id, "email": "john.doe@example.com"}
+
+    response = client.get("api/app_hw/first_name/John", params={"fields": "last_name"}, headers=headers("owner@example.com"))
+    assert response.json() == [{"id": contact_id, "last_name": "Doe"}]
+
+    # Без fields повертається повний контакт
+    response = client.get("api/app_hw/first_name/John", headers=headers("owner@example.com"))
+    assert response.json()[0]["email"] == "john.doe@example.com"
+
+    response = client.get("api/app_hw/", params={"fields": "password"}, headers=headers("owner@example.com"))
+    assert response.status_code == 400
+
+
+# 🛠 Тест: Умовні GET-запити з ETag
+def test_conditional_get(client, contact_id):
+    owner = headers("owner@example.com")
+    response = client.get("api/app_hw/", headers=owner)
+    etag = response.headers["ETag"]
+
+    # Незмінний список: 304 без жодного запиту, стан списку береться з кешу
+    statements.clear()
+    response = client.get("api/app_hw/", headers={**owner, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert len(statements) == 0
+    # Інші параметри — інше представлення
+    assert client.get("api/app_hw/", params={"fields": "email"}, headers={**owner, "If-None-Match": etag}).status_code == 200
+
+    response = client.get(f"api/app_hw/{contact_id}", headers=owner)
+    contact_etag = response.headers["ETag"]
+    response = client.get(f"api/app_hw/{contact_id}", headers={**owner, "If-None-Match": contact_etag})
+    assert response.status_code == 304
+
+    client.put(f"api/app_hw/{contact_id}", headers=owner, json=contact_body(description="Changed"))
+    assert client.get("api/app_hw/", headers={**owner, "If-None-Match": etag}).status_code == 200
+    response = client.get(f"api/app_hw/{contact_id}", headers={**owner, "If-None-Match": contact_etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != contact_etag
+
+
+# 🛠 Тест: Швидка серіалізація списку дає ту саму відповідь
+def test_fast_json_matches_response_model(client, contact_id, monkeypatch):
+    owner = headers("owner@example.com")
+    expected = client.get("api/app_hw/", headers=owner)
+    sparse = client.get("api/app_hw/", params={"fields": "last_name"}, headers=owner)
+
+    monkeypatch.setattr(config, "CONTACT_FAST_JSON", True)
+    response = client.get("api/app_hw/", headers=owner)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["ETag"] == expected.headers["ETag"]
+    assert response.json() == expected.json()
+    assert client.get("api/app_hw/", params={"fields": "last_name"}, headers=owner).json() == sparse.json()
+
+    # Повна сторінка повертає курсор наступної
+    for i in range(10):
+        client.post("api/app_hw/", headers=owner, json=contact_body(
+            email=f"fast{i}@example.com", phone_number=f"+38050000000{i}"
+        ))
+    response = client.get("api/app_hw/", headers=owner)
+    assert len(response.json()) == 10
+    assert response.headers["X-Next-Cursor"] == encode_cursor(id=response.json()[-1]["id"])
+
+
+# 🛠 Тест: Стиснене тіло кешується поруч із відрендереним
+def test_fast_json_precompressed(client, contact_id, monkeypatch):
+    owner = {**headers("owner@example.com"), "Accept-Encoding": "gzip"}
+    expected = client.get("api/app_hw/", headers=owner).json()
+    monkeypatch.setattr(config, "CONTACT_FAST_JSON", True)
+    monkeypatch.setattr(config, "COMPRESSION_MINIMUM_SIZE", 0)
+
+    with patch.object(compression, "compress", wraps=compression.compress) as compress:
+        for _ in range(2):
+            response = client.get("api/app_hw/", headers=owner)
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert response.headers["ETag"].startswith('W/"')
+            assert response.json() == expected
+    assert compress.call_count == 1
+
+
+# 🛠 Тест: Кожен кешований список зберігає відрендерене й стиснене тіло
+@pytest.mark.parametrize("url, params", [
+    ("api/app_hw/", {}),
+    ("api/app_hw/", {"fields": "first_name"}),
+    ("api/app_hw/first_name/John", {}),
+    ("api/app_hw/last_name/Doe", {}),
+    ("api/app_hw/birthdays", {"days": 366}),
+    ("api/app_hw/search", {"q": "John"}),
+])
+def test_cached_routes_precompressed(client, contact_id, monkeypatch, url, params):
+    owner = headers("owner@example.com")
+    expected = client.get(url, params=params, headers={**owner, "Accept-Encoding": "identity"})
+    assert expected.status_code == 200
+    assert "Content-Encoding" not in expected.headers
+    monkeypatch.setattr(config, "COMPRESSION_MINIMUM_SIZE", 0)
+
+    with patch.object(compression, "compress", wraps=compression.compress) as compress:
+        for _ in range(2):
+            response = client.get(url, params=params, headers={**owner, "Accept-Encoding": "gzip"})
+            assert response.status_code == 200
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert response.json() == expected.json()
+    assert compress.call_count == 1
+
+
+# 🛠 Тест: Браузер бачить заголовки курсора та ETag у крос-доменних відповідях
+def test_cors_exposes_cursor_and_etag(client, contact_id):
+    response = client.get(
+        "api/app_hw/", headers={**headers("owner@example.com"), "Origin": "https://app.example.com"}
+    )
+    assert response.status_code == 200
+    exposed = {name.strip().lower() for name in response.headers["Access-Control-Expose-Headers"].split(",")}
+    assert {"x-next-cursor", "etag"} <= exposed
+
+
+IMPORTED = [
+    {"first_name": "Ann", "last_name": "Lee", "email": "ann@example.com", "phone_number": "+380501111111",
+     "date_of_birth": "1985-03-02", "description": "Imported"},
+    {"first_name": "Bob", "last_name": "Kay", "email": "bob@example.com", "phone_number": "+380502222222",
+     "date_of_birth": "1979-11-30"},
+]
+EXPORTED_FIELDS = ("first_name", "last_name", "email", "phone_number", "date_of_birth")
+
+
+def as_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=[*IMPORTED[0]])
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def as_ndjson(rows):
+    return "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+
+def parse_export(fmt, text):
+    if fmt == "csv":
+        return list(csv.DictReader(io.StringIO(text)))
+    return [json.loads(line) for line in text.splitlines()]
+
+
+# 🛠 Тест: Імпорт файлу через API і експорт того самого назад
+@pytest.mark.parametrize("fmt, encode, media_type", [
+    ("csv", as_csv, "text/csv"),
+    ("ndjson", as_ndjson, "application/x-ndjson"),
+])
+def test_import_then_export(client, contact_id, fmt, encode, media_type):
+    owner = headers("owner@example.com")
+    client.get("api/app_hw/", headers=owner)
+    # Дубль email наявного контакту пропускається (on conflict), решта рядків імпортується
+    duplicate = {**IMPORTED[0], "email": "john.doe@example.com", "phone_number": "+380503333333"}
+    response = client.post(
+        "api/app_hw/import", headers=owner, files={"file": (f"contacts.{fmt}", encode([*IMPORTED, duplicate]))}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"received": 3, "imported": 2, "failed": 1, "errors": [
+        {"row": 3, "errors": ["Contact with this email or phone number already exists"]}
+    ]}
+    # Кеш списку скинуто після імпорту
+    assert len(client.get("api/app_hw/", headers=owner).json()) == 3
+
+    response = client.get("api/app_hw/export", params={"format": fmt}, headers=owner)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith(media_type)
+    assert response.headers["Content-Disposition"] == f'attachment; filename="contacts.{fmt}"'
+    exported = parse_export(fmt, response.text)
+    assert [row["email"] for row in exported] == ["john.doe@example.com", "ann@example.com", "bob@example.com"]
+    for row, expected in zip(exported[1:], IMPORTED):
+        assert {field: row[field] for field in EXPORTED_FIELDS} == {field: expected[field] for field in EXPORTED_FIELDS}
+    assert exported[1]["description"] == "Imported"
+
+    # Чужі контакти не експортуються
+    response = client.get("api/app_hw/export", params={"format": fmt}, headers=headers("stranger@example.com"))
+    assert parse_export(fmt, response.text) == []
+
+
+# 🛠 Тест: Повторний імпорт того самого файлу нічого не дублює
+def test_import_twice(client):
+    owner = headers("owner@example.com")
+    files = {"file": ("contacts.jsonl", as_ndjson(IMPORTED))}
+    assert client.post("api/app_hw/import", headers=owner, files=files).json()["imported"] == 2
+    report = client.post("api/app_hw/import", headers=owner, files=files).json()
+    assert (report["imported"], report["failed"]) == (0, 2)
+    assert len(client.get("api/app_hw/export", headers=owner).text.splitlines()) == 2
+
+
+# 🛠 Тест: Невідомий формат файлу
+def test_import_unsupported_format(client):
+    response = client.post(
+        "api/app_hw/import", headers=headers("owner@example.com"), files={"file": ("contacts.xml", b"<contacts/>")}
+    )
+    assert response.status_code == 400
+
+
+
+def create_contacts(client, email, count, prefix):
+    ids = []
+    for i in range(count):
+        response = client.post("api/app_hw/", headers=headers(email), json=contact_body(
+            email=f"{prefix}{i}@example.com", phone_number=f"+38067{len(prefix):02d}{i:05d}",
+        ))
+        assert response.status_code == 201
+        ids.append(response.json()["id"])
+    return ids
+
+
+# 🛠 Тест: Пакетне оновлення через API — лише свої контакти, список одразу показує зміни
+def test_batch_update(client, contact_id):
+    owner = headers("owner@example.com")
+    own = [contact_id, *create_contacts(client, "owner@example.com", 2, "own")]
+    foreign = create_contacts(client, "stranger@example.com", 1, "foreign")
+    before = client.get("api/app_hw/", headers=owner)
+
+    response = client.patch("api/app_hw/batch", headers=owner, json={
+        "ids": [own[0], own[1], *foreign], "changes": {"description": "Batch"},
+    })
+    assert response.status_code == 200
+    assert response.json() == {"count": 2}
+
+    after = client.get("api/app_hw/", headers=owner)
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert [contact["description"] for contact in after.json()] == ["Batch", "Batch", "Updated"]
+    stranger = client.get(f"api/app_hw/{foreign[0]}", headers=headers("stranger@example.com"))
+    assert stranger.json()["description"] == "Updated"
+
+    # Вибірка за прізвищем
+    response = client.patch("api/app_hw/batch", headers=owner, json={
+        "last_name": "Doe", "changes": {"first_name": "Renamed"},
+    })
+    assert response.json() == {"count": 3}
+    assert {contact["first_name"] for contact in client.get("api/app_hw/", headers=owner).json()} == {"Renamed"}
+    assert client.get(f"api/app_hw/{foreign[0]}", headers=headers("stranger@example.com")).json()["first_name"] == "Jane"
+
+
+# 🛠 Тест: Тіло пакетного оновлення перевіряється
+@pytest.mark.parametrize("body", [
+    {"changes": {"description": "x"}},
+    {"ids": [], "changes": {"description": "x"}},
+    {"ids": [1]},
+    {"ids": [1], "changes": {}},
+    {"ids": [1], "changes": {"first_name": None}},
+    {"ids": [1], "changes": {"first_name": "x" * 26}},
+])
+def test_batch_update_validation(client, contact_id, body):
+    response = client.patch("api/app_hw/batch", headers=headers("owner@example.com"), json=body)
+    assert response.status_code == 422
+
+
+# 🛠 Тест: Пакетне видалення через API — лише свої контакти, список одразу без них
+def test_batch_delete(client, contact_id):
+    owner = headers("owner@example.com")
+    own = [contact_id, *create_contacts(client, "owner@example.com", 2, "own")]
+    foreign = create_contacts(client, "stranger@example.com", 1, "foreign")
+    before = client.get("api/app_hw/", headers=owner)
+
+    # DELETE /batch не перехоплюється маршрутом DELETE /{contact_id}
+    response = client.request("DELETE", "api/app_hw/batch", headers=owner, json={"ids": [own[0], own[2], *foreign]})
+    assert response.status_code == 200
+    assert response.json() == {"count": 2}
+
+    after = client.get("api/app_hw/", headers=owner)
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert [contact["id"] for contact in after.json()] == [own[1]]
+    assert client.get(f"api/app_hw/{foreign[0]}", headers=headers("stranger@example.com")).status_code == 200
+
+    # Порожня вибірка відхиляється, а не видаляє все
+    response = client.request("DELETE", "api/app_hw/batch", headers=owner, json={})
+    assert response.status_code == 422
+    assert len(client.get("api/app_hw/", headers=owner).json()) == 1
+
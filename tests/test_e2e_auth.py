@@ -1,51 +1,68 @@
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
 from main import app
 from src.database.db import get_db
 from src.entity.models import Base, User
 from src.repository.users import get_user_by_email
 from src.services.auth import auth_service
+from src.services.cache import user_cache
+from src.services.rate_limit import login_limit, rate_limiter
 
 # 🎯 Створюємо in-memory SQLite базу для тестування
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+)
+TestingSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 # 🔄 Перевизначаємо БД для FastAPI
-def override_get_db():
-    db = TestingSessionLocal()
-    try:
+async def override_get_db():
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def drop_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+
+async def save(instance):
+    async with TestingSessionLocal() as db:
+        db.add(instance)
+        await db.commit()
+        await db.refresh(instance)
+    return instance
 
 app.dependency_overrides[get_db] = override_get_db
 
 @pytest.fixture(scope="function")
 def client():
     """Фікстура для клієнта API"""
-    Base.metadata.create_all(bind=engine)
+    asyncio.run(create_tables())
     with TestClient(app) as c:
         yield c
-    Base.metadata.drop_all(bind=engine)
+    asyncio.run(drop_tables())
+    asyncio.run(user_cache.clear())
+    asyncio.run(rate_limiter.clear())
 
 @pytest.fixture
 def test_user(client):
     """Фікстура для тестового користувача"""
-    db = TestingSessionLocal()
     user_data = {
         "username": "testuser",
         "email": "test@example.com",
-        "password": auth_service.get_password_hash("testpass")
+        "password": auth_service.pwd_context.hash("testpass")
     }
-    user = User(**user_data)
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    db.close()
-    return user
+    return asyncio.run(save(User(**user_data)))
 
 # 🛠 Тест: Реєстрація нового користувача
 def test_signup(client):
@@ -76,14 +93,20 @@ def test_get_current_user(client, test_user):
     assert response.status_code == 200
     assert response.json()["email"] == test_user.email
 
+# 🛠 Тест: Обмеження кількості спроб входу
+def test_login_rate_limit(client, test_user, monkeypatch):
+    monkeypatch.setattr(login_limit, "times", 2)
+    for _ in range(2):
+        response = client.post("api/auth/login", data={"username": "test@example.com", "password": "wrongpass"})
+        assert response.status_code == 401
+    response = client.post("api/auth/login", data={"username": "test@example.com", "password": "testpass"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
 # 🛠 Тест: Оновлення токена
 def test_refresh_token(client, test_user):
-    refresh_token = auth_service.create_refresh_token(data={"sub": test_user.email})
-    test_user.refresh_token = refresh_token
-    db = TestingSessionLocal()
-    db.add(test_user)
-    db.commit()
-    db.close()
+    response = client.post("api/auth/login", data={"username": "test@example.com", "password": "testpass"})
+    refresh_token = response.json()["refresh_token"]
 
     headers = {"Authorization": f"Bearer {refresh_token}"}
     response = client.get("api/auth/refresh_token", headers=headers)
@@ -91,6 +114,18 @@ def test_refresh_token(client, test_user):
     json_response = response.json()
     assert "access_token" in json_response
     assert "refresh_token" in json_response
+    assert json_response["refresh_token"] != refresh_token
+
+# 🛠 Тест: Повторне використання refresh токена відкликає всю родину
+def test_refresh_token_reuse(client, test_user):
+    response = client.post("api/auth/login", data={"username": "test@example.com", "password": "testpass"})
+    first = response.json()["refresh_token"]
+    second = client.get("api/auth/refresh_token", headers={"Authorization": f"Bearer {first}"}).json()["refresh_token"]
+
+    response = client.get("api/auth/refresh_token", headers={"Authorization": f"Bearer {first}"})
+    assert response.status_code == 401
+    response = client.get("api/auth/refresh_token", headers={"Authorization": f"Bearer {second}"})
+    assert response.status_code == 401
 
 # 🛠 Тест: Підтвердження email
 def test_confirmed_email(client, test_user):
@@ -104,3 +139,16 @@ def test_request_email(client, test_user):
     response = client.post("api/auth/request_email", json={"email": test_user.email})
     assert response.status_code == 200
     assert response.json()["message"] in ["Check your email for confirmation.", "Your email is already confirmed"]
+
+# 🛠 Тест: Вихід відкликає видані токени
+def test_logout(client, test_user):
+    response = client.post("api/auth/login", data={"username": "test@example.com", "password": "testpass"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("api/auth/me", headers=headers).status_code == 200
+
+    refresh_headers = {"Authorization": f"Bearer {response.json()['refresh_token']}"}
+
+    response = client.post("api/auth/logout", headers=headers)
+    assert response.status_code == 204
+    assert client.get("api/auth/me", headers=headers).status_code == 401
+    assert client.get("api/auth/refresh_token", headers=refresh_headers).status_code == 401
@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.entity.models import Base
+from src.repository.users import create_user, get_user_by_email, revoke_tokens
+from src.schemas.user import UserSchema
+from src.services.auth import Principal, auth_service
+from src.services.cache import token_version_cache, user_cache
+
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+class TestStatelessAccessTokens(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine(
+            SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.db = async_sessionmaker(expire_on_commit=False, bind=self.engine)()
+        self.user = await create_user(
+            UserSchema(username="testuser", email="test@example.com", password="12345678"), self.db
+        )
+        self.claims_patch = patch("src.services.auth.config.ACCESS_TOKEN_CLAIMS", True)
+        self.claims_patch.start()
+
+    async def asyncTearDown(self):
+        self.claims_patch.stop()
+        await user_cache.clear()
+        await token_version_cache.clear()
+        await auth_service.token_cache.clear()
+        await self.db.close()
+        await self.engine.dispose()
+
+    async def test_claims_are_embedded(self):
+        claims = auth_service.access_token_claims(self.user)
+        self.assertEqual(claims, {
+            "sub": "test@example.com", "ver": 0, "user_id": self.user.id,
+            "username": "testuser", "confirmed": False,
+        })
+
+    async def test_principal_comes_from_token(self):
+        token = auth_service.create_access_token(data=auth_service.access_token_claims(self.user))
+        principal = await auth_service.get_current_principal(token, self.db)
+        self.assertEqual(principal, Principal(self.user.id, "testuser", "test@example.com", False))
+
+        with patch("src.repository.users.get_token_version") as get_token_version, \
+                patch("src.repository.users.get_user_by_email") as get_user:
+            await auth_service.get_current_principal(token, self.db)
+            get_token_version.assert_not_called()
+            get_user.assert_not_called()
+
+    async def test_token_without_claims_falls_back_to_user(self):
+        token = auth_service.create_access_token(data={"sub": "test@example.com"})
+        principal = await auth_service.get_current_principal(token, self.db)
+        self.assertEqual(principal.id, self.user.id)
+
+    async def test_revoked_tokens_are_rejected(self):
+        token = auth_service.create_access_token(data=auth_service.access_token_claims(self.user))
+        await auth_service.get_current_principal(token, self.db)
+        await auth_service.get_current_user(token, self.db)
+
+        await revoke_tokens(self.user, self.db)
+
+        with self.assertRaises(HTTPException) as err:
+            await auth_service.get_current_principal(token, self.db)
+        self.assertEqual(err.exception.status_code, 401)
+        with self.assertRaises(HTTPException):
+            await auth_service.get_current_user(token, self.db)
+
+        self.db.expunge_all()
+        user = await get_user_by_email("test@example.com", self.db)
+        self.assertEqual(user.token_version, 1)
+        fresh = auth_service.create_access_token(data=auth_service.access_token_claims(user))
+        self.assertEqual((await auth_service.get_current_principal(fresh, self.db)).id, user.id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,269 @@
+import asyncio
+import gzip
+import unittest
+from unittest.mock import patch
+
+from jose import JWTError
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from datetime import date
+
+from src.entity.models import Base
+from src.repository.app_hw import add_contact, add_avatar_url, delete_contact, get_contacts, update_contact
+from src.repository.users import create_user, update_token, confirmed_email
+from src.schemas.app_hw import ContactResponse, ContactSchema
+from src.schemas.user import UserSchema
+from src.services import cache as cache_module
+from src.services.auth import auth_service
+from src.services.cache import LocalCache, RedisCache, ResponseCache, contact_cache, user_cache
+
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+class InMemoryRedis:
+    """Мінімальна заміна redis.asyncio.Redis для тестів."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, px=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def scan_iter(self, match=None):
+        prefix = match.rstrip("*")
+        for key in list(self.data):
+            if key.startswith(prefix):
+                yield key
+
+
+class TestLocalCache(unittest.IsolatedAsyncioTestCase):
+
+    async def test_entries_expire(self):
+        cache = LocalCache(maxsize=10, ttl=0.05)
+        await cache.set("a", 1)
+        self.assertEqual(await cache.get("a"), 1)
+        await asyncio.sleep(0.06)
+        self.assertIsNone(await cache.get("a"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    async def test_least_recently_used_is_evicted(self):
+        cache = LocalCache(maxsize=2, ttl=60)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")
+        await cache.set("c", 3)
+        self.assertEqual(await cache.get("a"), 1)
+        self.assertIsNone(await cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+
+class TestRedisCache(unittest.IsolatedAsyncioTestCase):
+
+    async def test_round_trip_and_delete(self):
+        client = InMemoryRedis()
+        cache = RedisCache(client, "user", ttl=60)
+        await cache.set("test@example.com", {"id": 1, "email": "test@example.com"})
+        self.assertIn("user:test@example.com", client.data)
+        self.assertEqual(await cache.get("test@example.com"), {"id": 1, "email": "test@example.com"})
+        await cache.clear()
+        self.assertIsNone(await cache.get("test@example.com"))
+
+    def test_build_cache_selects_backend(self):
+        self.assertIsInstance(cache_module.build_cache("memory", "user", 10, 60), LocalCache)
+        self.assertIsInstance(cache_module.build_cache("redis", "user", 10, 60), RedisCache)
+
+
+class TestCurrentUserCache(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine(
+            SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.db = async_sessionmaker(expire_on_commit=False, bind=self.engine)()
+        await user_cache.clear()
+        self.user = await create_user(
+            UserSchema(username="testuser", email="test@example.com", password="12345678"), self.db
+        )
+        self.token = auth_service.create_access_token(data={"sub": self.user.email})
+
+    async def asyncTearDown(self):
+        await user_cache.clear()
+        await self.db.close()
+        await self.engine.dispose()
+
+    async def test_second_lookup_skips_database(self):
+        user = await auth_service.get_current_user(self.token, self.db)
+        self.assertEqual(user.id, self.user.id)
+
+        with patch("src.repository.users.get_user_by_email") as get_user_by_email:
+            cached = await auth_service.get_current_user(self.token, self.db)
+            get_user_by_email.assert_not_called()
+        self.assertEqual((cached.id, cached.email, cached.username), (user.id, user.email, user.username))
+
+    async def test_mutations_invalidate(self):
+        await auth_service.get_current_user(self.token, self.db)
+        self.assertIsNotNone(await user_cache.get(self.user.email))
+
+        await update_token(self.user, "refresh", self.db)
+        self.assertIsNone(await user_cache.get(self.user.email))
+
+        await auth_service.get_current_user(self.token, self.db)
+        await confirmed_email(self.user.email, self.db)
+        self.assertIsNone(await user_cache.get(self.user.email))
+
+        user = await auth_service.get_current_user(self.token, self.db)
+        self.assertTrue(user.confirmed)
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine(
+            SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.db = async_sessionmaker(expire_on_commit=False, bind=self.engine)()
+        self.body = ContactSchema(
+            first_name="John", last_name="Doe", email="john.doe@example.com",
+            phone_number="+123456789", date_of_birth=date(1990, 5, 17),
+        )
+        self.calls = 0
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        await self.engine.dispose()
+
+    async def load(self, user_id=1):
+        # Рахуємо звернення до бази даних
+        self.calls += 1
+        return await get_contacts(10, 0, self.db, user_id)
+
+    async def test_second_lookup_is_a_hit(self):
+        await add_contact(self.body, self.db, user_id=1)
+        cache = ResponseCache(LocalCache(100, ttl=60), LocalCache(100, ttl=60))
+        first = await cache.get_or_load(1, "contacts", {"limit": 10}, ContactResponse, self.load)
+        second = await cache.get_or_load(1, "contacts", {"limit": 10}, ContactResponse, self.load)
+        self.assertEqual(first, second)
+        self.assertEqual(first[0]["date_of_birth"], "1990-05-17")
+        self.assertEqual((self.calls, cache.hits, cache.misses), (1, 1, 1))
+
+        await cache.get_or_load(1, "contacts", {"limit": 20}, ContactResponse, self.load)
+        await cache.get_or_load(2, "contacts", {"limit": 10}, ContactResponse, lambda: self.load(2))
+        self.assertEqual(self.calls, 3)
+
+    async def test_redis_backend(self):
+        redis = InMemoryRedis()
+        cache = ResponseCache(RedisCache(redis, "contacts", ttl=60), RedisCache(redis, "contacts_version", ttl=60))
+        await add_contact(self.body, self.db, user_id=1)
+        await cache.get_or_load(1, "contacts", {}, ContactResponse, self.load)
+        await cache.get_or_load(1, "contacts", {}, ContactResponse, self.load)
+        self.assertEqual(self.calls, 1)
+        await cache.invalidate(1)
+        await cache.get_or_load(1, "contacts", {}, ContactResponse, self.load)
+        self.assertEqual(self.calls, 2)
+
+    async def test_rendered_value_is_cached(self):
+        # Готовий JSON-текст кешується як є, зокрема в Redis
+        cache = ResponseCache(RedisCache(InMemoryRedis(), "contacts", ttl=60), LocalCache(100, ttl=60))
+
+        async def render():
+            self.calls += 1
+            return {"body": '[{"id":1}]', "last_id": None}
+
+        first = await cache.get_or_compute(1, "contacts_json", {}, render)
+        second = await cache.get_or_compute(1, "contacts_json", {}, render)
+        self.assertEqual(first, second)
+        self.assertEqual((self.calls, cache.hits), (1, 1))
+
+        # Стиснені байти зберігаються без JSON
+        compressed = gzip.compress(b'[{"id":1}]')
+        await cache.cache.set("body.gzip", compressed)
+        self.assertEqual(await cache.cache.get("body.gzip"), compressed)
+
+    async def test_miss_reads_from_primary(self):
+        # Заповнення кешу після invalidate() не повинно читати відсталу репліку
+        cache = ResponseCache(LocalCache(100, ttl=60), LocalCache(100, ttl=60))
+        await cache.get_or_load(1, "contacts", {}, ContactResponse, self.load, db=self.db)
+        self.assertTrue(self.db.info.get("use_primary"))
+
+        self.db.info.clear()
+        await cache.get_or_load(1, "contacts", {}, ContactResponse, self.load, db=self.db)
+        self.assertNotIn("use_primary", self.db.info)
+
+    async def test_evicted_version_does_not_revive_entries(self):
+        versions = LocalCache(100, ttl=60)
+        cache = ResponseCache(LocalCache(100, ttl=60), versions)
+        await cache.get_or_load(1, "contacts", {}, ContactResponse, self.load)
+        await versions.clear()
+        await cache.get_or_load(1, "contacts", {}, ContactResponse, self.load)
+        self.assertEqual(self.calls, 2)
+
+    async def test_repository_writes_invalidate(self):
+        contact = await add_contact(self.body, self.db, user_id=1)
+        other = self.body.model_copy(update={"email": "jane.doe@example.com", "phone_number": "+987654321"})
+        writes = [
+            lambda: add_contact(other, self.db, user_id=1),
+            lambda: update_contact(contact.id, self.body, self.db, user_id=1),
+            lambda: add_avatar_url(contact.id, "https://example.com/avatar.png", self.db, user_id=1),
+            lambda: delete_contact(contact.id, self.db, user_id=1),
+        ]
+        for write in writes:
+            version = await contact_cache.version(1)
+            await write()
+            self.assertNotEqual(await contact_cache.version(1), version)
+
+
+class TestTokenCache(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        await auth_service.token_cache.clear()
+
+    async def asyncTearDown(self):
+        await auth_service.token_cache.clear()
+
+    async def test_verified_claims_are_reused(self):
+        token = auth_service.create_access_token(data={"sub": "test@example.com"})
+        payload = await auth_service.decode_token(token)
+
+        with patch("src.services.auth.jwt.decode") as decode:
+            cached = await auth_service.decode_token(token)
+            decode.assert_not_called()
+        self.assertEqual(cached, payload)
+        self.assertEqual(len(auth_service.token_cache), 1)
+
+    async def test_entry_does_not_outlive_token(self):
+        token = auth_service.create_access_token(data={"sub": "test@example.com"}, expires_delta=1)
+        await auth_service.decode_token(token)
+        # exp has one second resolution.
+        await asyncio.sleep(2.1)
+
+        with self.assertRaises(JWTError):
+            await auth_service.decode_token(token)
+
+    async def test_invalid_token_is_not_cached(self):
+        token = auth_service.create_access_token(data={"sub": "test@example.com"})
+        with self.assertRaises(JWTError):
+            await auth_service.decode_token(token[:-2] + "xx")
+        self.assertEqual(len(auth_service.token_cache), 0)
+
+    async def test_size_is_capped(self):
+        with patch.object(auth_service.token_cache, "maxsize", 2):
+            for i in range(3):
+                await auth_service.decode_token(auth_service.create_access_token(data={"sub": f"u{i}@example.com"}))
+            self.assertEqual(len(auth_service.token_cache), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import gzip
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from src.services import compression
+from src.services.compression import CompressionMiddleware, negotiate
+
+LARGE = "contact," * 500
+
+
+async def large(request):
+    return PlainTextResponse(LARGE, headers={"ETag": '"v1"'})
+
+
+async def small(request):
+    return PlainTextResponse("ok")
+
+
+async def stream(request):
+    async def chunks():
+        for i in range(3):
+            yield f"line {i}\n"
+
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+
+async def encoded(request):
+    return Response(gzip.compress(LARGE.encode()), media_type="text/plain", headers={"Content-Encoding": "gzip"})
+
+
+async def image(request):
+    return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+
+async def not_modified(request):
+    return Response(status_code=304, headers={"ETag": '"v1"'})
+
+
+app = Starlette(routes=[
+    Route("/large", large), Route("/small", small), Route("/stream", stream),
+    Route("/encoded", encoded), Route("/image", image), Route("/not_modified", not_modified),
+])
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+
+class TestNegotiate(unittest.TestCase):
+
+    def test_gzip_only(self):
+        with patch.object(compression, "brotli", None):
+            self.assertEqual(negotiate("gzip, deflate, br"), "gzip")
+            self.assertIsNone(negotiate("br"))
+            self.assertIsNone(negotiate(None))
+
+    def test_weights(self):
+        # q=0 забороняє кодування, * покриває неперелічені
+        with patch.object(compression, "brotli", None):
+            self.assertIsNone(negotiate("gzip;q=0, identity"))
+            self.assertEqual(negotiate("*"), "gzip")
+            self.assertIsNone(negotiate("*;q=0"))
+            self.assertIsNone(negotiate("gzip;q=bad"))
+            self.assertEqual(negotiate("deflate, *;q=0.5"), "gzip")
+
+    def test_brotli_preferred_when_available(self):
+        with patch.object(compression, "brotli", object()):
+            self.assertEqual(negotiate("gzip, br"), "br")
+            self.assertEqual(negotiate("gzip, br;q=0.5"), "gzip")
+
+
+class TestCompressionMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        self.client = TestClient(app)
+        self.brotli = patch.object(compression, "brotli", None)
+        self.brotli.start()
+
+    def tearDown(self):
+        self.brotli.stop()
+
+    def get(self, path, accept="gzip"):
+        return self.client.get(path, headers={"Accept-Encoding": accept})
+
+    def test_large_response_is_compressed(self):
+        response = self.get("/large")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(response.headers["ETag"], 'W/"v1"')
+        self.assertLess(int(response.headers["Content-Length"]), len(LARGE))
+        self.assertEqual(response.text, LARGE)
+
+    def test_not_compressed(self):
+        # Малі відповіді, зображення, 304 і клієнти без gzip отримують тіло як є
+        for path, accept in (("/small", "gzip"), ("/image", "gzip"), ("/large", "identity")):
+            response = self.get(path, accept)
+            self.assertNotIn("Content-Encoding", response.headers, path)
+        response = self.get("/not_modified")
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], '"v1"')
+
+    def test_stream_is_compressed_per_chunk(self):
+        response = self.get("/stream")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", response.headers)
+        self.assertEqual(response.text, "line 0\nline 1\nline 2\n")
+
+    def test_encoded_response_passes_through(self):
+        response = self.get("/encoded")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.text, LARGE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+import unittest
+from datetime import date
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.entity.models import Base, Contact
+from src.services.contact_export import export_contacts
+
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+class TestContactExport(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine(
+            SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.db = async_sessionmaker(expire_on_commit=False, bind=self.engine)()
+        self.db.add_all(
+            Contact(
+                first_name=f"First{i}", last_name=f"Last{i}", email=f"contact{i}@example.com",
+                phone_number=f"+380{i:09d}", date_of_birth=date(1990, 5, 17),
+                description='Колега, "дуже" важливий' if i == 3 else None, owner_id=1 if i < 25 else 2,
+            )
+            for i in range(30)
+        )
+        await self.db.commit()
+        self.db.expunge_all()
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await self.engine.dispose()
+
+    async def test_ndjson(self):
+        chunks = [chunk async for chunk in export_contacts(self.db, 1, "ndjson", batch_size=10)]
+        # Одна порція на кожну пачку рядків
+        self.assertEqual(len(chunks), 3)
+        rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual([row["email"] for row in rows], [f"contact{i}@example.com" for i in range(25)])
+        self.assertEqual(rows[0]["date_of_birth"], "1990-05-17")
+
+    async def test_csv(self):
+        chunks = [chunk async for chunk in export_contacts(self.db, 1, "csv", batch_size=10)]
+        rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(rows[3]["description"], 'Колега, "дуже" важливий')
+        self.assertEqual(rows[0]["description"], "")
+
+
+if __name__ == '__main__':
+    unittest.main()
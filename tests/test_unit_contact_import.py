@@ -0,0 +1,98 @@
+import io
+import json
+import unittest
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.entity.models import Base, Contact
+from src.services.contact_import import import_contacts
+
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+def contact(i: int, **overrides):
+    row = {
+        "first_name": f"First{i}", "last_name": f"Last{i}", "email": f"contact{i}@example.com",
+        "phone_number": f"+380{i:09d}", "date_of_birth": "1990-05-17",
+    }
+    row.update(overrides)
+    return row
+
+
+class TestContactImport(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine(
+            SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.db = async_sessionmaker(expire_on_commit=False, bind=self.engine)()
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await self.engine.dispose()
+
+    async def count(self, user_id=1):
+        return (await self.db.execute(select(func.count()).where(Contact.owner_id == user_id))).scalar_one()
+
+    async def test_ndjson(self):
+        lines = [json.dumps(contact(i)) for i in range(25)]
+        lines[3] = "{not json"
+        lines[7] = json.dumps(contact(7, email="not-an-email"))
+        lines[9] = json.dumps([1, 2])
+        lines.insert(12, "")
+        file = io.BytesIO("\n".join(lines).encode())
+
+        report = await import_contacts(file, "ndjson", self.db, user_id=1, batch_size=10)
+        self.assertEqual((report["received"], report["imported"], report["failed"]), (25, 22, 3))
+        self.assertEqual([error["row"] for error in report["errors"]], [4, 8, 10])
+        self.assertTrue(report["errors"][1]["errors"][0].startswith("email:"))
+        self.assertEqual(await self.count(), 22)
+        # Завантажений файл не закривається сервісом
+        self.assertFalse(file.closed)
+
+    async def test_csv(self):
+        file = io.BytesIO(
+            "first_name,last_name,email,phone_number,date_of_birth,description\n"
+            "John,Doe,john@example.com,+380501111111,1990-05-17,\n"
+            "Jane,Roe,jane@example.com,+380502222222,1991-12-31,Friend\n"
+            "Jo,Shorty,jo@example.com,+380503333333,1992-01-01,\n".encode()
+        )
+        report = await import_contacts(file, "csv", self.db, user_id=1, batch_size=2)
+        self.assertEqual((report["imported"], report["failed"]), (2, 1))
+        self.assertEqual(report["errors"][0]["row"], 3)
+
+        contacts = (await self.db.execute(select(Contact).order_by(Contact.id))).scalars().all()
+        self.assertIsNone(contacts[0].description)
+        self.assertEqual(contacts[1].birthday_ordinal, 366)
+
+    async def test_duplicates_are_reported(self):
+        first = io.BytesIO("\n".join(json.dumps(contact(i)) for i in range(3)).encode())
+        await import_contacts(first, "ndjson", self.db, user_id=1, batch_size=10)
+
+        rows = [contact(2), contact(3), contact(4, phone_number=contact(3)["phone_number"]), contact(5)]
+        second = io.BytesIO("\n".join(map(json.dumps, rows)).encode())
+        report = await import_contacts(second, "ndjson", self.db, user_id=1, batch_size=10)
+        self.assertEqual((report["imported"], report["failed"]), (2, 2))
+        self.assertEqual([error["row"] for error in report["errors"]], [1, 3])
+        self.assertEqual(await self.count(), 5)
+
+    async def test_oversized_email_fails_only_its_row(self):
+        # Поштова адреса довша за стовпець contacts.email відхиляється валідацією, а не базою
+        long_email = "a" * 45 + "@example.com"
+        rows = [contact(0), contact(1, email=long_email), contact(2)]
+        file = io.BytesIO("\n".join(map(json.dumps, rows)).encode())
+        report = await import_contacts(file, "ndjson", self.db, user_id=1, batch_size=10)
+        self.assertEqual((report["imported"], report["failed"]), (2, 1))
+        self.assertEqual(report["errors"][0]["row"], 2)
+        self.assertTrue(report["errors"][0]["errors"][0].startswith("email:"))
+        self.assertEqual(await self.count(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
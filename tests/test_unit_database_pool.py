@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from src.database.db import DatabaseSessionManager
+from src.database.pool import MonitoredQueuePool
+
+
+class TestPoolMonitor(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        """Окремий файл SQLite з пулом на одне з'єднання."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{os.path.join(self.tmp_dir.name, 'pool.db')}"
+        self.manager = DatabaseSessionManager(
+            url, poolclass=MonitoredQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.1
+        )
+
+    async def asyncTearDown(self):
+        await self.manager.close()
+        self.tmp_dir.cleanup()
+
+    async def test_snapshot_counts_checked_out_connections(self):
+        async with self.manager.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            stats = self.manager.pool_monitor.snapshot()
+            self.assertEqual(stats["checked_out"], 1)
+            self.assertEqual(stats["available"], 0)
+
+        stats = self.manager.pool_monitor.snapshot()
+        self.assertEqual(stats["checked_out"], 0)
+        self.assertEqual(stats["idle"], 1)
+        self.assertEqual(stats["checkouts"], 1)
+        self.assertEqual(stats["pool_class"], "MonitoredQueuePool")
+
+    async def test_timeout_is_recorded(self):
+        async with self.manager.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            with self.assertRaises(PoolTimeoutError):
+                async with self.manager.engine.connect():
+                    pass
+
+        stats = self.manager.pool_monitor.snapshot()
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertGreaterEqual(stats["wait_ms_max"], 100)
+
+    async def test_monitor_survives_dispose(self):
+        await self.manager.close()
+        async with self.manager.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        self.assertEqual(self.manager.pool_monitor.snapshot()["checkouts"], 1)
+        self.assertEqual(self.manager.pool_monitor.wait_count, 1)
+
+    async def test_http_errors_are_not_logged(self):
+        # Звичайні 404 з обробників не засмічують журнал, а справжні помилки потрапляють туди
+        with self.assertNoLogs("src.database.db"):
+            with self.assertRaises(HTTPException):
+                async with self.manager.session():
+                    raise HTTPException(status_code=404, detail="Contact not found")
+        with self.assertLogs("src.database.db", level="WARNING"):
+            with self.assertRaises(RuntimeError):
+                async with self.manager.session():
+                    raise RuntimeError("connection lost")
+
+
+if __name__ == "__main__":
+    unittest.main()
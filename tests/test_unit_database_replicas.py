@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.database.db import DatabaseSessionManager, use_primary
+from src.entity.models import Base, Contact, User
+from src.repository.app_hw import get_contacts, get_contact_by_id, add_contact
+from src.repository.users import get_user_by_email
+from src.schemas.app_hw import ContactSchema
+
+
+class TestReplicaRouting(unittest.IsolatedAsyncioTestCase):
+    """Два файли SQLite замінюють primary та replica."""
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.primary_url = f"sqlite+aiosqlite:///{os.path.join(self.tmp_dir.name, 'primary.db')}"
+        self.replica_url = f"sqlite+aiosqlite:///{os.path.join(self.tmp_dir.name, 'replica.db')}"
+
+        for url, first_name in ((self.primary_url, "Primary"), (self.replica_url, "Replica")):
+            engine = create_async_engine(url)
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with async_sessionmaker(bind=engine)() as db:
+                db.add(User(id=1, username="owner", email="owner@example.com", password="x"))
+                db.add(Contact(
+                    id=1, first_name=first_name, last_name="Doe", email="john.doe@example.com",
+                    phone_number="+123456789", date_of_birth=date(1990, 5, 17), owner_id=1,
+                ))
+                await db.commit()
+            await engine.dispose()
+
+        self.manager = DatabaseSessionManager(self.primary_url, replica_urls=[self.replica_url])
+
+    async def asyncTearDown(self):
+        await self.manager.close()
+        self.tmp_dir.cleanup()
+
+    async def test_reads_go_to_replica(self):
+        async with self.manager.session() as db:
+            contacts = await get_contacts(limit=10, offset=0, db=db, user_id=1)
+            contact = await get_contact_by_id(1, db, user_id=1)
+            user = await get_user_by_email("owner@example.com", db)
+
+        self.assertEqual([c.first_name for c in contacts], ["Replica"])
+        self.assertEqual(contact.first_name, "Replica")
+        self.assertIsNotNone(user)
+
+    async def test_writes_and_read_after_write_stay_on_primary(self):
+        body = ContactSchema(
+            first_name="Jane", last_name="Doe", email="jane.doe@example.com",
+            phone_number="+987654321", date_of_birth=date(1992, 6, 10),
+        )
+        async with self.manager.session() as db:
+            await add_contact(body, db, user_id=1)
+            contacts = await get_contacts(limit=10, offset=0, db=db, user_id=1)
+
+        self.assertEqual(sorted(c.first_name for c in contacts), ["Jane", "Primary"])
+
+        async with self.manager.session() as db:
+            contacts = await get_contacts(limit=10, offset=0, db=db, user_id=1)
+        self.assertEqual([c.first_name for c in contacts], ["Replica"])
+
+    async def test_forced_primary(self):
+        async with self.manager.session() as db:
+            use_primary(db)
+            contacts = await get_contacts(limit=10, offset=0, db=db, user_id=1)
+
+        self.assertEqual([c.first_name for c in contacts], ["Primary"])
+
+    async def test_without_replicas_everything_uses_primary(self):
+        manager = DatabaseSessionManager(self.primary_url)
+        async with manager.session() as db:
+            contacts = await get_contacts(limit=10, offset=0, db=db, user_id=1)
+        await manager.close()
+
+        self.assertEqual([c.first_name for c in contacts], ["Primary"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from starlette.requests import Request
+
+from src.services.etag import etag_matches, make_etag, not_modified
+
+
+def request_with(if_none_match=None):
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+class TestEtag(unittest.TestCase):
+
+    def test_make_etag(self):
+        etag = make_etag(1, 2, 3)
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+        self.assertEqual(etag, make_etag(1, 2, 3))
+        # Будь-яка зміна параметрів дає інший ETag
+        self.assertNotEqual(etag, make_etag(1, 2, 4))
+        self.assertNotEqual(make_etag(1, None), make_etag(1, ("id",)))
+
+    def test_etag_matches(self):
+        etag = make_etag("contact", 1)
+        self.assertFalse(etag_matches(request_with(), etag))
+        self.assertTrue(etag_matches(request_with(etag), etag))
+        self.assertTrue(etag_matches(request_with(f'"other", W/{etag}'), etag))
+        self.assertTrue(etag_matches(request_with("*"), etag))
+        self.assertFalse(etag_matches(request_with('"other"'), etag))
+
+    def test_not_modified(self):
+        response = not_modified('"abc"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], '"abc"')
+        self.assertEqual(response.body, b"")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from fastapi import HTTPException
+
+from src.schemas.app_hw import ContactResponse
+from src.services.fieldsets import Fieldset, sparse_schema
+
+
+class TestFieldset(unittest.TestCase):
+
+    def setUp(self):
+        self.fieldset = Fieldset(ContactResponse)
+
+    def test_missing_parameter(self):
+        self.assertIsNone(self.fieldset(None))
+
+    def test_fields_in_model_order_with_id(self):
+        # id додається завжди, порядок — як у моделі, повтори та пробіли ігноруються
+        self.assertEqual(self.fieldset("last_name, first_name,last_name"), ("id", "first_name", "last_name"))
+
+    def test_unknown_field(self):
+        with self.assertRaises(HTTPException) as context:
+            self.fieldset("first_name,password")
+        self.assertEqual(context.exception.status_code, 400)
+        self.assertIn("password", context.exception.detail)
+
+    def test_sparse_schema(self):
+        self.assertIs(sparse_schema(ContactResponse, None), ContactResponse)
+        schema = sparse_schema(ContactResponse, ("id", "email"))
+        self.assertIs(schema, sparse_schema(ContactResponse, ("id", "email")))
+        self.assertEqual(list(schema.model_fields), ["id", "email"])
+        # Валідація полів зберігається
+        with self.assertRaises(ValueError):
+            schema.model_validate({"id": 1, "email": "not an email"})
+
+
+if __name__ == '__main__':
+    unittest.main()
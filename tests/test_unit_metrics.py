@@ -0,0 +1,98 @@
+import unittest
+from datetime import date
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.entity.models import Base
+from src.repository.app_hw import add_contact, get_contacts, stream_contacts
+from src.schemas.app_hw import ContactSchema
+from src.services.metrics import MetricsMiddleware, current_operation, instrument_engine
+
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+def sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestStatementMetrics(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine(
+            SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        instrument_engine(self.engine)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session_maker = async_sessionmaker(expire_on_commit=False, bind=self.engine)
+        self.session = self.session_maker()
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.engine.dispose()
+
+    async def test_statements_are_labeled_by_repository_function(self):
+        labels = {"operation": "app_hw.get_contacts"}
+        count_before = sample("db_statement_duration_seconds_count", labels)
+        rows_before = sample("db_statement_rows_sum", labels)
+
+        body = ContactSchema(
+            first_name="John", last_name="Doe", email="john.doe@example.com",
+            phone_number="+123456789", date_of_birth=date(1990, 5, 17),
+        )
+        await add_contact(body, self.session, user_id=1)
+        await get_contacts(limit=10, offset=0, db=self.session, user_id=1)
+
+        self.assertEqual(sample("db_statement_duration_seconds_count", labels), count_before + 1)
+        self.assertEqual(sample("db_statement_rows_sum", labels), rows_before + 1)
+        self.assertGreater(sample("db_statement_duration_seconds_count", {"operation": "app_hw.add_contact"}), 0)
+
+    async def test_async_generators_are_labeled_per_step(self):
+        labels = {"operation": "app_hw.stream_contacts"}
+        count_before = sample("db_statement_duration_seconds_count", labels)
+        body = ContactSchema(
+            first_name="John", last_name="Doe", email="john.doe@example.com",
+            phone_number="+123456789", date_of_birth=date(1990, 5, 17),
+        )
+        await add_contact(body, self.session, user_id=1)
+
+        batches = 0
+        async for contacts in stream_contacts(self.session, user_id=1):
+            batches += 1
+            # Мітка не просочується у код, що споживає генератор
+            self.assertNotEqual(current_operation.get(), "app_hw.stream_contacts")
+        self.assertEqual(batches, 1)
+        self.assertGreater(sample("db_statement_duration_seconds_count", labels), count_before)
+
+    async def test_statements_per_request(self):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        async def get_session():
+            async with self.session_maker() as db:
+                yield db
+
+        @app.get("/contacts")
+        async def contacts(db=Depends(get_session)):
+            await get_contacts(limit=10, offset=0, db=db, user_id=1)
+            await get_contacts(limit=10, offset=10, db=db, user_id=1)
+            return []
+
+        labels = {"route": "/contacts"}
+        count_before = sample("db_statements_per_request_count", labels)
+        sum_before = sample("db_statements_per_request_sum", labels)
+
+        # TestClient runs the app on its own loop, the StaticPool connection is shared.
+        with TestClient(app) as client:
+            self.assertEqual(client.get("/contacts").status_code, 200)
+
+        self.assertEqual(sample("db_statements_per_request_count", labels), count_before + 1)
+        self.assertEqual(sample("db_statements_per_request_sum", labels), sum_before + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
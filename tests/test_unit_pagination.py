@@ -0,0 +1,24 @@
+import unittest
+
+from fastapi import HTTPException
+
+from src.services.pagination import decode_cursor, encode_cursor
+
+
+class TestCursor(unittest.TestCase):
+
+    def test_round_trip(self):
+        cursor = encode_cursor(id=12345)
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor, "id"), {"id": 12345})
+
+    def test_invalid_cursor(self):
+        # Зіпсований курсор або курсор без потрібного ключа дає 400
+        for cursor in ("not a cursor", encode_cursor(name="John"), "W10"):
+            with self.assertRaises(HTTPException) as context:
+                decode_cursor(cursor, "id")
+            self.assertEqual(context.exception.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
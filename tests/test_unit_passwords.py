@@ -0,0 +1,36 @@
+import asyncio
+import unittest
+
+from fastapi import HTTPException
+
+from src.services.passwords import PasswordHasher
+
+
+class TestPasswordHasher(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.hasher = PasswordHasher(workers=1, max_queue=1)
+
+    async def asyncTearDown(self):
+        self.hasher.shutdown()
+
+    async def test_hash_and_verify_in_process_pool(self):
+        hashed = await self.hasher.hash("testpass")
+        self.assertTrue(await self.hasher.verify("testpass", hashed))
+        self.assertFalse(await self.hasher.verify("wrongpass", hashed))
+        self.assertEqual(self.hasher.in_flight, 0)
+
+    async def test_queue_limit_returns_503_with_retry_after(self):
+        results = await asyncio.gather(
+            *(self.hasher.hash("testpass") for _ in range(3)), return_exceptions=True
+        )
+
+        rejected = [result for result in results if isinstance(result, HTTPException)]
+        self.assertEqual(len(rejected), 1)
+        self.assertEqual(rejected[0].status_code, 503)
+        self.assertGreaterEqual(int(rejected[0].headers["Retry-After"]), 1)
+        self.assertEqual(self.hasher.rejected, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import unittest
+
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.services.rate_limit import RateLimit, RateLimiter, TokenBucket
+
+
+class FakeClock:
+    """Керований годинник для перевірки поповнення токенів."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class InMemoryPipeline:
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def incrby(self, key, amount):
+        self.commands.append(("incrby", key, amount))
+
+    def pexpire(self, key, ms):
+        self.commands.append(("pexpire", key, ms))
+
+    def get(self, key):
+        self.commands.append(("get", key))
+
+    async def execute(self):
+        self.redis.executions += 1
+        if self.redis.before_execute is not None:
+            await self.redis.before_execute()
+        if self.redis.fail:
+            raise RedisConnectionError("redis is down")
+        results = []
+        for command, key, *args in self.commands:
+            if command == "incrby":
+                self.redis.data[key] = self.redis.data.get(key, 0) + args[0]
+                results.append(self.redis.data[key])
+            elif command == "pexpire":
+                results.append(True)
+            else:
+                value = self.redis.data.get(key)
+                results.append(None if value is None else str(value).encode())
+        return results
+
+
+class InMemoryRedis:
+    """Мінімальна заміна redis.asyncio.Redis з підтримкою pipeline."""
+
+    def __init__(self):
+        self.data = {}
+        self.executions = 0
+        self.fail = False
+        self.before_execute = None
+
+    def pipeline(self, transaction=True):
+        return InMemoryPipeline(self)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_take_and_refill(self):
+        bucket = TokenBucket(capacity=2, rate=1, now=0)
+        self.assertEqual(bucket.take(0), 0)
+        self.assertEqual(bucket.take(0), 0)
+        self.assertAlmostEqual(bucket.take(0), 1)
+        self.assertEqual(bucket.take(1), 0)
+        self.assertEqual(bucket.pending, 3)
+
+    def test_refill_is_capped(self):
+        bucket = TokenBucket(capacity=2, rate=1, now=0)
+        bucket.take(100)
+        self.assertEqual(bucket.tokens, 1)
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    async def test_local_limit(self):
+        limiter = RateLimiter(clock=self.clock)
+        for _ in range(3):
+            self.assertEqual(await limiter.hit("login", "1.2.3.4", times=3, seconds=60), 0)
+        self.assertAlmostEqual(await limiter.hit("login", "1.2.3.4", times=3, seconds=60), 20)
+        # Інший ключ має власне відро
+        self.assertEqual(await limiter.hit("login", "5.6.7.8", times=3, seconds=60), 0)
+        self.clock.now += 20
+        self.assertEqual(await limiter.hit("login", "1.2.3.4", times=3, seconds=60), 0)
+
+    async def test_disabled(self):
+        limiter = RateLimiter(enabled=False, clock=self.clock)
+        for _ in range(5):
+            self.assertEqual(await limiter.hit("login", "1.2.3.4", times=1, seconds=60), 0)
+        self.assertEqual(len(limiter), 0)
+
+    async def test_maxsize(self):
+        limiter = RateLimiter(maxsize=2, clock=self.clock)
+        for key in ("a", "b", "c"):
+            await limiter.hit("ip", key, times=1, seconds=60)
+        self.assertEqual(len(limiter), 2)
+
+    async def test_sync_interval(self):
+        redis = InMemoryRedis()
+        limiter = RateLimiter(redis, sync_interval=1, clock=self.clock)
+        for _ in range(5):
+            await limiter.hit("ip", "1.2.3.4", times=100, seconds=60)
+        # Лише перший запит звертається до Redis
+        self.assertEqual(redis.executions, 1)
+        self.clock.now += 1
+        await limiter.hit("ip", "1.2.3.4", times=100, seconds=60)
+        self.assertEqual(redis.executions, 2)
+        self.assertEqual(sum(redis.data.values()), 5)
+
+    async def test_hits_during_sync_are_not_lost(self):
+        redis = InMemoryRedis()
+        limiter = RateLimiter(redis, sync_interval=1, clock=self.clock)
+        await limiter.hit("ip", "1.2.3.4", times=100, seconds=60)
+        self.clock.now += 1
+
+        async def concurrent_hit():
+            await limiter.hit("ip", "1.2.3.4", times=100, seconds=60)
+
+        # Запит, що прийшов під час синхронізації, потрапить у Redis наступного разу
+        redis.before_execute = concurrent_hit
+        await limiter.hit("ip", "1.2.3.4", times=100, seconds=60)
+        redis.before_execute = None
+        self.clock.now += 1
+        await limiter.hit("ip", "1.2.3.4", times=100, seconds=60)
+        self.assertEqual(sum(redis.data.values()), 3)
+
+    async def test_shared_limit_across_workers(self):
+        redis = InMemoryRedis()
+        first = RateLimiter(redis, sync_interval=0, clock=self.clock)
+        second = RateLimiter(redis, sync_interval=0, clock=self.clock)
+        for _ in range(4):
+            self.assertEqual(await first.hit("login", "1.2.3.4", times=4, seconds=60), 0)
+        self.assertGreater(await first.hit("login", "1.2.3.4", times=4, seconds=60), 0)
+        # Другий воркер бачить вікно, вичерпане першим
+        self.assertGreater(await second.hit("login", "1.2.3.4", times=4, seconds=60), 0)
+
+    async def test_redis_failure_falls_back_to_local(self):
+        redis = InMemoryRedis()
+        redis.fail = True
+        limiter = RateLimiter(redis, sync_interval=0, clock=self.clock)
+        self.assertEqual(await limiter.hit("login", "1.2.3.4", times=1, seconds=60), 0)
+        self.assertGreater(await limiter.hit("login", "1.2.3.4", times=1, seconds=60), 0)
+
+
+class TestRateLimit(unittest.IsolatedAsyncioTestCase):
+
+    async def test_too_many_requests(self):
+        limit = RateLimit("login", times=1, seconds=60, limiter=RateLimiter())
+        await limit.hit("1.2.3.4")
+        with self.assertRaises(HTTPException) as context:
+            await limit.hit("1.2.3.4")
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertEqual(context.exception.headers["Retry-After"], "60")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from src.conf.config import Settings
+
+from src.services import auth as auth_module
+from src.services.auth import auth_service
+from src.services.refresh_tokens import InMemoryRefreshTokenStore
+
+
+class TestInMemoryRefreshTokenStore(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.store = InMemoryRefreshTokenStore(maxsize=100)
+
+    async def test_rotate(self):
+        await self.store.issue("family", "jti-1", "test@example.com", ttl=60)
+        self.assertTrue(await self.store.rotate("family", "jti-1", "jti-2", ttl=60))
+        self.assertTrue(await self.store.rotate("family", "jti-2", "jti-3", ttl=60))
+
+    async def test_reuse_revokes_family(self):
+        await self.store.issue("family", "jti-1", "test@example.com", ttl=60)
+        await self.store.rotate("family", "jti-1", "jti-2", ttl=60)
+        # Повторне використання старого токена відкликає всю родину
+        self.assertFalse(await self.store.rotate("family", "jti-1", "jti-3", ttl=60))
+        self.assertFalse(await self.store.rotate("family", "jti-2", "jti-3", ttl=60))
+
+    async def test_unknown_family(self):
+        self.assertFalse(await self.store.rotate("missing", "jti-1", "jti-2", ttl=60))
+
+    async def test_expired_family(self):
+        await self.store.issue("family", "jti-1", "test@example.com", ttl=0)
+        self.assertFalse(await self.store.rotate("family", "jti-1", "jti-2", ttl=60))
+
+    async def test_revoke_user(self):
+        await self.store.issue("first", "jti-1", "test@example.com", ttl=60)
+        await self.store.issue("second", "jti-2", "test@example.com", ttl=60)
+        await self.store.issue("other", "jti-3", "other@example.com", ttl=60)
+        await self.store.revoke_user("test@example.com")
+        self.assertFalse(await self.store.rotate("first", "jti-1", "jti-4", ttl=60))
+        self.assertFalse(await self.store.rotate("second", "jti-2", "jti-4", ttl=60))
+        self.assertTrue(await self.store.rotate("other", "jti-3", "jti-4", ttl=60))
+
+    async def test_issue_sweeps_expired_families(self):
+        # Покинуті родини видаляються при наступному вході, разом із записом користувача
+        await self.store.issue("abandoned", "jti-1", "test@example.com", ttl=0)
+        await self.store.issue("live", "jti-2", "other@example.com", ttl=60)
+        self.assertEqual(len(self.store), 1)
+        self.assertNotIn("test@example.com", self.store._user_families)
+
+    async def test_maxsize(self):
+        for i in range(101):
+            await self.store.issue(f"family{i}", "jti", "test@example.com", ttl=60)
+        self.assertEqual(len(self.store), 100)
+        # Найстаріша родина витісняється
+        self.assertFalse(await self.store.rotate("family0", "jti", "jti-2", ttl=60))
+        self.assertTrue(await self.store.rotate("family100", "jti", "jti-2", ttl=60))
+
+    def test_memory_backend_needs_single_worker(self):
+        # Кожен воркер мав би власні родини, і повторне використання лишилося б непоміченим
+        with self.assertRaises(ValidationError):
+            Settings(REFRESH_TOKEN_BACKEND="memory", WEB_CONCURRENCY=2)
+        self.assertEqual(Settings(REFRESH_TOKEN_BACKEND="redis", WEB_CONCURRENCY=2).WEB_CONCURRENCY, 2)
+
+
+
+class TestRefreshTokenRotation(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.store = InMemoryRefreshTokenStore(maxsize=100)
+        patcher = patch.object(auth_module, "refresh_token_store", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_rotate_refresh_token(self):
+        token = await auth_service.issue_refresh_token("test@example.com")
+        email, new_token = await auth_service.rotate_refresh_token(token)
+        self.assertEqual(email, "test@example.com")
+        self.assertNotEqual(new_token, token)
+        email, _ = await auth_service.rotate_refresh_token(new_token)
+        self.assertEqual(email, "test@example.com")
+
+    async def test_reused_refresh_token(self):
+        token = await auth_service.issue_refresh_token("test@example.com")
+        _, new_token = await auth_service.rotate_refresh_token(token)
+        with self.assertRaises(HTTPException) as context:
+            await auth_service.rotate_refresh_token(token)
+        self.assertEqual(context.exception.status_code, 401)
+        with self.assertRaises(HTTPException):
+            await auth_service.rotate_refresh_token(new_token)
+
+    async def test_refresh_token_without_family(self):
+        token = auth_service.create_refresh_token(data={"sub": "test@example.com"})
+        with self.assertRaises(HTTPException) as context:
+            await auth_service.rotate_refresh_token(token)
+        self.assertEqual(context.exception.status_code, 401)
+
+
+if __name__ == '__main__':
+    unittest.main()
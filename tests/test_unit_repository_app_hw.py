@@ -1,38 +1,38 @@
 import unittest
 from datetime import date
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from src.entity.models import Base, Contact
-from src.schemas.app_hw import ContactSchema
+from sqlalchemy import insert, text, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.entity.models import Base, Contact, User
+from unittest.mock import patch
+
+from src.repository import app_hw as repository_app_hw
+from src.schemas.app_hw import ContactSchema, ContactSelection
 from src.repository.app_hw import (
     get_contacts, get_contact_by_id, get_contact_by_firstname,
-    get_contact_by_lastname, add_contact, update_contact, delete_contact, add_avatar_url
+    get_contact_by_lastname, get_upcoming_birthdays, search_contacts, add_contact, update_contact, delete_contact, add_avatar_url,
+    update_contacts, delete_contacts, get_contacts_version
 )
 
 # Створюємо in-memory SQLite базу для тестування
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
-class TestContactRepository(unittest.TestCase):
 
-    @classmethod
-    def setUpClass(cls):
-        """Ініціалізація бази даних перед тестами."""
-        Base.metadata.create_all(bind=engine)
-        cls.session = TestingSessionLocal()
+class TestContactRepository(unittest.IsolatedAsyncioTestCase):
 
-    @classmethod
-    def tearDownClass(cls):
-        """Закриття сесії та видалення бази після тестів."""
-        cls.session.close()
-        Base.metadata.drop_all(bind=engine)
-
-    def setUp(self):
-        """Очистка перед кожним тестом."""
-        self.session.query(Contact).delete()
-        self.session.commit()
+    async def asyncSetUp(self):
+        """Ініціалізація бази даних перед кожним тестом."""
+        self.engine = create_async_engine(
+            SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        TestingSessionLocal = async_sessionmaker(
+            autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine
+        )
+        self.session = TestingSessionLocal()
 
         self.sample_contact = ContactSchema(
             first_name="John",
@@ -43,34 +43,226 @@ class TestContactRepository(unittest.TestCase):
             description="Test contact"
         )
 
-    def test_add_contact(self):
-        contact = add_contact(self.sample_contact, self.session, user_id=1)
+    async def asyncTearDown(self):
+        """Закриття сесії та видалення бази після кожного тесту."""
+        await self.session.close()
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await self.engine.dispose()
+
+    async def test_add_contact(self):
+        contact = await add_contact(self.sample_contact, self.session, user_id=1)
         self.assertIsNotNone(contact.id)
         self.assertEqual(contact.first_name, "John")
 
-    def test_get_contacts(self):
-        add_contact(self.sample_contact, self.session, user_id=1)
-        contacts = get_contacts(limit=10, offset=0, db=self.session, user_id=1)
+    async def test_get_contacts(self):
+        await add_contact(self.sample_contact, self.session, user_id=1)
+        contacts = await get_contacts(limit=10, offset=0, db=self.session, user_id=1)
         self.assertEqual(len(contacts), 1)
 
-    def test_get_contact_by_id(self):
-        contact = add_contact(self.sample_contact, self.session, user_id=1)
-        found = get_contact_by_id(contact.id, self.session, user_id=1)
+    async def test_get_contacts_after_id(self):
+        ids = []
+        for i in range(5):
+            body = self.sample_contact.model_copy(
+                update={"email": f"john{i}@example.com", "phone_number": f"+38000000000{i}"}
+            )
+            ids.append((await add_contact(body, self.session, user_id=1)).id)
+        await add_contact(self.sample_contact, self.session, user_id=2)
+
+        # Сторінки за курсором не перетинаються і не містять чужих контактів
+        first = await get_contacts(limit=2, offset=0, db=self.session, user_id=1)
+        second = await get_contacts(limit=2, offset=0, db=self.session, user_id=1, after_id=first[-1].id)
+        last = await get_contacts(limit=2, offset=0, db=self.session, user_id=1, after_id=second[-1].id)
+        self.assertEqual([c.id for c in first + second + last], ids)
+        self.assertEqual(
+            [c.id for c in second],
+            [c.id for c in await get_contacts(limit=2, offset=2, db=self.session, user_id=1)],
+        )
+
+    async def add_birthdays(self, *days):
+        for i, day in enumerate(days):
+            body = self.sample_contact.model_copy(update={
+                "first_name": f"Name{i}", "email": f"birthday{i}@example.com",
+                "phone_number": f"+38011111111{i}", "date_of_birth": day,
+            })
+            await add_contact(body, self.session, user_id=1)
+
+    async def test_get_upcoming_birthdays(self):
+        await self.add_birthdays(date(1990, 5, 17), date(1985, 5, 24), date(1970, 5, 25), date(2000, 5, 16))
+        contacts = await get_upcoming_birthdays(self.session, user_id=1, today=date(2026, 5, 17))
+        self.assertEqual([c.date_of_birth for c in contacts], [date(1990, 5, 17), date(1985, 5, 24)])
+
+        contacts = await get_upcoming_birthdays(self.session, user_id=1, days=8, today=date(2026, 5, 17))
+        self.assertEqual(len(contacts), 3)
+        self.assertEqual(await get_upcoming_birthdays(self.session, user_id=2, today=date(2026, 5, 17)), [])
+
+    async def test_get_upcoming_birthdays_year_wrap(self):
+        # Вікно з кінця грудня до початку січня
+        await self.add_birthdays(date(1990, 1, 2), date(1985, 12, 30), date(1970, 1, 10))
+        contacts = await get_upcoming_birthdays(self.session, user_id=1, today=date(2026, 12, 28))
+        self.assertEqual([c.date_of_birth for c in contacts], [date(1985, 12, 30), date(1990, 1, 2)])
+
+    async def test_get_upcoming_birthdays_leap_day(self):
+        await self.add_birthdays(date(2000, 2, 29), date(1990, 3, 1))
+        contacts = await get_upcoming_birthdays(self.session, user_id=1, days=1, today=date(2027, 2, 28))
+        self.assertEqual([c.date_of_birth for c in contacts], [date(2000, 2, 29), date(1990, 3, 1)])
+
+    async def test_update_contact_moves_birthday(self):
+        contact = await add_contact(self.sample_contact, self.session, user_id=1)
+        self.assertEqual(contact.birthday_ordinal, 138)
+        body = self.sample_contact.model_copy(update={"date_of_birth": date(1990, 12, 31)})
+        contact = await update_contact(contact.id, body, self.session, user_id=1)
+        self.assertEqual(contact.birthday_ordinal, 366)
+
+    async def test_birthday_ordinal_is_computed_by_database(self):
+        # Порядковий день рахує база, тож він правильний і для записів в обхід ORM
+        await self.session.execute(text(
+            "INSERT INTO contacts (first_name, last_name, email, phone_number, date_of_birth, owner_id, version) "
+            "VALUES ('Raw', 'Insert', 'raw@example.com', '+380500000001', '2000-02-29', 1, 1)"
+        ))
+        await self.session.commit()
+        contact = (await get_contact_by_firstname("Raw", self.session, user_id=1))[0]
+        self.assertEqual(contact.birthday_ordinal, 60)
+
+    async def test_search_contacts(self):
+        john = await add_contact(self.sample_contact, self.session, user_id=1)
+        jane = await add_contact(self.sample_contact.model_copy(update={
+            "first_name": "Johanna", "last_name": "Smith", "email": "jsmith@example.com",
+            "phone_number": "+380509999999", "description": None,
+        }), self.session, user_id=1)
+        await add_contact(self.sample_contact.model_copy(update={
+            "email": "other@example.com", "phone_number": "+380500000000",
+        }), self.session, user_id=2)
+
+        # Збіг за префіксом у будь-якому полі, лише контакти власника
+        self.assertEqual([c.id for c in await search_contacts("doe", 10, 0, self.session, user_id=1)], [john.id])
+        self.assertEqual([c.id for c in await search_contacts("smith jo", 10, 0, self.session, user_id=1)], [jane.id])
+        self.assertEqual([c.id for c in await search_contacts("test", 10, 0, self.session, user_id=1)], [john.id])
+        self.assertEqual(len(await search_contacts("Joh", 10, 0, self.session, user_id=1)), 2)
+        self.assertEqual(len(await search_contacts("Joh", 1, 1, self.session, user_id=1)), 1)
+        self.assertEqual(await search_contacts("?!", 10, 0, self.session, user_id=1), [])
+
+        # Індекс оновлюється разом з контактом
+        await delete_contact(john.id, self.session, user_id=1)
+        self.assertEqual(await search_contacts("doe", 10, 0, self.session, user_id=1), [])
+
+    async def add_many(self, count, user_id=1):
+        contacts = []
+        for i in range(count):
+            body = self.sample_contact.model_copy(update={
+                "last_name": "Smith" if i % 2 else "Doe", "email": f"many{user_id}_{i}@example.com",
+                "phone_number": f"+3802{user_id}{i:07d}",
+            })
+            contacts.append(await add_contact(body, self.session, user_id=user_id))
+        return contacts
+
+    async def test_update_contacts(self):
+        contacts = await self.add_many(5)
+        others = await self.add_many(2, user_id=2)
+        other_id = others[0].id
+        ids = [c.id for c in contacts[:3]] + [other_id]
+
+        # Чужі контакти не змінюються, навіть якщо їх id передано
+        with patch.object(repository_app_hw, "BATCH_CHUNK_SIZE", 2):
+            count = await update_contacts(
+                ContactSelection(ids=ids), {"description": "Batch", "date_of_birth": date(1990, 12, 31)},
+                self.session, user_id=1,
+            )
+        self.assertEqual(count, 3)
+        self.session.expire_all()
+        updated = await get_contacts(limit=10, offset=0, db=self.session, user_id=1)
+        self.assertEqual([c.description for c in updated], ["Batch"] * 3 + ["Test contact"] * 2)
+        self.assertEqual(updated[0].birthday_ordinal, 366)
+        self.assertEqual((await get_contact_by_id(other_id, self.session, user_id=2)).description, "Test contact")
+
+        count = await update_contacts(
+            ContactSelection(last_name="Smith"), {"first_name": "Jane"}, self.session, user_id=1
+        )
+        self.assertEqual(count, 2)
+
+    async def test_delete_contacts(self):
+        contacts = await self.add_many(5)
+        await self.add_many(2, user_id=2)
+        count = await delete_contacts(ContactSelection(last_name="Doe"), self.session, user_id=1)
+        self.assertEqual(count, 3)
+        count = await delete_contacts(ContactSelection(ids=[c.id for c in contacts]), self.session, user_id=1)
+        self.assertEqual(count, 2)
+        self.assertEqual(await get_contacts(limit=10, offset=0, db=self.session, user_id=1), [])
+        self.assertEqual(len(await get_contacts(limit=10, offset=0, db=self.session, user_id=2)), 2)
+
+    async def test_get_contact_by_id(self):
+        contact = await add_contact(self.sample_contact, self.session, user_id=1)
+        found = await get_contact_by_id(contact.id, self.session, user_id=1)
         self.assertIsNotNone(found)
         self.assertEqual(found.first_name, "John")
 
-    def test_get_contact_by_firstname(self):
-        add_contact(self.sample_contact, self.session, user_id=1)
-        contacts = get_contact_by_firstname("John", self.session, user_id=1)
+    async def test_get_contacts_fields(self):
+        await add_contact(self.sample_contact, self.session, user_id=1)
+        self.session.expunge_all()
+        with patch.object(self.session, "execute", wraps=self.session.execute) as execute:
+            contacts = await get_contacts(limit=10, offset=0, db=self.session, user_id=1, fields=("id", "first_name"))
+        sql = str(execute.call_args.args[0])
+        # Непотрібні колонки не читаються, а звернення до них не робить прихованого запиту
+        self.assertNotIn("description", sql)
+        self.assertNotIn("avatar", sql)
+        self.assertEqual(contacts[0].first_name, "John")
+        with self.assertRaises(InvalidRequestError):
+            contacts[0].description
+
+    async def test_get_contacts_version(self):
+        self.session.add(User(id=1, username="owner", email="owner@example.com", password="x"))
+        await self.session.commit()
+        self.assertEqual(await get_contacts_version(self.session, user_id=1), 0)
+        contact = await add_contact(self.sample_contact, self.session, user_id=1)
+        self.assertEqual(await get_contacts_version(self.session, user_id=1), 1)
+
+        # Кожен запис — поодинокий чи пакетний — змінює версію
+        await add_avatar_url(contact.id, "https://example.com/a.png", self.session, user_id=1)
+        await update_contacts(ContactSelection(ids=[contact.id]), {"description": "x"}, self.session, user_id=1)
+        await delete_contact(contact.id, self.session, user_id=1)
+        self.assertEqual(await get_contacts_version(self.session, user_id=1), 4)
+        # Запис, що нічого не змінив, версію не чіпає
+        await delete_contact(contact.id, self.session, user_id=1)
+        self.assertEqual(await get_contacts_version(self.session, user_id=1), 4)
+        self.assertEqual(await get_contacts_version(self.session, user_id=2), 0)
+
+    async def test_contacts_version_ignores_commit_order(self):
+        # Версія контакту береться з послідовності під час запиту, тож запис, що завершився
+        # пізніше, може мати меншу версію; кількість і максимум тоді не змінюються
+        self.session.add(User(id=1, username="owner", email="owner@example.com", password="x"))
+        await self.session.commit()
+        first = await add_contact(self.sample_contact, self.session, user_id=1)
+        await add_contact(self.sample_contact.model_copy(update={
+            "email": "jane@example.com", "phone_number": "+987654321"
+        }), self.session, user_id=1)
+        version = await get_contacts_version(self.session, user_id=1)
+        await update_contacts(ContactSelection(ids=[first.id]), {"version": first.version}, self.session, user_id=1)
+        self.assertGreater(await get_contacts_version(self.session, user_id=1), version)
+
+    async def test_version_comes_from_database(self):
+        # Версію задає база (на Postgres — послідовність), значення повертається через RETURNING
+        insert_sql = str(insert(Contact).values(first_name="x").compile(dialect=postgresql.dialect()))
+        self.assertIn("nextval('contacts_version_seq')", insert_sql)
+        update_sql = str(update(Contact).values(first_name="x").compile(dialect=postgresql.dialect()))
+        self.assertIn("version=nextval('contacts_version_seq')", update_sql)
+
+        contact = await add_contact(self.sample_contact, self.session, user_id=1)
+        version = contact.version
+        updated = await add_avatar_url(contact.id, "https://example.com/a.png", self.session, user_id=1)
+        self.assertGreater(updated.version, version)
+
+    async def test_get_contact_by_firstname(self):
+        await add_contact(self.sample_contact, self.session, user_id=1)
+        contacts = await get_contact_by_firstname("John", self.session, user_id=1)
         self.assertEqual(len(contacts), 1)
 
-    def test_get_contact_by_lastname(self):
-        add_contact(self.sample_contact, self.session, user_id=1)
-        contacts = get_contact_by_lastname("Doe", self.session, user_id=1)
+    async def test_get_contact_by_lastname(self):
+        await add_contact(self.sample_contact, self.session, user_id=1)
+        contacts = await get_contact_by_lastname("Doe", self.session, user_id=1)
         self.assertEqual(len(contacts), 1)
 
-    def test_update_contact(self):
-        contact = add_contact(self.sample_contact, self.session, user_id=1)
+    async def test_update_contact(self):
+        contact = await add_contact(self.sample_contact, self.session, user_id=1)
         updated_data = ContactSchema(
             first_name="Jane",
             last_name="Doe",
@@ -79,21 +271,30 @@ class TestContactRepository(unittest.TestCase):
             date_of_birth=date(1992, 6, 10),
             description="Updated contact"
         )
-        updated_contact = update_contact(contact.id, updated_data, self.session, user_id=1)
+        updated_contact = await update_contact(contact.id, updated_data, self.session, user_id=1)
         self.assertEqual(updated_contact.first_name, "Jane")
         self.assertEqual(updated_contact.email, "jane.doe@example.com")
 
-    def test_delete_contact(self):
-        contact = add_contact(self.sample_contact, self.session, user_id=1)
-        deleted_contact = delete_contact(contact.id, self.session, user_id=1)
+    async def test_delete_contact(self):
+        contact = await add_contact(self.sample_contact, self.session, user_id=1)
+        deleted_contact = await delete_contact(contact.id, self.session, user_id=1)
         self.assertIsNotNone(deleted_contact)
-        self.assertIsNone(get_contact_by_id(contact.id, self.session, user_id=1))
+        self.assertIsNone(await get_contact_by_id(contact.id, self.session, user_id=1))
 
-    def test_add_avatar_url(self):
-        contact = add_contact(self.sample_contact, self.session, user_id=1)
-        updated_contact = add_avatar_url(contact.id, "https://avatar.com/john.jpg", self.session)
+    async def test_add_avatar_url(self):
+        contact = await add_contact(self.sample_contact, self.session, user_id=1)
+        updated_contact = await add_avatar_url(contact.id, "https://avatar.com/john.jpg", self.session, user_id=1)
         self.assertEqual(updated_contact.avatar, "https://avatar.com/john.jpg")
 
+    async def test_writes_are_scoped_to_owner(self):
+        # Чужий контакт не змінюється і не видаляється
+        contact = await add_contact(self.sample_contact, self.session, user_id=1)
+        self.assertIsNone(await update_contact(contact.id, self.sample_contact, self.session, user_id=2))
+        self.assertIsNone(await add_avatar_url(contact.id, "https://avatar.com/x.jpg", self.session, user_id=2))
+        self.assertIsNone(await delete_contact(contact.id, self.session, user_id=2))
+        found = await get_contact_by_id(contact.id, self.session, user_id=1)
+        self.assertIsNone(found.avatar)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,6 @@
 import unittest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
 from src.entity.models import Base, User
 from src.schemas.user import UserSchema
 from src.repository.users import (
@@ -11,30 +11,29 @@ from src.repository.users import (
 )
 
 # 🎯 Створюємо in-memory SQLite базу для тестування
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 
-class TestUserRepository(unittest.TestCase):
+class TestUserRepository(unittest.IsolatedAsyncioTestCase):
 
-    @classmethod
-    def setUpClass(cls):
-        """Налаштування бази даних перед запуском тестів."""
-        Base.metadata.create_all(bind=engine)
-
-    @classmethod
-    def tearDownClass(cls):
-        """Прибирання після завершення всіх тестів."""
-        Base.metadata.drop_all(bind=engine)
-
-    def setUp(self):
-        """Створення сесії для кожного тесту."""
+    async def asyncSetUp(self):
+        """Налаштування бази даних та створення сесії для кожного тесту."""
+        self.engine = create_async_engine(
+            SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        TestingSessionLocal = async_sessionmaker(
+            autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine
+        )
         self.db = TestingSessionLocal()
 
-    def tearDown(self):
-        """Закриття сесії після кожного тесту."""
-        self.db.close()
+    async def asyncTearDown(self):
+        """Закриття сесії та прибирання бази після кожного тесту."""
+        await self.db.close()
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await self.engine.dispose()
 
     def get_sample_user(self):
         """Приклад користувача для тестування."""
@@ -44,36 +43,36 @@ class TestUserRepository(unittest.TestCase):
             password="12345678"
         )
 
-    def test_create_user(self):
+    async def test_create_user(self):
         """Тест створення користувача."""
         sample_user = self.get_sample_user()
-        user = create_user(sample_user, self.db)
+        user = await create_user(sample_user, self.db)
         self.assertIsNotNone(user.id)
         self.assertEqual(user.email, "test@example.com")
         self.assertEqual(user.username, "testuser")
 
-    def test_get_user_by_email(self):
+    async def test_get_user_by_email(self):
         """Тест отримання користувача за email."""
         sample_user = self.get_sample_user()
-        create_user(sample_user, self.db)
-        user = get_user_by_email("test@example.com", self.db)
+        await create_user(sample_user, self.db)
+        user = await get_user_by_email("test@example.com", self.db)
         self.assertIsNotNone(user)
         self.assertEqual(user.email, "test@example.com")
 
-    def test_update_token(self):
+    async def test_update_token(self):
         """Тест оновлення токена користувача."""
         sample_user = self.get_sample_user()
-        user = create_user(sample_user, self.db)
-        update_token(user, "new_refresh_token", self.db)
-        updated_user = get_user_by_email("test@example.com", self.db)
+        user = await create_user(sample_user, self.db)
+        await update_token(user, "new_refresh_token", self.db)
+        updated_user = await get_user_by_email("test@example.com", self.db)
         self.assertEqual(updated_user.refresh_token, "new_refresh_token")
 
-    def test_confirmed_email(self):
+    async def test_confirmed_email(self):
         """Тест підтвердження email користувача."""
         sample_user = self.get_sample_user()
-        create_user(sample_user, self.db)
-        confirmed_email("test@example.com", self.db)
-        user = get_user_by_email("test@example.com", self.db)
+        await create_user(sample_user, self.db)
+        await confirmed_email("test@example.com", self.db)
+        user = await get_user_by_email("test@example.com", self.db)
         self.assertTrue(user.confirmed)
 
 
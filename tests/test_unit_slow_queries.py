@@ -0,0 +1,97 @@
+import unittest
+from datetime import date
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.entity.models import Base
+from src.repository.app_hw import add_contact, get_contact_by_firstname
+from src.schemas.app_hw import ContactSchema
+from src.services.metrics import instrument_engine
+from src.services.slow_queries import SlowQueryLog, redact, redact_plan, slow_query_log
+
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+class TestRedact(unittest.TestCase):
+
+    def test_values_are_replaced_by_type_names(self):
+        self.assertEqual(redact(("john@example.com", 10, None)), ["<str>", "<int>", None])
+        self.assertEqual(redact({"email": "john@example.com"}), {"email": "<str>"})
+        self.assertEqual(redact([("a", 1), ("b", 2)]), [["<str>", "<int>"], ["<str>", "<int>"]])
+
+    def test_plan_literals_are_replaced(self):
+        # Значення параметрів з EXPLAIN не потрапляють у журнал, вартість і час лишаються
+        plan = (
+            "Index Scan using ix_contacts_email on contacts  (cost=0.15..8.17 rows=1 width=64)\n"
+            "  Index Cond: ((owner_id = 42) AND (email = 'john.o''neil@example.com'::text))\n"
+            "  Filter: (id >= -7)"
+        )
+        redacted = redact_plan(plan)
+        self.assertNotIn("john", redacted)
+        self.assertNotIn("42", redacted)
+        self.assertNotIn("-7", redacted)
+        self.assertIn("(owner_id = ?)", redacted)
+        self.assertIn("(email = '?'::text)", redacted)
+        self.assertIn("cost=0.15..8.17 rows=1", redacted)
+
+
+class TestSlowQueryLog(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine(
+            SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        instrument_engine(self.engine)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session = async_sessionmaker(expire_on_commit=False, bind=self.engine)()
+        self.threshold = slow_query_log.threshold_ms
+        slow_query_log.clear()
+
+    async def asyncTearDown(self):
+        slow_query_log.threshold_ms = self.threshold
+        slow_query_log.clear()
+        await self.session.close()
+        await self.engine.dispose()
+
+    async def test_disabled_by_default_threshold(self):
+        slow_query_log.threshold_ms = 0
+        await get_contact_by_firstname("John", self.session, user_id=1)
+        self.assertEqual(slow_query_log.entries(), [])
+
+    async def test_slow_statement_is_logged_with_redacted_parameters(self):
+        body = ContactSchema(
+            first_name="John", last_name="Doe", email="john.doe@example.com",
+            phone_number="+123456789", date_of_birth=date(1990, 5, 17),
+        )
+        await add_contact(body, self.session, user_id=1)
+        slow_query_log.threshold_ms = 1e-6
+        await get_contact_by_firstname("John", self.session, user_id=1)
+
+        entry = slow_query_log.entries(limit=1)[0]
+        self.assertEqual(entry["operation"], "app_hw.get_contact_by_firstname")
+        self.assertIn("FROM contacts", entry["statement"])
+        self.assertNotIn("John", str(entry["parameters"]))
+        self.assertIn("<str>", entry["parameters"])
+        # EXPLAIN (ANALYZE, BUFFERS) is PostgreSQL only.
+        self.assertIsNone(entry["plan"])
+
+    def test_ring_buffer_keeps_latest_entries(self):
+        log = SlowQueryLog(threshold_ms=1, size=2)
+
+        class Dialect:
+            name = "sqlite"
+
+        class Conn:
+            dialect = Dialect()
+
+        for i in range(3):
+            log.observe(Conn(), f"SELECT {i}", (), None, 0.5, "app_hw.get_contacts")
+
+        self.assertEqual([entry["statement"] for entry in log.entries()], ["SELECT 2", "SELECT 1"])
+        self.assertEqual(log.entries(min_ms=1000), [])
+
+
+if __name__ == "__main__":
+    unittest.main()